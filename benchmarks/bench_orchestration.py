@@ -0,0 +1,210 @@
+"""Orchestration benchmark of `RunContainers` against the fake docker daemon.
+
+Starts and tears down synthetic stacks of a growing number of services and
+reports the time `testcompose` itself spends and the docker API calls it
+makes. The daemon answers without latency unless `--latency` is given, so the
+measured time is the overhead of the orchestration alone.
+
+    python -m benchmarks.bench_orchestration --sizes 1 10 50 200 --save-baseline baseline.json
+    python -m benchmarks.bench_orchestration --sizes 1 10 50 200 --baseline baseline.json
+
+With `--baseline`, the run fails when a stack got slower, or makes more API
+calls, than the baseline allows.
+"""
+import argparse
+import json
+import logging
+import platform
+import statistics
+import sys
+import time
+from typing import Any, Dict, List, Optional
+
+from testcompose.configs.service_config import Config
+from testcompose.models.bootstrap.container_service import ContainerServices
+from testcompose.models.client.client_login import ClientFromEnv
+from testcompose.models.housekeeping.reaper import CleanupBackends
+from testcompose.run_containers import RunContainers
+from tests.fake_docker_daemon import FakeDockerDaemon
+from tests.stacks import synthetic_stack
+
+DEFAULT_SIZES: List[int] = [1, 10, 50, 100, 200]
+# metrics compared against the baseline, and whether they are timings
+_COMPARED_METRICS: Dict[str, bool] = {"startup_s": True, "teardown_s": True, "api_calls": False}
+
+
+def run_benchmark(
+    size: int,
+    parallel_startup: bool = False,
+    latencies: Optional[Dict[str, float]] = None,
+    max_workers: int = 8,
+) -> Dict[str, Any]:
+    """Start and tear down one synthetic stack against a fresh fake daemon.
+
+    Args:
+        size (int): number of services
+        parallel_startup (bool, optional): start services of a dependency level concurrently
+        latencies (Optional[Dict[str, float]], optional): artificial latencies of the daemon per operation
+        max_workers (int, optional): workers of the parallel startup. Defaults to 8.
+
+    Returns:
+        Dict[str, Any]: startup and teardown time in seconds, total API calls and API calls per operation
+    """  # noqa: E501
+    services: ContainerServices = synthetic_stack(size)
+    images: List[str] = list({x.image for x in services.services.values()})
+    with FakeDockerDaemon(latencies=latencies, images=images) as fake:
+        runner: RunContainers = RunContainers(
+            config_services=services,
+            ranked_services=Config(test_services=services).ranked_config_services,
+            env_param=ClientFromEnv(environment={"DOCKER_HOST": fake.base_url}),
+            parallel_startup=parallel_startup,
+            max_workers=max_workers,
+            cleanup_backend=CleanupBackends.NATIVE,
+        )
+        fake.reset_counters()
+        start: float = time.perf_counter()
+        runner.run_containers()
+        started: float = time.perf_counter()
+        runner.stop_running_containers()
+        stopped: float = time.perf_counter()
+        return {
+            "startup_s": round(started - start, 4),
+            "teardown_s": round(stopped - started, 4),
+            "api_calls": sum(fake.api_calls.values()),
+            "api_calls_by_operation": dict(sorted(fake.api_calls.items())),
+        }
+
+
+def run_suite(
+    sizes: List[int],
+    repeat: int = 3,
+    parallel_startup: bool = False,
+    latencies: Optional[Dict[str, float]] = None,
+) -> Dict[str, Any]:
+    """Benchmark every stack size `repeat` times and keep the median timings
+
+    Args:
+        sizes (List[int]): stack sizes
+        repeat (int, optional): runs per size. Defaults to 3.
+        parallel_startup (bool, optional): start services of a dependency level concurrently
+        latencies (Optional[Dict[str, float]], optional): artificial latencies of the daemon per operation
+
+    Returns:
+        Dict[str, Any]: results per stack size, with the settings of the run
+    """  # noqa: E501
+    results: Dict[str, Any] = dict()
+    for size in sizes:
+        runs: List[Dict[str, Any]] = [run_benchmark(size, parallel_startup, latencies) for _ in range(repeat)]
+        startup_s: float = round(statistics.median([x["startup_s"] for x in runs]), 4)
+        results[str(size)] = dict(
+            runs[-1],
+            startup_s=startup_s,
+            teardown_s=round(statistics.median([x["teardown_s"] for x in runs]), 4),
+            startup_per_service_ms=round(startup_s * 1000 / size, 3),
+        )
+    return {
+        "settings": {
+            "parallel_startup": parallel_startup,
+            "latencies": latencies or dict(),
+            "repeat": repeat,
+            "python": platform.python_version(),
+        },
+        "results": results,
+    }
+
+
+def compare(results: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    """Regressions of a run against a baseline. Timings may exceed the baseline by
+    `tolerance`, API calls may not exceed it at all.
+
+    Args:
+        results (Dict[str, Any]): results of `run_suite`
+        baseline (Dict[str, Any]): results of an earlier `run_suite`
+        tolerance (float): allowed relative increase of the timings, e.g. 0.2
+
+    Returns:
+        List[str]: one message per regression
+    """
+    regressions: List[str] = list()
+    for size, result in results["results"].items():
+        expected: Optional[Dict[str, Any]] = baseline["results"].get(size)
+        if not expected:
+            continue
+        for metric, is_timing in _COMPARED_METRICS.items():
+            allowed: float = expected[metric] * (1 + tolerance) if is_timing else expected[metric]
+            if result[metric] > allowed:
+                regressions.append(
+                    f"{size} services: {metric} {result[metric]} exceeds the baseline {expected[metric]}"
+                )
+    return regressions
+
+
+def _table(results: Dict[str, Any], baseline: Optional[Dict[str, Any]]) -> str:
+    rows: List[List[str]] = [["services", "startup s", "per service ms", "teardown s", "api calls"]]
+    for size, result in results["results"].items():
+        expected: Dict[str, Any] = (baseline or {}).get("results", {}).get(size) or dict()
+        row: List[str] = [size]
+        for metric in ["startup_s", "startup_per_service_ms", "teardown_s", "api_calls"]:
+            value: str = str(result[metric])
+            if metric in expected:
+                value += f" ({expected[metric]})"
+            row.append(value)
+        rows.append(row)
+    widths: List[int] = [max([len(row[i]) for row in rows]) for i in range(len(rows[0]))]
+    return "\n".join("  ".join(value.rjust(width) for value, width in zip(row, widths)) for row in rows)
+
+
+def _latencies(values: List[str]) -> Dict[str, float]:
+    latencies: Dict[str, float] = dict()
+    for value in values:
+        operation, _, seconds = value.partition("=")
+        latencies[operation] = float(seconds)
+    return latencies
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Orchestration benchmark of testcompose against a fake docker daemon")  # noqa: E501
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES, help="number of services per stack")  # noqa: E501
+    parser.add_argument("--repeat", type=int, default=3, help="runs per stack size, timings are the median")
+    parser.add_argument("--parallel-startup", action="store_true", help="start services of a level concurrently")  # noqa: E501
+    parser.add_argument(
+        "--latency",
+        action="append",
+        default=list(),
+        metavar="OPERATION=SECONDS",
+        help="artificial latency of a daemon operation, e.g. start=0.05, or *=0.001 for all",
+    )
+    parser.add_argument("--output", help="write the results as JSON to this file")
+    parser.add_argument("--save-baseline", help="write the results as baseline to this file")
+    parser.add_argument("--baseline", help="compare the results with this baseline file")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed relative slowdown against the baseline")  # noqa: E501
+    parser.add_argument("--verbose", action="store_true", help="keep the log output of testcompose")
+    args = parser.parse_args(argv)
+
+    if not args.verbose:
+        for name in [x for x in logging.root.manager.loggerDict if x.startswith("testcompose")]:
+            logging.getLogger(name).setLevel(logging.WARNING)
+
+    baseline: Optional[Dict[str, Any]] = None
+    if args.baseline:
+        with open(args.baseline) as baseline_file:
+            baseline = json.load(baseline_file)
+
+    results: Dict[str, Any] = run_suite(args.sizes, args.repeat, args.parallel_startup, _latencies(args.latency))
+    print(_table(results, baseline))
+    for file_name in [x for x in [args.output, args.save_baseline] if x]:
+        with open(file_name, "w") as results_file:
+            json.dump(results, results_file, indent=2)
+
+    if baseline:
+        if baseline.get("settings", {}).get("parallel_startup") != args.parallel_startup:
+            print("The baseline was recorded with a different startup mode", file=sys.stderr)
+        regressions: List[str] = compare(results, baseline, args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,64 @@
+"""Micro-benchmark of ranking the services of large generated configs with `Config`.
+
+    python -m benchmarks.bench_ranking --sizes 1000 10000
+
+Every service depends on up to three services generated before it, so the
+configs are deep and wide at the same time.
+"""
+import argparse
+import logging
+import random
+import sys
+import time
+from typing import Any, Dict, List, Optional
+
+from testcompose.configs.service_config import Config
+from testcompose.models.bootstrap.container_service import ContainerServices
+
+
+def generated_config(size: int, max_dependencies: int = 3, seed: int = 42) -> ContainerServices:
+    """A config of `size` services with random dependencies on earlier services
+
+    Args:
+        size (int): number of services
+        max_dependencies (int, optional): most dependencies of a service. Defaults to 3.
+        seed (int, optional): seed of the generated dependencies. Defaults to 42.
+
+    Returns:
+        ContainerServices: the config
+    """
+    generator: random.Random = random.Random(seed)
+    services: Dict[str, Any] = dict()
+    for index in range(size):
+        dependency_count: int = min(index, generator.randint(0, max_dependencies))
+        dependencies: List[int] = generator.sample(range(index), dependency_count)
+        services[f"service{index}"] = {
+            "name": f"service{index}",
+            "image": "benchmark/image:1",
+            "exposed_ports": [],
+            "depends_on": [f"service{x}" for x in dependencies],
+        }
+    return ContainerServices(services=services)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Ranking benchmark of large generated configs")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000], help="number of services per config")  # noqa: E501
+    parser.add_argument("--repeat", type=int, default=5, help="runs per config, the fastest is reported")
+    args = parser.parse_args(argv)
+    logging.getLogger("testcompose.configs.service_config").setLevel(logging.WARNING)
+
+    print(f"{'services':>8}  {'levels':>6}  {'rank ms':>9}")
+    for size in args.sizes:
+        config_services: ContainerServices = generated_config(size)
+        timings: List[float] = list()
+        for _ in range(args.repeat):
+            start: float = time.perf_counter()
+            config: Config = Config(test_services=config_services)
+            timings.append(time.perf_counter() - start)
+        print(f"{size:>8}  {len(config.ranked_config_services.ranked_services):>6}  {min(timings) * 1000:>9.2f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
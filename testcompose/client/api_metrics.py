@@ -0,0 +1,195 @@
+import re
+import threading
+from time import perf_counter
+from typing import Any, Dict, List, Optional, Pattern, Tuple
+from urllib.parse import urlsplit
+
+from docker.client import DockerClient  # type: ignore
+from requests import Response
+
+from testcompose.models.client.api_metrics import ApiCall, ApiCallStats
+from testcompose.tracing.phase_tracer import active_phase
+
+_API_VERSION: Pattern[str] = re.compile(r"^/v[0-9.]+(?=/)")
+_RESOURCE: Pattern[str] = re.compile(
+    r"^/(containers|networks|volumes|exec|plugins|services|tasks|secrets|configs|nodes)/(?!(?:json|create|prune)(?:/|$))[^/]+"  # noqa: E501
+)
+# image names may contain slashes, so the name runs up to the action of the request
+_IMAGE: Pattern[str] = re.compile(
+    r"^/images/(?!(?:json|create|prune|load|search|get)(?:/|$)).+?(/(?:json|history|push|tag|get))?$"
+)
+
+
+class DockerApiMetrics:
+    """Records every HTTP request a docker client makes to the daemon: endpoint,
+    method, status, latency and bytes transferred. Requests made within a phase
+    of a `PhaseTracer` are attributed to the service and phase, so a stack can be
+    checked for the requests each of its readiness checks costs.
+    """
+
+    def __init__(self) -> None:
+        self._calls: List[ApiCall] = list()
+        self._lock: threading.Lock = threading.Lock()
+
+    @property
+    def calls(self) -> List[ApiCall]:
+        """Recorded requests, in the order they completed
+
+        Returns:
+            List[ApiCall]: recorded requests
+        """
+        with self._lock:
+            return list(self._calls)
+
+    def instrument(self, docker_client: DockerClient) -> DockerClient:
+        """Record the requests of a docker client
+
+        Args:
+            docker_client (DockerClient): Docker client
+
+        Returns:
+            DockerClient: the same client
+        """
+        docker_client.api.hooks["response"].append(self._record)
+        return docker_client
+
+    def reset(self) -> None:
+        with self._lock:
+            self._calls = list()
+
+    def count(
+        self,
+        endpoint: Optional[str] = None,
+        method: Optional[str] = None,
+        service: Optional[str] = None,
+        phase: Optional[str] = None,
+    ) -> int:
+        """Number of recorded requests matching all given filters
+
+        Args:
+            endpoint (Optional[str]): endpoint, e.g. `/containers/{id}/json`
+            method (Optional[str]): HTTP method
+            service (Optional[str]): service of the traced phase
+            phase (Optional[str]): traced phase
+
+        Returns:
+            int: number of requests
+        """
+        return len(
+            [
+                x
+                for x in self.calls
+                if (endpoint is None or x.endpoint == endpoint)
+                and (method is None or x.method == method)
+                and (service is None or x.service == service)
+                and (phase is None or x.phase == phase)
+            ]
+        )
+
+    def stats(self) -> Dict[Tuple[Optional[str], Optional[str], str], ApiCallStats]:
+        """Recorded requests aggregated by service, phase and endpoint
+
+        Returns:
+            Dict[Tuple[Optional[str], Optional[str], str], ApiCallStats]: statistics per
+                service, phase and `<method> <endpoint>`
+        """
+        stats: Dict[Tuple[Optional[str], Optional[str], str], ApiCallStats] = dict()
+        for call in self.calls:
+            call_stats: ApiCallStats = stats.setdefault(
+                (call.service, call.phase, f"{call.method} {call.endpoint}"), ApiCallStats()
+            )
+            call_stats.count += 1
+            call_stats.errors += int(call.status >= 400)
+            call_stats.total_latency_ms = round(call_stats.total_latency_ms + call.latency_ms, 3)
+            call_stats.max_latency_ms = max(call_stats.max_latency_ms, call.latency_ms)
+            call_stats.bytes_sent += call.bytes_sent
+            call_stats.bytes_received += call.bytes_received or 0
+        return stats
+
+    def report(self) -> str:
+        """The recorded requests aggregated by service, phase and endpoint as a plain
+        text table, with a total row
+
+        Returns:
+            str: report table
+        """
+        rows: List[Tuple[str, ...]] = [
+            ("service", "phase", "request", "count", "errors", "total ms", "max ms", "sent", "received")
+        ]
+        stats: Dict[Tuple[Optional[str], Optional[str], str], ApiCallStats] = self.stats()
+        for (service, phase, request), call_stats in sorted(
+            stats.items(), key=lambda x: (x[0][0] or "", x[0][1] or "", -x[1].count, x[0][2])
+        ):
+            rows.append(
+                (
+                    service or "-",
+                    phase or "-",
+                    request,
+                    str(call_stats.count),
+                    str(call_stats.errors),
+                    f"{call_stats.total_latency_ms:.1f}",
+                    f"{call_stats.max_latency_ms:.1f}",
+                    str(call_stats.bytes_sent),
+                    str(call_stats.bytes_received),
+                )
+            )
+        calls: List[ApiCall] = self.calls
+        rows.append(
+            (
+                "total",
+                "",
+                "",
+                str(len(calls)),
+                str(len([x for x in calls if x.status >= 400])),
+                f"{sum([x.latency_ms for x in calls]):.1f}",
+                f"{max([x.latency_ms for x in calls], default=0):.1f}",
+                str(sum([x.bytes_sent for x in calls])),
+                str(sum([x.bytes_received or 0 for x in calls])),
+            )
+        )
+        widths: List[int] = [max([len(row[i]) for row in rows]) for i in range(len(rows[0]))]
+        return "\n".join(
+            "  ".join(value.ljust(width) for value, width in zip(row, widths)).rstrip() for row in rows
+        )
+
+    @staticmethod
+    def endpoint(url: str) -> str:
+        """Request path without the API version, with container, network, volume and
+        image ids and names replaced by placeholders
+
+        Args:
+            url (str): request url
+
+        Returns:
+            str: endpoint, e.g. `/containers/{id}/json`
+        """
+        path: str = _API_VERSION.sub("", urlsplit(url).path)
+        if path.startswith("/images/"):
+            return _IMAGE.sub(lambda x: "/images/{name}" + (x.group(1) or ""), path)
+        return _RESOURCE.sub(lambda x: f"/{x.group(1)}/{{id}}", path)
+
+    def _record(self, response: Response, *args: Any, **kwargs: Any) -> None:
+        latency: float = response.elapsed.total_seconds()
+        bytes_received: Optional[int] = None
+        if kwargs.get("stream"):
+            # reading a streamed body here would consume it, only its announced length is known
+            content_length: str = response.headers.get("Content-Length", "")
+            bytes_received = int(content_length) if content_length.isdigit() else None
+        else:
+            start: float = perf_counter()
+            bytes_received = len(response.content)
+            latency += perf_counter() - start
+        body: Any = response.request.body
+        service, phase = active_phase()
+        call: ApiCall = ApiCall(
+            method=response.request.method or "GET",
+            endpoint=self.endpoint(response.request.url),  # type: ignore
+            status=response.status_code,
+            latency_ms=round(latency * 1000, 3),
+            bytes_sent=len(body) if isinstance(body, (bytes, str)) else 0,
+            bytes_received=bytes_received,
+            service=service,
+            phase=phase,
+        )
+        with self._lock:
+            self._calls.append(call)
@@ -1,20 +1,31 @@
 import traceback
 from abc import ABC
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import Context, copy_context
+from typing import Any, Dict, Iterable, List, Optional
 
 import docker  # type: ignore
 from docker import DockerClient
 from docker.errors import ImageNotFound  # type: ignore
 
+from testcompose.client.api_metrics import DockerApiMetrics
 from testcompose.log_setup import stream_logger
 from testcompose.models.client.client_login import ClientFromEnv, ClientFromUrl
 from testcompose.models.client.registry_parameters import Login
+from testcompose.tracing.phase_tracer import trace_phase
 
 logger = stream_logger(__name__)
 
 
 class BaseDockerClient(ABC):
-    def __init__(self, client_env_param: ClientFromEnv, client_url_param: ClientFromUrl) -> None:  # noqa: E501
+    def __init__(
+        self,
+        client_env_param: ClientFromEnv,
+        client_url_param: ClientFromUrl,
+        api_metrics: Optional[DockerApiMetrics] = None,
+    ) -> None:
         super(BaseDockerClient, self).__init__()
+        self._api_metrics: Optional[DockerApiMetrics] = api_metrics
         _client_url_param: ClientFromUrl = ClientFromUrl()
         _client_env_param: ClientFromEnv = ClientFromEnv()
 
@@ -36,6 +47,15 @@ class BaseDockerClient(ABC):
     def docker_client(self, client: DockerClient) -> None:
         self._docker_client: DockerClient = client
 
+    @property
+    def api_metrics(self) -> Optional[DockerApiMetrics]:
+        """Requests of the docker client to the daemon, when it was created with `api_metrics`
+
+        Returns:
+            Optional[DockerApiMetrics]: recorded requests
+        """
+        return self._api_metrics
+
     def _init_docker_client(
         self, *, client_url_param: ClientFromUrl, client_env_param: ClientFromEnv
     ) -> DockerClient:  # noqa: E501
@@ -43,6 +63,8 @@ class BaseDockerClient(ABC):
         if client_url_param.docker_host:
             _docker_client = self._docker_client_from_url(client_url_param)
 
+        if self._api_metrics:
+            self._api_metrics.instrument(_docker_client)
         _docker_client.ping()
         return _docker_client
 
@@ -69,14 +91,75 @@ class BaseDockerClient(ABC):
             max_pool_size=client_url_param.max_pool_size,
         )
 
+    @staticmethod
+    def docker_host(docker_client: DockerClient) -> str:
+        """Address of the daemon of a docker client. Clients of different unix sockets
+        or named pipes share the same base url, so their path is used instead.
+
+        Args:
+            docker_client (DockerClient): Docker client
+
+        Returns:
+            str: socket path, pipe path or base url of the daemon
+        """
+        adapter: Any = getattr(docker_client.api, "_custom_adapter", None)
+        return str(
+            getattr(adapter, "socket_path", None) or getattr(adapter, "npipe_path", None) or docker_client.api.base_url  # noqa: E501
+        )
+
     def registry_login(self, login_credentials: Login) -> None:
         if login_credentials.registry:
             self.docker_client.login(**login_credentials.dict())
 
     def pull_docker_image(self, image_name: str) -> None:
+        try:
+            self._pull_missing_image(image_name)
+        except Exception:
+            logger.error(traceback.format_exc())
+
+    def pull_docker_images(self, image_names: Iterable[str], max_workers: int = 4) -> Dict[str, str]:
+        """Pull all images that are not yet available locally. Every distinct
+        image is pulled once, even when several services use it, and the pulls
+        run concurrently on a bounded worker pool.
+
+        Args:
+            image_names (Iterable[str]): image names, duplicates are ignored
+            max_workers (int, optional): maximum number of concurrent pulls. Defaults to 4.
+
+        Returns:
+            Dict[str, str]: error message per image that could not be pulled. Empty if all images are available.
+        """  # noqa: E501
+        distinct_images: List[str] = list(dict.fromkeys(image_names))
+        if not distinct_images:
+            return dict()
+
+        # worker threads do not inherit the context, which carries the phase tracer of the caller
+        context: Context = copy_context()
+        with ThreadPoolExecutor(
+            max_workers=min(max_workers, len(distinct_images)), thread_name_prefix="testcompose-pull"
+        ) as executor:
+            results: List[Optional[str]] = list(
+                executor.map(lambda x: context.copy().run(self._try_pull_missing_image, x), distinct_images)
+            )
+
+        failures: Dict[str, str] = {
+            image: error for image, error in zip(distinct_images, results) if error is not None
+        }
+        for image, error in failures.items():
+            logger.error("Image %s could not be pulled: %s", image, error)
+        return failures
+
+    def _try_pull_missing_image(self, image_name: str) -> Optional[str]:
+        try:
+            with trace_phase("pull", detail=image_name):
+                self._pull_missing_image(image_name)
+        except Exception as exc:
+            return str(exc)
+        return None
+
+    def _pull_missing_image(self, image_name: str) -> None:
         try:
             self.docker_client.images.get(name=image_name)
         except ImageNotFound:
+            logger.info("Pulling image %s", image_name)
             self.docker_client.images.pull(repository=image_name)
-        except Exception:
-            logger.error(traceback.format_exc())
@@ -0,0 +1,226 @@
+import re
+import threading
+from logging import Logger
+from time import monotonic
+from typing import Any, Callable, Dict, List, Match, Optional, Tuple
+
+from docker.client import DockerClient  # type: ignore
+from docker.errors import NotFound  # type: ignore
+from docker.models.containers import Container  # type: ignore
+
+from testcompose.log_setup import stream_logger
+from testcompose.models.container.container_labels import ContainerLabels
+from testcompose.models.container.running_container_attributes import PossibleContainerStates
+from testcompose.models.container.stack_status import ContainerStatus
+
+logger: Logger = stream_logger(__name__)
+
+
+class _InFlightRequest:
+    def __init__(self, generation: int) -> None:
+        self.generation: int = generation
+        self.done: threading.Event = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class CachingDockerClient:
+    """Wraps the docker client of one stack to save daemon round trips while the
+    stack starts. Pings and container inspects are cached for a short time, and
+    callers that inspect the same container at the same time share one request.
+    Given the id of the stack, the state of all its containers is taken from one
+    label filtered container listing, see `stack_status`. Cached inspects and
+    listings are invalidated by the docker events of the stack, see
+    `ContainerEventTracker.add_listener`. Everything else is passed through to
+    the wrapped client.
+
+    Args:
+        docker_client (DockerClient): Docker client
+        inspect_ttl (float): seconds an inspect result or a stack listing is reused. Defaults to 0.5.
+        ping_ttl (float): seconds a successful ping is reused. Defaults to 30.
+        stack_id (Optional[str]): value of the stack label of the containers of the stack
+    """
+
+    def __init__(
+        self,
+        docker_client: DockerClient,
+        inspect_ttl: float = 0.5,
+        ping_ttl: float = 30.0,
+        stack_id: Optional[str] = None,
+    ) -> None:
+        self._docker_client: DockerClient = docker_client
+        self._stack_id: Optional[str] = stack_id
+        self._inspect_ttl: float = inspect_ttl
+        self._ping_ttl: float = ping_ttl
+        self._cache: Dict[str, Tuple[float, Any]] = dict()
+        self._in_flight: Dict[str, _InFlightRequest] = dict()
+        # bumped by every invalidation, results fetched before it are not cached
+        self._generation: int = 0
+        self._lock: threading.Lock = threading.Lock()
+        self._containers: _CachingContainerCollection = _CachingContainerCollection(self)
+
+    @property
+    def docker_client(self) -> DockerClient:
+        return self._docker_client
+
+    @property
+    def stack_id(self) -> Optional[str]:
+        return self._stack_id
+
+    @property
+    def containers(self) -> '_CachingContainerCollection':
+        return self._containers
+
+    def ping(self) -> bool:
+        return bool(self._cached("ping", self._ping_ttl, self._docker_client.ping))
+
+    def inspect_container(self, container_id: str) -> Container:
+        """Inspect a container, or reuse a recent inspect of it.
+
+        Args:
+            container_id (str): container id or name
+
+        Raises:
+            docker.errors.NotFound: when the container does not exist
+
+        Returns:
+            Container: the container
+        """
+        return self._cached(
+            f"container/{container_id}",
+            self._inspect_ttl,
+            lambda: self._docker_client.containers.get(container_id),
+        )
+
+    def stack_status(self) -> Dict[str, ContainerStatus]:
+        """State, health and port mappings of every container of the stack, taken
+        from a single container listing filtered by the stack label. The listing is
+        shared by all callers within `inspect_ttl`, so polling the liveness of the
+        whole stack costs one request per tick.
+
+        Raises:
+            ValueError: when the client was created without a stack id
+
+        Returns:
+            Dict[str, ContainerStatus]: container id to container status
+        """
+        if not self._stack_id:
+            raise ValueError("The status of a stack requires the stack id")
+        return self._cached("stack", self._inspect_ttl, self._list_stack)
+
+    def is_container_running(self, container_id: str) -> bool:
+        """Whether a container of the stack still exists and has not exited, by the
+        stack status. A container that is not listed yet, e.g. because the listing
+        was taken before it was created, is inspected instead.
+
+        Args:
+            container_id (str): container id
+
+        Returns:
+            bool: False if the container has exited or does not exist
+        """
+        status: Optional[ContainerStatus] = self.stack_status().get(container_id)
+        if status:
+            return status.state not in [PossibleContainerStates.EXITED, PossibleContainerStates.DEAD]
+        try:
+            return bool(self.inspect_container(container_id).short_id)
+        except NotFound:
+            return False
+
+    def _list_stack(self) -> Dict[str, ContainerStatus]:
+        # a sparse listing carries state, status and ports, without inspecting every container
+        containers: List[Container] = self._docker_client.containers.list(
+            all=True, sparse=True, filters={"label": f"{ContainerLabels.STACK}={self._stack_id}"}
+        )
+        return {x.id: self.container_status(x.attrs) for x in containers}
+
+    @staticmethod
+    def container_status(summary: Dict[str, Any]) -> ContainerStatus:
+        """Container status from an entry of a container listing
+
+        Args:
+            summary (Dict[str, Any]): entry of `GET /containers/json`
+
+        Returns:
+            ContainerStatus: the container status
+        """
+        # the listing only reports the health as part of the status text, e.g. "Up 5 seconds (healthy)"
+        health: Optional[Match[str]] = re.search(r"\((healthy|unhealthy|health: starting)\)", summary.get("Status") or "")  # noqa: E501
+        ports: Dict[str, str] = dict()
+        for port in summary.get("Ports") or list():
+            if port.get("PublicPort"):
+                ports.setdefault(str(port["PrivatePort"]), str(port["PublicPort"]))
+        return ContainerStatus(
+            container_id=summary["Id"],
+            name=((summary.get("Names") or ["/"])[0]).lstrip("/"),
+            service_name=(summary.get("Labels") or dict()).get(ContainerLabels.SERVICE),
+            state=summary.get("State") or "",
+            health=health.group(1).replace("health: ", "") if health else None,
+            ports=ports,
+        )
+
+    def invalidate(self, container_id: Optional[str] = None, *args: Any) -> None:
+        """Drop cached inspects, of one container or of all containers, and the
+        cached stack status. The signature matches the listeners of `ContainerEventTracker`.
+
+        Args:
+            container_id (Optional[str]): container id, None drops all inspects
+        """
+        with self._lock:
+            self._generation += 1
+            self._cache.pop("stack", None)
+            if container_id is None:
+                self._cache = {k: v for k, v in self._cache.items() if not k.startswith("container/")}
+                return
+            for key in [x for x in self._cache if x.startswith("container/")]:
+                cached: Any = self._cache[key][1]
+                if key == f"container/{container_id}" or getattr(cached, "id", None) == container_id:
+                    self._cache.pop(key)
+
+    def _cached(self, key: str, ttl: float, fetch: Callable[[], Any]) -> Any:
+        with self._lock:
+            cached: Optional[Tuple[float, Any]] = self._cache.get(key)
+            if cached and cached[0] > monotonic():
+                return cached[1]
+            in_flight: Optional[_InFlightRequest] = self._in_flight.get(key)
+            # a request that started before the last invalidation may return what was invalidated
+            owner: bool = in_flight is None or in_flight.generation != self._generation
+            if owner:
+                in_flight = self._in_flight[key] = _InFlightRequest(self._generation)
+
+        if not owner:
+            in_flight.done.wait()  # type: ignore
+            if in_flight.error:  # type: ignore
+                raise in_flight.error  # type: ignore
+            return in_flight.result  # type: ignore
+
+        try:
+            in_flight.result = fetch()  # type: ignore
+            with self._lock:
+                if in_flight.generation == self._generation:  # type: ignore
+                    self._cache[key] = (monotonic() + ttl, in_flight.result)  # type: ignore
+            return in_flight.result  # type: ignore
+        except BaseException as exc:
+            in_flight.error = exc  # type: ignore
+            raise
+        finally:
+            with self._lock:
+                if self._in_flight.get(key) is in_flight:
+                    self._in_flight.pop(key)
+            in_flight.done.set()  # type: ignore
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._docker_client, name)
+
+
+class _CachingContainerCollection:
+    """`DockerClient.containers` with cached `get` calls"""
+
+    def __init__(self, client: CachingDockerClient) -> None:
+        self._client: CachingDockerClient = client
+
+    def get(self, container_id: str) -> Container:
+        return self._client.inspect_container(container_id)
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._client.docker_client.containers, name)
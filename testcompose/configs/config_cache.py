@@ -0,0 +1,178 @@
+import hashlib
+import json
+import os
+import platform
+import threading
+from logging import Logger
+from typing import Any, Dict, List, Optional, Tuple
+
+import pydantic
+import yaml
+
+from testcompose.log_setup import stream_logger
+from testcompose.models.bootstrap.cached_config import CachedConfig
+
+try:
+    from yaml import CSafeLoader as SafeLoader
+except ImportError:  # pragma: no cover
+    from yaml import SafeLoader  # type: ignore
+
+logger: Logger = stream_logger(__name__)
+
+# cached files of another python or pydantic version, or of an older cache layout, are not read
+_CACHE_VERSION: str = f"2-{platform.python_version()}-{pydantic.VERSION}"
+
+
+class ConfigCache:
+    """Cache of validated configs, keyed by the absolute path of the config file.
+    An entry is used as long as every file it was read from is unchanged. A file whose
+    modification time and size are unchanged is not read again, a file that was only
+    touched is recognized by its content hash. Entries are kept in memory, and also
+    written to `cache_directory` when one is given, so other processes reading the
+    same config, e.g. the workers of `pytest-xdist`, skip parsing and validating it.
+
+    Entries are kept as JSON and every `get` returns a copy of its own, so callers
+    may modify the services they got without affecting later loads. The on-disk
+    entries are validated like any other config when they are read.
+
+    Args:
+        cache_directory (Optional[str]): directory of the on-disk cache. Configs are only cached in memory when not set.
+    """  # noqa: E501
+
+    def __init__(self, cache_directory: Optional[str] = None) -> None:
+        self._cache_directory: Optional[str] = cache_directory
+        # fingerprints of the input files and the entry as JSON, by config file
+        self._entries: Dict[str, Tuple[Dict[str, str], str]] = dict()
+        self._lock: threading.Lock = threading.Lock()
+
+    @property
+    def cache_directory(self) -> Optional[str]:
+        return self._cache_directory
+
+    @staticmethod
+    def load_yaml(content: str) -> Any:
+        """Parse YAML with the libyaml loader when PyYAML was built with it
+
+        Args:
+            content (str): YAML document
+
+        Returns:
+            Any: the parsed document
+        """
+        return yaml.load(content, Loader=SafeLoader)
+
+    @staticmethod
+    def fingerprint(file_name: str, content: Optional[str] = None) -> str:
+        """Modification time, size and content hash of a file
+
+        Args:
+            file_name (str): path of the file
+            content (Optional[str]): content of the file, read when not given
+
+        Returns:
+            str: fingerprint of the file
+        """
+        stat: os.stat_result = os.stat(file_name)
+        if content is None:
+            with open(file_name, 'r') as fh:
+                content = fh.read()
+        digest: str = hashlib.sha256(content.encode()).hexdigest()
+        return f"{stat.st_mtime_ns}-{stat.st_size}-{digest}"
+
+    @staticmethod
+    def unchanged(file_name: str, fingerprint: str) -> bool:
+        """Whether a file still has a fingerprint. The file is only read and hashed
+        when its modification time changed while its size did not.
+
+        Args:
+            file_name (str): path of the file
+            fingerprint (str): fingerprint of the file when it was cached
+
+        Returns:
+            bool: True if the content of the file is unchanged
+        """
+        try:
+            stat: os.stat_result = os.stat(file_name)
+        except OSError:
+            return False
+        parts: List[str] = fingerprint.split("-", 2)
+        if len(parts) != 3 or parts[1] != str(stat.st_size):
+            return False
+        mtime, _, digest = parts
+        if mtime == str(stat.st_mtime_ns):
+            return True
+        with open(file_name, 'r') as fh:
+            return hashlib.sha256(fh.read().encode()).hexdigest() == digest
+
+    def get(self, file_name: str) -> Optional[CachedConfig]:
+        """A copy of the cached config of a file, if none of its input files changed
+
+        Args:
+            file_name (str): path of the config file
+
+        Returns:
+            Optional[CachedConfig]: the cached config
+        """
+        path: str = os.path.abspath(file_name)
+        with self._lock:
+            cached: Optional[Tuple[Dict[str, str], str]] = self._entries.get(path)
+        if cached is None and self._cache_directory:
+            cached = self._read(path)
+            if cached:
+                with self._lock:
+                    self._entries[path] = cached
+        if cached and all([self.unchanged(x, y) for x, y in cached[0].items()]):
+            try:
+                return CachedConfig.parse_raw(cached[1])
+            except Exception as exc:
+                logger.debug("Ignoring invalid config cache of %s: %s", path, exc)
+        return None
+
+    def put(self, file_name: str, entry: CachedConfig) -> None:
+        """Cache the config of a file
+
+        Args:
+            file_name (str): path of the config file
+            entry (CachedConfig): the config with the fingerprints of its input files
+        """
+        path: str = os.path.abspath(file_name)
+        payload: str = entry.json()
+        with self._lock:
+            self._entries[path] = (dict(entry.inputs), payload)
+        if self._cache_directory:
+            self._write(path, payload)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries = dict()
+
+    def _cache_file(self, path: str) -> str:
+        key: str = hashlib.sha256(f"{_CACHE_VERSION}:{path}".encode()).hexdigest()
+        return os.path.join(self._cache_directory, f"{key}.json")  # type: ignore
+
+    def _read(self, path: str) -> Optional[Tuple[Dict[str, str], str]]:
+        cache_file: str = self._cache_file(path)
+        if not os.path.exists(cache_file):
+            return None
+        try:
+            with open(cache_file, "r") as fh:
+                payload: str = fh.read()
+            # the entry itself is validated when it is used
+            inputs: Any = json.loads(payload)["inputs"]
+        except Exception as exc:
+            logger.debug("Ignoring unreadable config cache %s: %s", cache_file, exc)
+            return None
+        if not isinstance(inputs, dict) or not all([isinstance(x, str) for x in inputs.values()]):
+            return None
+        return inputs, payload
+
+    def _write(self, path: str, payload: str) -> None:
+        cache_file: str = self._cache_file(path)
+        temporary_file: str = f"{cache_file}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            os.makedirs(self._cache_directory, exist_ok=True)  # type: ignore
+            with open(temporary_file, "w") as fh:
+                fh.write(payload)
+            os.replace(temporary_file, cache_file)
+        except OSError as exc:
+            logger.debug("Could not write config cache %s: %s", cache_file, exc)
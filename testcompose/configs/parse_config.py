@@ -1,18 +1,33 @@
 import os
-from typing import Any, Dict
+import threading
+from typing import Any, Dict, Optional, Tuple
 
-import yaml
-
-from testcompose.models.bootstrap.container_service import ContainerService, ContainerServices  # noqa: E501
+from testcompose.configs.config_cache import ConfigCache
+from testcompose.configs.service_config import Config
+from testcompose.models.bootstrap.cached_config import CachedConfig
+from testcompose.models.bootstrap.container_service import (  # noqa: E501
+    ContainerService,
+    ContainerServices,
+    RankedContainerServices,
+)
 
 
 class TestConfigParser:
+    """Parses config files. A validated config is cached, in memory and in the
+    directory of the `TESTCOMPOSE_CONFIG_CACHE_DIR` environment variable when set,
+    until the config file changes. Every call returns services of its own.
+    """
+
+    _caches: Dict[Optional[str], ConfigCache] = dict()
+    _caches_lock: threading.Lock = threading.Lock()
+
     @classmethod
-    def parse_config(cls, file_name: str) -> ContainerServices:
+    def parse_config(cls, file_name: str, cache_directory: Optional[str] = None) -> ContainerServices:
         """parses and verifies test yaml config file
 
         Args:
             file_name (str): absolute path of the config file
+            cache_directory (Optional[str], optional): directory of the on-disk config cache. Defaults to `TESTCOMPOSE_CONFIG_CACHE_DIR`.
 
         Raises:
             FileNotFoundError: when config file not present
@@ -21,12 +36,54 @@ class TestConfigParser:
         Returns:
             ConfigServices: A ConfigServices object with all named services in the config
         """  # noqa: E501
+        return cls._cached_config(file_name, cache_directory).config_services
+
+    @classmethod
+    def parse_ranked_config(
+        cls, file_name: str, cache_directory: Optional[str] = None
+    ) -> Tuple[ContainerServices, RankedContainerServices]:
+        """parses and verifies test yaml config file, and ranks its services
+
+        Args:
+            file_name (str): absolute path of the config file
+            cache_directory (Optional[str], optional): directory of the on-disk config cache. Defaults to `TESTCOMPOSE_CONFIG_CACHE_DIR`.
+
+        Raises:
+            FileNotFoundError: when config file not present
+            AttributeError: when config file is empty
+            ValueError: when the services have a cyclic dependency
+
+        Returns:
+            Tuple[ContainerServices, RankedContainerServices]: the services of the config and their start order
+        """  # noqa: E501
+        cache: ConfigCache = cls._cache(cache_directory)
+        entry: CachedConfig = cls._cached_config(file_name, cache_directory)
+        if entry.ranked_services is None:
+            entry.ranked_services = Config(test_services=entry.config_services).ranked_config_services
+            cache.put(file_name, entry)
+        return entry.config_services, entry.ranked_services
+
+    @classmethod
+    def _cache(cls, cache_directory: Optional[str]) -> ConfigCache:
+        directory: Optional[str] = cache_directory or os.environ.get("TESTCOMPOSE_CONFIG_CACHE_DIR") or None
+        with cls._caches_lock:
+            if directory not in cls._caches:
+                cls._caches[directory] = ConfigCache(cache_directory=directory)
+            return cls._caches[directory]
+
+    @classmethod
+    def _cached_config(cls, file_name: str, cache_directory: Optional[str]) -> CachedConfig:
         if not os.path.exists(file_name):
             raise FileNotFoundError(f"Config file {file_name} does not exist!!")
 
-        contents: Dict[str, Any] = dict()
+        cache: ConfigCache = cls._cache(cache_directory)
+        entry: Optional[CachedConfig] = cache.get(file_name)
+        if entry:
+            return entry
+
         with open(file_name, 'r') as fh:
-            contents = yaml.safe_load(fh)
+            content: str = fh.read()
+        contents: Dict[str, Any] = ConfigCache.load_yaml(content)
 
         if not contents:
             raise AttributeError("Config content can not be empty")
@@ -35,5 +92,10 @@ class TestConfigParser:
         for service in contents["services"]:
             services.update({service["name"]: ContainerService(**service)})
 
-        container_services: ContainerServices = ContainerServices(services=services)
-        return container_services
+        entry = CachedConfig(
+            # merge keys and anchors are resolved within the file, so it is the only input
+            inputs={os.path.abspath(file_name): ConfigCache.fingerprint(file_name, content)},
+            config_services=ContainerServices(services=services),
+        )
+        cache.put(file_name, entry)
+        return entry
@@ -0,0 +1,16 @@
+from click import Path, command, echo, option
+
+from testcompose.configs.parse_config import TestConfigParser
+from testcompose.configs.service_config import Config
+
+
+@command(name='plan')
+@option(
+    "--config-file",
+    required=True,
+    type=Path(exists=True, dir_okay=False),
+    help="Config file of the services",
+)
+def plan(config_file: str):
+    """Show the start order of the services, with the dependencies inferred from placeholders"""
+    echo(Config(test_services=TestConfigParser.parse_config(file_name=config_file)).plan())
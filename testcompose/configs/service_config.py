@@ -1,6 +1,5 @@
-from copy import deepcopy
 from logging import Logger
-from typing import Dict, List
+from typing import Dict, List, Optional, Set, Tuple
 
 from testcompose.log_setup import stream_logger
 from testcompose.models.bootstrap.container_service import (  # noqa: E501
@@ -17,7 +16,9 @@ class Config:
     This is an important class that sets the precedence of how the
     different containers are to be started and stopped. Usually, the
     precedence are set correctly if the `depends_on` parameter of the
-    config is set. Cyclic dependency will fail the test before it starts.
+    config is set. A service that references environment variables of
+    another service in its placeholders also depends on it, whether it is
+    declared or not. Cyclic dependency will fail the test before it starts.
 
     Args:
         test_services (ConfigServices): model resulting from a parsed configuration file.
@@ -39,6 +40,46 @@ class Config:
     def ranked_config_services(self, ranked_services: RankedContainerServices) -> None:
         self._ranked_it_services: RankedContainerServices = ranked_services
 
+    @property
+    def dependency_levels(self) -> List[List[str]]:
+        """Service names grouped into levels that can be started together, in start order
+
+        Returns:
+            List[List[str]]: service names per level
+        """
+        return self._ranked_it_services.levels
+
+    @property
+    def inferred_dependencies(self) -> Dict[str, List[str]]:
+        """Dependencies inferred from the placeholders of a service that its
+        `depends_on` does not declare
+
+        Returns:
+            Dict[str, List[str]]: inferred dependencies by service name
+        """
+        return self._ranked_it_services.inferred_dependencies
+
+    def plan(self) -> str:
+        """The start order of the services as a plain text table, with the level
+        of every service, its declared and its inferred dependencies
+
+        Returns:
+            str: plan table
+        """
+        ranked_services: RankedContainerServices = self._ranked_it_services
+        rows: List[Tuple[str, ...]] = [("level", "service", "depends on", "inferred")]
+        for position, level in enumerate(ranked_services.levels):
+            for service_name in level:
+                inferred: List[str] = ranked_services.inferred_dependencies.get(service_name, list())
+                declared: List[str] = [
+                    x for x in ranked_services.dependencies.get(service_name, list()) if x not in inferred
+                ]
+                rows.append((str(position), service_name, ", ".join(declared), ", ".join(inferred)))
+        widths: List[int] = [max([len(row[i]) for row in rows]) for i in range(len(rows[0]))]
+        return "\n".join(
+            "  ".join(value.ljust(width) for value, width in zip(row, widths)).rstrip() for row in rows
+        )
+
     def _rank_test_services(self, test_services: ContainerServices) -> None:
         """
         Args:
@@ -56,74 +97,119 @@ class Config:
             logger.error("No service was found in the provided config")
             raise ValueError
 
-        _processed_containers: Dict[str, int] = self._compute_container_ranks(
-            ranked_services=dict(),
-            config_services=test_services,
+        dependencies: Dict[str, List[str]] = self._service_dependencies(test_services)
+        levels: List[List[str]] = self._compute_dependency_levels(
+            config_services=test_services, dependencies=dependencies
         )
-
-        _processed_containers_reversed: Dict[int, str] = {
-            rank: service for service, rank in _processed_containers.items()
-        }
+        start_order: List[str] = [x for level in levels for x in level]
         self.ranked_config_services = RankedContainerServices(
-            ranked_services=_processed_containers_reversed
-        )  # noqa: E501
-
-    def _compute_container_ranks(
-        self,
-        *,
-        ranked_services: Dict[str, int],
-        config_services: ContainerServices,
-    ) -> Dict[str, int]:
-        """The main method that computes the ranking of the services specified
-        in the config.
+            ranked_services={rank: service for rank, service in enumerate(start_order)},
+            levels=levels,
+            dependencies=dependencies,
+            inferred_dependencies={
+                name: [x for x in y if x not in test_services.services[name].depends_on]
+                for name, y in dependencies.items()
+                if set(y).difference(test_services.services[name].depends_on)
+            },
+        )
+
+    @staticmethod
+    def _service_dependencies(config_services: ContainerServices) -> Dict[str, List[str]]:
+        """The services every service depends on: its `depends_on`, followed by the
+        services whose environment variables its placeholders reference. References
+        to hostnames, the container host address and external ports need no running
+        service and add no dependency.
+
+        Args:
+            config_services (ConfigServices): config services
+
+        Returns:
+            Dict[str, List[str]]: dependencies by service name
+        """
+        dependencies: Dict[str, List[str]] = dict()
+        for service_name, service in config_services.services.items():
+            service_dependencies: List[str] = list(service.depends_on)
+            for template in service.environment_templates.values():
+                service_dependencies.extend([x.lower() for x in template.services])
+            dependencies[service_name] = list(dict.fromkeys(service_dependencies))
+        return dependencies
+
+    def _compute_dependency_levels(
+        self, *, config_services: ContainerServices, dependencies: Optional[Dict[str, List[str]]] = None
+    ) -> List[List[str]]:
+        """Group the services of the config into levels with Kahn's algorithm. A service
+        is placed one level after the last of the services it depends on, so the
+        services of a level only depend on services of earlier levels and can be
+        started together. Services keep their config order within a level.
 
         Args:
-            ranked_services (Dict[str, int]): dict container service name and their assigned ranks
             config_services (ConfigServices): config services generated from the supplied configuration file
+            dependencies (Optional[Dict[str, List[str]]]): dependencies by service name. Defaults to `depends_on`.
 
         Raises:
-            AttributeError: raised to prevent empty configuration properties to be passed to this function
-            ValueError: rasied when cyclic dependency is detected
+            AttributeError: raised when a service depends on a service that is not in the config
+            ValueError: raised when cyclic dependency is detected, naming the services of the cycle
 
         Returns:
-            Dict[str, int]: A list of ranked service models.
+            List[List[str]]: service names per level, in start order
         """  # noqa: E501
-        _ranked_services: Dict[str, int] = deepcopy(ranked_services)
         if not config_services:
             raise AttributeError("A valid config for test services must be provided")
 
-        rank: int = len(ranked_services.keys())
-        if len(config_services.services.keys()) == len(ranked_services.keys()):
-            return ranked_services
-        else:
-            services: Dict[str, ContainerService] = {
-                x: y for x, y in config_services.services.items() if x not in _ranked_services  # noqa: E501
-            }
-            for service_name, service in services.items():
-                if not service.depends_on:
-                    _ranked_services.update({service_name: rank})
-                    rank += 1
-                else:
-                    if set(service.depends_on).issubset(
-                        _ranked_services.keys()
-                    ) and not self._check_cyclic_dependency(  # noqa: E501
-                        [config_services.services[x] for x in _ranked_services], service_name  # noqa: E501
-                    ):
-                        _ranked_services.update({service_name: rank})
-                        rank += 1
-                    elif not set(service.depends_on).issubset(list(config_services.services.keys())):  # noqa: E501
-                        raise AttributeError(
-                            f"Invalid service name or dependencies detected: {service_name} <=> {set(service.depends_on)}"  # noqa: E501
-                        )
-            return self._compute_container_ranks(
-                ranked_services=_ranked_services, config_services=config_services
-            )  # noqa: E501
+        services: Dict[str, ContainerService] = config_services.services
+        positions: Dict[str, int] = {name: position for position, name in enumerate(services)}
+        pending_dependencies: Dict[str, int] = dict()
+        dependents: Dict[str, List[str]] = {name: list() for name in services}
+        if dependencies is None:
+            dependencies = {name: list(dict.fromkeys(x.depends_on)) for name, x in services.items()}
+        for service_name, service in services.items():
+            service_dependencies: List[str] = dependencies[service_name]
+            unknown_dependencies: List[str] = [x for x in service_dependencies if x not in services]
+            if unknown_dependencies:
+                raise AttributeError(
+                    f"Invalid service name or dependencies detected: {service_name} <=> {unknown_dependencies}"
+                )
+            pending_dependencies[service_name] = len(service_dependencies)
+            for dependency in service_dependencies:
+                dependents[dependency].append(service_name)
+
+        levels: List[List[str]] = list()
+        level: List[str] = [x for x in services if not pending_dependencies[x]]
+        while level:
+            levels.append(level)
+            next_level: List[str] = list()
+            for service_name in level:
+                for dependent in dependents[service_name]:
+                    pending_dependencies[dependent] -= 1
+                    if not pending_dependencies[dependent]:
+                        next_level.append(dependent)
+            level = sorted(next_level, key=positions.__getitem__)
+
+        if sum([len(x) for x in levels]) < len(services):
+            cycle: List[str] = self._find_cycle(
+                dependencies, {x for x, y in pending_dependencies.items() if y}
+            )
+            logger.error("Cyclic dependency detected: %s", " -> ".join(cycle))
+            raise ValueError(f"Cyclic dependency detected: {' -> '.join(cycle)}")
+        return levels
 
     @staticmethod
-    def _check_cyclic_dependency(
-        processed_services: List[ContainerService], dependent_service_name: str
-    ) -> bool:  # noqa: E501
-        for service in processed_services:
-            if set([dependent_service_name]).issubset(service.depends_on):
-                return True
-        return False
+    def _find_cycle(dependencies: Dict[str, List[str]], unranked_services: Set[str]) -> List[str]:
+        """A dependency cycle among the services Kahn's algorithm could not rank. Every
+        one of them depends on another unranked service, so following those
+        dependencies from any of them ends in a cycle.
+
+        Args:
+            dependencies (Dict[str, List[str]]): dependencies by service name, in config order
+            unranked_services (Set[str]): services left with unranked dependencies
+
+        Returns:
+            List[str]: the services of the cycle, starting and ending with the same service
+        """
+        path: Dict[str, int] = dict()
+        service_name: str = next(x for x in dependencies if x in unranked_services)
+        while service_name not in path:
+            path[service_name] = len(path)
+            service_name = next(x for x in dependencies[service_name] if x in unranked_services)
+        cycle: List[str] = list(path)[path[service_name]:]
+        return cycle + [service_name]
@@ -1,20 +1,28 @@
 import pathlib
-import re
 from abc import abstractmethod
 from copy import deepcopy
 from typing import Any, Dict, List, Optional
 
 from testcompose.containers.container_utils import ContainerUtils
+from testcompose.containers.port_allocator import PortAllocator
 from testcompose.models.bootstrap.container_http_wait_parameter import ContainerHttpWaitParameter  # noqa: E501
 from testcompose.models.bootstrap.container_log_wait_parameter import ContainerLogWaitParameter  # noqa: E501
+from testcompose.models.bootstrap.container_protocol_wait_parameter import ContainerProtocolWaitParameter  # noqa: E501
 from testcompose.models.bootstrap.container_service import ContainerService
+from testcompose.models.bootstrap.container_tcp_wait_parameter import ContainerTcpWaitParameter  # noqa: E501
 from testcompose.models.bootstrap.container_volume import ContainerVolumeMap, VolumeSourceTypes  # noqa: E501
+from testcompose.models.bootstrap.port_spec import PortSpec
 from testcompose.models.container.running_container import RunningContainer
 
 
 class BaseContainer:
     def __init__(self) -> None:
         self._image_pull_policy: str = 'ALWAYS_PULL'
+        self.stop_timeout = None
+        self.stop_signal = None
+        self.kill_on_stop = False
+        self.port_allocator = None
+        self.reserved_host_ports = list()
 
     @property
     def image(self) -> str:
@@ -66,6 +74,54 @@ class BaseContainer:
     def http_waiter(self, http_waiter: ContainerHttpWaitParameter) -> None:
         self._http_waiter: ContainerHttpWaitParameter = http_waiter
 
+    @property
+    def https_waiter(self) -> ContainerHttpWaitParameter:
+        return self._https_waiter
+
+    @https_waiter.setter
+    def https_waiter(self, https_waiter: ContainerHttpWaitParameter) -> None:
+        self._https_waiter: ContainerHttpWaitParameter = https_waiter
+
+    @property
+    def tcp_waiter(self) -> ContainerTcpWaitParameter:
+        return self._tcp_waiter
+
+    @tcp_waiter.setter
+    def tcp_waiter(self, tcp_waiter: ContainerTcpWaitParameter) -> None:
+        self._tcp_waiter: ContainerTcpWaitParameter = tcp_waiter
+
+    @property
+    def protocol_waiter(self) -> ContainerProtocolWaitParameter:
+        return self._protocol_waiter
+
+    @protocol_waiter.setter
+    def protocol_waiter(self, protocol_waiter: ContainerProtocolWaitParameter) -> None:
+        self._protocol_waiter: ContainerProtocolWaitParameter = protocol_waiter
+
+    @property
+    def stop_timeout(self) -> Optional[int]:
+        return self._stop_timeout
+
+    @stop_timeout.setter
+    def stop_timeout(self, stop_timeout: Optional[int]) -> None:
+        self._stop_timeout: Optional[int] = stop_timeout
+
+    @property
+    def stop_signal(self) -> Optional[str]:
+        return self._stop_signal
+
+    @stop_signal.setter
+    def stop_signal(self, stop_signal: Optional[str]) -> None:
+        self._stop_signal: Optional[str] = stop_signal
+
+    @property
+    def kill_on_stop(self) -> bool:
+        return self._kill_on_stop
+
+    @kill_on_stop.setter
+    def kill_on_stop(self, kill_on_stop: bool) -> None:
+        self._kill_on_stop: bool = kill_on_stop
+
     @property
     def log_waiter(self) -> ContainerLogWaitParameter:
         return self._log_waiter
@@ -80,7 +136,35 @@ class BaseContainer:
 
     @ports.setter
     def ports(self, ports: Dict[int, Any]) -> None:
-        self._ports: Dict[int, Any] = deepcopy(ports)
+        self._ports: Dict[int, Any] = dict(ports)
+
+    @property
+    def port_allocator(self) -> Optional[PortAllocator]:
+        """Allocator of the host ports of external port placeholders, the allocator of
+        the process when not set"""
+        return self._port_allocator
+
+    @port_allocator.setter
+    def port_allocator(self, port_allocator: Optional[PortAllocator]) -> None:
+        self._port_allocator: Optional[PortAllocator] = port_allocator
+
+    @property
+    def reserved_host_ports(self) -> List[int]:
+        """Host ports reserved for the external port placeholders of the container"""
+        return self._reserved_host_ports
+
+    @reserved_host_ports.setter
+    def reserved_host_ports(self, ports: List[int]) -> None:
+        self._reserved_host_ports: List[int] = list(ports)
+
+    @property
+    def port_specs(self) -> List[PortSpec]:
+        """Exposed ports of the container, with the host ports of its external port placeholders"""
+        return self._port_specs
+
+    @port_specs.setter
+    def port_specs(self, port_specs: List[PortSpec]) -> None:
+        self._port_specs: List[PortSpec] = list(port_specs)
 
     @property
     def container_environment_variables(self) -> Dict[str, Any]:
@@ -122,7 +206,7 @@ class BaseContainer:
         self.image = service.image
         self.command = service.command
         substituted_env_variables: Dict[str, Any]
-        modified_exposed_ports: List[str]
+        modified_exposed_ports: List[PortSpec]
         (
             substituted_env_variables,
             modified_exposed_ports,
@@ -130,55 +214,45 @@ class BaseContainer:
             service_env_variables=service.environment,
             running_containers=processed_containers_services,
             service_name=service.name,
-            exposed_ports=service.exposed_ports,
+            exposed_ports=service.port_specs,
+            environment_templates=service.environment_templates,
+            port_allocator=self.port_allocator,
         )
+        # placeholders bind their container port to a reserved host port, all other ports are as configured
+        self.reserved_host_ports = [
+            y for x in modified_exposed_ports if x not in service.port_specs for y in x.bindings().values()  # type: ignore  # noqa: E501
+        ]
         self.container_environment_variables = substituted_env_variables
+        self.port_specs = modified_exposed_ports
         self.ports = self._exposed_ports(modified_exposed_ports)
         self.http_waiter = service.http_wait_parameters  # type: ignore
+        self.https_waiter = service.https_wait_parameters  # type: ignore
+        self.tcp_waiter = service.tcp_wait_parameters  # type: ignore
+        self.protocol_waiter = service.protocol_wait_parameters  # type: ignore
         self.volumes = self._container_volumes(service.volumes)
         self.entry_point = service.entrypoint  # type: ignore
         self.log_waiter = service.log_wait_parameters  # type: ignore
+        self.stop_timeout = service.stop_timeout
+        self.stop_signal = service.stop_signal
+        self.kill_on_stop = service.kill_on_stop
         self.host_name = service.name
         self.network = network
         return self
 
-    def _exposed_ports(self, ports: Optional[List[str]]) -> Dict[int, Any]:
+    def _exposed_ports(self, ports: Optional[List[PortSpec]]) -> Dict[int, Any]:
         """List of exposed port to be assigned random port
         numbers on the host. Random ports are exposed to the
         host. A fixed port can be assigned on the host by providing
         the port in the format **[host_port:container_port]**
 
         Args:
-            ports (Optional[List[str]]): list of container exposed ports
+            ports (Optional[List[PortSpec]]): list of container exposed ports
         """
         exposed_ports: Dict[int, Any] = dict()
-        if ports:
-            for port in ports:
-                _ports: List[str] = self._generate_exposed_ports(re.sub(r"(\s)", "", port))  # noqa: E501
-                for _port in _ports:
-                    _split_port: List[str] = _port.split(":")
-                    if len(_split_port) == 2:
-                        exposed_ports[int(_split_port[1])] = int(_split_port[0])
-                    else:
-                        exposed_ports[int(_port)] = None
+        for port in ports or list():
+            exposed_ports.update(port.bindings())
         return exposed_ports
 
-    def _generate_exposed_ports(self, port: str) -> List[str]:
-        matches: List[Any] = re.findall(r"\-", port)
-        unprocessed_ports: List[str] = list()
-        if len(matches) == 0:
-            unprocessed_ports.append(port)
-        elif len(matches) == 1:
-            start, end = str(port).split("-")
-            if int(end) <= int(start):
-                raise AttributeError(
-                    f"Start exposed port {start} must be less than end exposed port {end} for port ranges!"  # noqa: E501
-                )
-            unprocessed_ports = [str(x) for x in range(int(start), int(end) + 1)]
-        else:
-            raise AttributeError("Allowed exposed port format is host:container or port1 - port2")  # noqa: E501
-        return unprocessed_ports
-
     def _container_volumes(
         self, volumes: Optional[List[ContainerVolumeMap]] = None
     ) -> Dict[str, Dict[str, str]]:  # noqa: E501
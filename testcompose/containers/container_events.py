@@ -0,0 +1,150 @@
+import threading
+from logging import Logger
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from docker.client import DockerClient  # type: ignore
+
+from testcompose.log_setup import stream_logger
+from testcompose.models.container.container_labels import ContainerLabels
+from testcompose.models.container.running_container_attributes import PossibleContainerStates
+
+logger: Logger = stream_logger(__name__)
+
+
+class ContainerEventTracker:
+    """Follows the docker events of all containers of one stack through a
+    single subscription. Waiters block on the tracker and are woken up as soon
+    as a container starts, dies or reports a health status, instead of polling
+    the daemon.
+
+    Args:
+        docker_client (DockerClient): Docker client
+        stack_id (str): value of the stack label shared by all containers of the stack
+    """
+
+    def __init__(self, docker_client: DockerClient, stack_id: str) -> None:
+        self._docker_client: DockerClient = docker_client
+        self._stack_id: str = stack_id
+        self._states: Dict[str, str] = dict()
+        self._health: Dict[str, str] = dict()
+        self._condition: threading.Condition = threading.Condition()
+        self._events: Optional[Any] = None
+        self._thread: Optional[threading.Thread] = None
+        self._alive: bool = False
+        self._listeners: List[Callable[[str, str], None]] = list()
+
+    @property
+    def is_alive(self) -> bool:
+        return self._alive
+
+    def start(self) -> 'ContainerEventTracker':
+        """Subscribe to the events of the stack. The subscription is active when
+        this method returns, so no event of a container started afterwards is missed.
+
+        Returns:
+            ContainerEventTracker: the started tracker
+        """  # noqa: E501
+        self._events = self._docker_client.events(
+            decode=True,
+            filters={"type": "container", "label": f"{ContainerLabels.STACK}={self._stack_id}"},
+        )
+        self._alive = True
+        self._thread = threading.Thread(
+            target=self._consume, args=(iter(self._events),), name=f"events-{self._stack_id}", daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """Close the subscription and wake up all waiters"""
+        try:
+            if self._events:
+                self._events.close()
+        except Exception as exc:
+            logger.debug("Event stream could not be closed: %s", exc)
+        self._mark_dead()
+        if self._thread and self._thread is not threading.current_thread():
+            self._thread.join(timeout=5)
+
+    def add_listener(self, listener: Callable[[str, str], None]) -> None:
+        """Call a listener with the container id and action of every event of the stack,
+        before waiters are woken up.
+
+        Args:
+            listener (Callable[[str, str], None]): called from the event thread
+        """
+        self._listeners.append(listener)
+
+    def container_state(self, container_id: str) -> Optional[str]:
+        with self._condition:
+            return self._states.get(container_id)
+
+    def container_health(self, container_id: str) -> Optional[str]:
+        with self._condition:
+            return self._health.get(container_id)
+
+    def wait_for_container(self, container_id: str, timeout: float) -> Optional[str]:
+        """Block until the container has started or died.
+
+        Args:
+            container_id (str): container id
+            timeout (float): maximum time to wait in seconds
+
+        Returns:
+            Optional[str]: `running` or `exited`, None if nothing was observed in time
+                or the subscription ended.
+        """
+        with self._condition:
+            self._condition.wait_for(lambda: container_id in self._states or not self._alive, timeout)  # noqa: E501
+            return self._states.get(container_id)
+
+    def wait_for_health(self, container_id: str, timeout: float) -> Optional[str]:
+        """Block until the container reports `healthy` or `unhealthy`, or dies.
+
+        Args:
+            container_id (str): container id
+            timeout (float): maximum time to wait in seconds
+
+        Returns:
+            Optional[str]: the last health status reported, None if none was reported.
+        """
+        with self._condition:
+            self._condition.wait_for(
+                lambda: self._health.get(container_id) in ('healthy', 'unhealthy')
+                or self._states.get(container_id) == PossibleContainerStates.EXITED
+                or not self._alive,
+                timeout,
+            )
+            return self._health.get(container_id)
+
+    def _consume(self, events: Iterator[Dict[str, Any]]) -> None:
+        try:
+            for event in events:
+                self._record(event)
+        except Exception as exc:
+            logger.debug("Event stream of stack %s ended: %s", self._stack_id, exc)
+        finally:
+            self._mark_dead()
+
+    def _record(self, event: Dict[str, Any]) -> None:
+        container_id: Optional[str] = (event.get("Actor") or {}).get("ID") or event.get("id")
+        action: str = str(event.get("Action") or event.get("status") or "")
+        if not container_id:
+            return
+        for listener in self._listeners:
+            listener(container_id, action)
+        with self._condition:
+            if action == "start":
+                self._states[container_id] = PossibleContainerStates.RUNNING
+            elif action == "die":
+                self._states[container_id] = PossibleContainerStates.EXITED
+            elif action.startswith("health_status"):
+                self._health[container_id] = action.split(":", 1)[-1].strip()
+            else:
+                return
+            self._condition.notify_all()
+
+    def _mark_dead(self) -> None:
+        with self._condition:
+            self._alive = False
+            self._condition.notify_all()
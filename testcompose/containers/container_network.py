@@ -14,13 +14,22 @@ class ContainerNetwork:
     Args:
         docker_client (DockerClient): Docker client
         network_name (str): Name of test network
+        labels (Dict[str, str]): labels of the network, when it is created
+        network (Optional[Network]): an existing network object, which saves the lookup by name
     """
 
     def __init__(
-        self, docker_client: DockerClient, network_name: str, labels: Dict[str, str] = dict()  # noqa: E501
+        self,
+        docker_client: DockerClient,
+        network_name: str,
+        labels: Dict[str, str] = dict(),
+        network: Optional[Network] = None,
     ) -> None:
         self._docker_client: DockerClient = docker_client
-        self._assign_group_network(network_name, labels=labels)
+        if network:
+            self.network = network
+        else:
+            self._assign_group_network(network_name, labels=labels)
 
     @property
     def network(self) -> Network:
@@ -0,0 +1,122 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from logging import Logger
+from queue import Empty, Queue
+from typing import List
+from uuid import uuid4
+
+from docker.client import DockerClient  # type: ignore
+from docker.errors import APIError  # type: ignore
+from docker.models.networks import Network  # type: ignore
+
+from testcompose.containers.container_network import ContainerNetwork
+from testcompose.housekeeping.clean_up_container import Housekeeping
+from testcompose.log_setup import stream_logger
+from testcompose.models.container.container_labels import ContainerLabels
+from testcompose.models.housekeeping.reaper import CleanupBackends
+from testcompose.models.network.network import DefaultNeworkDrivers
+
+logger: Logger = stream_logger(__name__)
+
+
+class ContainerNetworkPool:
+    """Pool of pre-created test networks, leased by stacks that start in parallel
+    and returned at their teardown. A stack then neither looks up nor creates and
+    removes a network of its own. The pool grows when all its networks are leased.
+    Its networks are removed when the pool is closed, at the latest when the
+    process exits, by the same cleanup backend as the stacks leasing them.
+
+    Args:
+        docker_client (DockerClient): Docker client
+        size (int): networks created upfront. Defaults to 4.
+        cleanup_backend (str): one of `CleanupBackends`. Defaults to `ryuk`.
+    """
+
+    def __init__(self, docker_client: DockerClient, size: int = 4, cleanup_backend: str = CleanupBackends.RYUK) -> None:  # noqa: E501
+        if cleanup_backend not in [CleanupBackends.RYUK, CleanupBackends.NATIVE]:
+            raise ValueError(f"Unknown cleanup backend {cleanup_backend}")
+        self._docker_client: DockerClient = docker_client
+        self._cleanup_backend: str = cleanup_backend
+        self._pool_id: str = uuid4().hex
+        self._available: "Queue[ContainerNetwork]" = Queue()
+        self._networks: List[ContainerNetwork] = list()
+        self._lock: threading.Lock = threading.Lock()
+        self._created_networks: int = 0
+        Housekeeping.register_labels(docker_client, [self.pool_label], cleanup_backend)
+        if size > 0:
+            with ThreadPoolExecutor(max_workers=size, thread_name_prefix="testcompose-network") as executor:
+                for network in executor.map(lambda _: self._create_network(), range(size)):
+                    self._available.put(network)
+
+    @property
+    def pool_label(self) -> str:
+        return f"{ContainerLabels.NETWORK_POOL}={self._pool_id}"
+
+    @property
+    def size(self) -> int:
+        return len(self._networks)
+
+    def lease(self) -> ContainerNetwork:
+        """Lease a network, one is created when all networks are leased.
+
+        Returns:
+            ContainerNetwork: a network no other stack uses
+        """
+        try:
+            return self._available.get_nowait()
+        except Empty:
+            return self._create_network()
+
+    def release(self, container_network: ContainerNetwork) -> None:
+        """Return a network once the containers of the stack are removed. Containers
+        still attached, e.g. while docker removes them, are disconnected.
+
+        Args:
+            container_network (ContainerNetwork): a leased network
+        """
+        network: Network = container_network.network
+        try:
+            network.reload()
+            for container_id in (network.attrs.get("Containers") or dict()).keys():
+                network.disconnect(container_id, force=True)
+        except APIError as exc:
+            logger.info("Network %s is not returned to the pool: %s", network.name, exc)
+            return
+        self._available.put(container_network)
+
+    def close(self) -> None:
+        """Remove all networks of the pool"""
+        with self._lock:
+            networks: List[ContainerNetwork] = list(self._networks)
+            self._networks.clear()
+        for container_network in networks:
+            container_network.remove_network()
+        Housekeeping.unregister_labels(self._docker_client, [self.pool_label], self._cleanup_backend)
+
+    def __enter__(self) -> 'ContainerNetworkPool':
+        return self
+
+    def __exit__(self, exc_type, exc_value, exc_tb) -> None:
+        self.close()
+
+    def _create_network(self) -> ContainerNetwork:
+        with self._lock:
+            network_index: int = self._created_networks
+            self._created_networks += 1
+        network_name: str = f"testcompose_pool_{self._pool_id[:12]}_{network_index}"
+        container_network: ContainerNetwork = ContainerNetwork(
+            self._docker_client,
+            network_name,
+            network=self._docker_client.networks.create(
+                name=network_name,
+                driver=DefaultNeworkDrivers.DEFAULT_BRIDGE_NETWORK,
+                internal=False,
+                labels={ContainerLabels.NETWORK_POOL: self._pool_id},
+                enable_ipv6=False,
+                attachable=True,
+                scope='local',
+            ),
+        )
+        with self._lock:
+            self._networks.append(container_network)
+        return container_network
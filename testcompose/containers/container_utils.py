@@ -1,8 +1,10 @@
-import re
 import socket
-from copy import copy, deepcopy
+from copy import copy
 from typing import Any, Dict, List, Optional, Tuple
 
+from testcompose.containers.port_allocator import PortAllocator
+from testcompose.models.bootstrap.placeholder_template import PlaceholderReference, PlaceholderTemplate
+from testcompose.models.bootstrap.port_spec import PortSpec
 from testcompose.models.container.running_container import RunningContainer
 from testcompose.models.container.supported_placeholders import SupportedPlaceholders
 
@@ -13,8 +15,10 @@ class ContainerUtils:
         service_env_variables: Dict[str, Any],
         running_containers: Dict[str, RunningContainer],
         service_name: str,
-        exposed_ports: List[str],
-    ) -> Tuple[Dict[str, Any], List[str]]:
+        exposed_ports: List[PortSpec],
+        environment_templates: Optional[Dict[str, PlaceholderTemplate]] = None,
+        port_allocator: Optional[PortAllocator] = None,
+    ) -> Tuple[Dict[str, Any], List[PortSpec]]:
         """Utility method to replace placeholders in the service containers.
         Placeholders are usually of the form *${container_name.containerenv_variable}*.
 
@@ -22,7 +26,11 @@ class ContainerUtils:
             service_env_variables (Dict[str, Any]): Dict of config environment variables
             running_containers Dict[str, RunningContainer]: Running container object
             service_name (str): service name as specified in the config
-            exposed_ports (List[str]): container exposed ports
+            exposed_ports (List[PortSpec]): container exposed ports
+            environment_templates (Optional[Dict[str, PlaceholderTemplate]]): the environment values
+                with placeholders, as compiled at config load. Compiled here when not given.
+            port_allocator (Optional[PortAllocator]): reserves the host ports of external port placeholders.
+                Defaults to the allocator of the process.
 
         Raises:
             ValueError: when a placeholder variable is not of the form service_name.variable_name
@@ -30,100 +38,93 @@ class ContainerUtils:
                             provided config file.
 
         Returns:
-            Tuple[Dict[str, Any], List[str]]: A tuple of `env_config` and `exposed_ports`
+            Tuple[Dict[str, Any], List[PortSpec]]: A tuple of `env_config` and `exposed_ports`
         """  # noqa: E501
-        pattern: str = "\\$\\{([^}]*)}"
+        if environment_templates is None:
+            environment_templates = PlaceholderTemplate.compile_environment(service_env_variables)
         substituted_env_variables: Dict[str, Any] = copy(service_env_variables)
-        modified_exposed_ports: List[str] = deepcopy(exposed_ports)
-        cmpl: Any = re.compile(pattern=pattern).findall
-        for k, v in service_env_variables.items():
-            if isinstance(v, str):
-                replaced_variable: str = v
-                for occurence in cmpl(v):
-                    if len(str(occurence).split(".")) != 2:
-                        raise ValueError
-                    container_name, variable_name = str(occurence).split(".")
-                    value = None
-                    value, _exposed_ports = ContainerUtils._external_ports_variables(
-                        running_containers,
-                        service_name,
-                        container_name,
-                        variable_name,
-                        modified_exposed_ports,
+        modified_exposed_ports: List[PortSpec] = list(exposed_ports)
+        for k, template in environment_templates.items():
+            substituted_env_variables[k] = "".join(
+                [
+                    x
+                    if isinstance(x, str)
+                    else str(
+                        ContainerUtils._resolve_placeholder(
+                            x, running_containers, service_name, modified_exposed_ports, port_allocator
+                        )
                     )
-                    if _exposed_ports:
-                        modified_exposed_ports = deepcopy(_exposed_ports)
-                    replaced_variable = replaced_variable.replace(f"${{{occurence}}}", str(value))  # noqa: E501
-                substituted_env_variables[k] = replaced_variable
+                    for x in template.segments
+                ]
+            )
         return substituted_env_variables, modified_exposed_ports
 
     @staticmethod
-    def _get_free_host_port() -> str:
-        """Get a free random port number from the container host
+    def _get_free_host_port(port_allocator: Optional[PortAllocator] = None, count: int = 1) -> str:
+        """Reserve a free port, or a block of contiguous free ports for a port range,
+        on the container host. The ports stay bound until the container that uses
+        them is started, see `PortAllocator.hand_over`.
+
+        Args:
+            port_allocator (Optional[PortAllocator]): allocator of the port. Defaults to the allocator of the process.
+            count (int): number of contiguous ports. Defaults to 1.
 
         Returns:
-            str: port number
-        """
-        _socket = socket.socket(family=socket.AF_INET, type=socket.SOCK_STREAM)
-        _socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
-        _socket.settimeout(2)
-        _socket.bind(("", 0))
-        port: str
-        _, port = _socket.getsockname()
-        _socket.close()
-        return port
+            str: port number, the first port of a block
+        """  # noqa: E501
+        return str((port_allocator or PortAllocator.instance()).reserve(count)[0])
 
     @staticmethod
-    def _external_ports_variables(
+    def _resolve_placeholder(
+        reference: PlaceholderReference,
         running_containers: Dict[str, RunningContainer],
         service_name: str,
-        container_name: str,
-        variable_name: str,
-        exposed_ports: List[str] = list(),
-    ) -> Tuple[Optional[str], List[str]]:
-        value: Optional[str] = None
-        _exposed_ports: List[str] = list()
-        if container_name.lower() == SupportedPlaceholders.SELF_HOST or variable_name.lower() in [  # noqa: E501
-            SupportedPlaceholders.CONTAINER_HOSTNAME,
-            SupportedPlaceholders.EXTERNAL_PORT,
-            SupportedPlaceholders.CONTAINER_HOST_ADDRESS,
-        ]:
-            if (
-                container_name.lower() == SupportedPlaceholders.SELF_HOST
-                and variable_name.lower() == SupportedPlaceholders.CONTAINER_HOSTNAME
-            ):
-                value = service_name
-            elif (
-                container_name.lower() != SupportedPlaceholders.SELF_HOST
-                and variable_name.lower() == SupportedPlaceholders.CONTAINER_HOSTNAME
-            ):
-                value = container_name
-            else:
-                if variable_name.lower().startswith(SupportedPlaceholders.EXTERNAL_PORT):  # noqa: E501
-                    value, _exposed_ports = ContainerUtils._external_port_variables(
-                        variable_name, exposed_ports
-                    )  # noqa: E501
-                elif variable_name.lower() == SupportedPlaceholders.CONTAINER_HOST_ADDRESS:  # noqa: E501
-                    value = socket.gethostbyname(socket.gethostname())
-        else:
-            value = running_containers[
-                f"{container_name.lower()}"
+        exposed_ports: List[PortSpec],
+        port_allocator: Optional[PortAllocator] = None,
+    ) -> Optional[str]:
+        """Value of a placeholder. An external port placeholder binds its container
+        port in `exposed_ports` to a free host port.
+
+        Args:
+            reference (PlaceholderReference): the placeholder
+            running_containers (Dict[str, RunningContainer]): services started so far
+            service_name (str): service the placeholder belongs to
+            exposed_ports (List[PortSpec]): container exposed ports of the service, updated in place
+            port_allocator (Optional[PortAllocator]): reserves the host ports of external port placeholders
+
+        Returns:
+            Optional[str]: value of the placeholder
+        """
+        variable_name: str = reference.variable.lower()
+        if reference.needs_running_service:
+            return running_containers[
+                f"{reference.service.lower()}"
             ].generic_container.container_environment_variables[  # noqa: E501
-                f"{variable_name.upper()}"
+                f"{reference.variable.upper()}"
             ]
-
-        return value, _exposed_ports
+        if variable_name == SupportedPlaceholders.CONTAINER_HOSTNAME:
+            return service_name if reference.is_self else reference.service
+        if variable_name.startswith(SupportedPlaceholders.EXTERNAL_PORT):
+            return ContainerUtils._external_port_variables(reference.variable, exposed_ports, port_allocator)
+        if variable_name == SupportedPlaceholders.CONTAINER_HOST_ADDRESS:
+            return socket.gethostbyname(socket.gethostname())
+        return None
 
     @staticmethod
-    def _external_port_variables(variable_name: str, exposed_ports: List[str]) -> Tuple[str, List[str]]:  # noqa: E501
-        _exposed_ports: List[str] = deepcopy(exposed_ports)
-        container_port: str = re.sub(SupportedPlaceholders.EXTERNAL_PORT + "_", "", variable_name)  # noqa: E501
-        host_port: str = ContainerUtils._get_free_host_port()
-        if container_port and container_port not in exposed_ports:
+    def _external_port_variables(
+        variable_name: str, exposed_ports: List[PortSpec], port_allocator: Optional[PortAllocator] = None
+    ) -> str:
+        container_port: str = variable_name[len(SupportedPlaceholders.EXTERNAL_PORT) + 1 :]  # noqa: E203
+        position: Optional[int] = next(
+            (i for i, x in enumerate(exposed_ports) if x.contains(container_port)), None
+        )
+        if position is None:
             raise AttributeError(
                 f"self.hostport_{container_port} must be a valid supplied exposed_ports value!"  # noqa: E501
             )  # noqa: E501
-        _exposed_ports.remove(container_port)
-        _exposed_ports.append(f"{host_port}:{container_port}")
-        value: str = str(host_port)
-        return value, _exposed_ports
+        spec: PortSpec = exposed_ports[position]
+        if spec.host_port is None:
+            # a range is bound to a block of contiguous host ports, shared by the placeholders of its ports
+            host_port: str = ContainerUtils._get_free_host_port(port_allocator, spec.count)
+            spec = exposed_ports[position] = spec.copy(update={"host_port": int(host_port)})
+        return str(spec.host_port + int(container_port) - spec.container_port)  # type: ignore
@@ -1,4 +1,3 @@
-import re
 import socket
 from datetime import datetime
 from logging import Logger
@@ -6,20 +5,25 @@ from time import sleep
 from typing import Any, ByteString, Dict, List, Optional, Tuple, Union
 
 from docker.client import DockerClient  # type: ignore
-from docker.errors import APIError  # type: ignore
+from docker.errors import APIError, NotFound  # type: ignore
 from docker.models.containers import Container  # type: ignore
 
 from testcompose.containers.base_container import BaseContainer
+from testcompose.containers.container_events import ContainerEventTracker
 from testcompose.containers.container_network import ContainerNetwork
+from testcompose.containers.port_allocator import PortAllocator
 from testcompose.log_setup import stream_logger
+from testcompose.models.bootstrap.container_http_wait_parameter import ContainerHttpWaitParameter  # noqa: E501
+from testcompose.models.container.container_labels import ContainerLabels
 from testcompose.models.container.running_container_attributes import (
     PossibleContainerStates,
     RunningContainerAttributes,
 )
-from testcompose.models.network.network import ContainerMappedPorts
+from testcompose.tracing.phase_tracer import trace_phase
 from testcompose.waiters.endpoint_waiters import EndpointWaiters
 from testcompose.waiters.log_waiters import LogWaiter
-from testcompose.waiters.waiting_utils import is_container_still_running
+from testcompose.waiters.protocol_waiters import ProtocolWaiter
+from testcompose.waiters.tcp_waiters import TcpWaiter
 
 logger: Logger = stream_logger(__name__)
 
@@ -27,6 +31,7 @@ logger: Logger = stream_logger(__name__)
 class GenericContainer(BaseContainer):
     def __init__(self) -> None:
         super().__init__()
+        self.stack_id = None
 
     @property
     def container_label(self) -> str:
@@ -36,6 +41,28 @@ class GenericContainer(BaseContainer):
     def container_label(self, label: str) -> None:
         self._container_label = label
 
+    @property
+    def stack_id(self) -> Optional[str]:
+        return self._stack_id
+
+    @stack_id.setter
+    def stack_id(self, stack_id: Optional[str]) -> None:
+        self._stack_id: Optional[str] = stack_id
+
+    @property
+    def container_labels(self) -> Dict[str, str]:
+        """Labels set on the container. Containers of a stack share the stack label,
+        and carry the name of their service
+
+        Returns:
+            Dict[str, str]: container labels
+        """
+        labels: Dict[str, str] = {self.container_label: ""}
+        if self.stack_id:
+            labels[ContainerLabels.STACK] = self.stack_id
+            labels[ContainerLabels.SERVICE] = self.host_name
+        return labels
+
     @property
     def container_network(self) -> ContainerNetwork:
         return self._container_network
@@ -70,6 +97,16 @@ class GenericContainer(BaseContainer):
             atrr (RunningContainerAttributes): container attributes
         """
         self._container_attr: RunningContainerAttributes = RunningContainerAttributes(**atrr)  # noqa: E501
+        self._mapped_ports: Dict[str, str] = self._mapped_port_index(self._container_attr.NetworkSettings.Ports)  # noqa: E501
+
+    @property
+    def mapped_ports(self) -> Dict[str, str]:
+        """Container port to the host port bound to it, as of the last `reload`
+
+        Returns:
+            Dict[str, str]: mapped container-host ports
+        """
+        return dict(self._mapped_ports)
 
     def start(self, docker_client: DockerClient) -> Container:  # type: ignore
         """Start a container"""
@@ -78,6 +115,8 @@ class GenericContainer(BaseContainer):
                 "Docker Client not Running. Please check your docker settings and try again"  # noqa: E501
             )  # noqa: E501
 
+        # the reserved ports are unbound as late as possible, the container binds them right away
+        (self.port_allocator or PortAllocator.instance()).hand_over(self.reserved_host_ports)
         return docker_client.containers.run(
             image=self.image,
             command=self.command,
@@ -90,20 +129,106 @@ class GenericContainer(BaseContainer):
             remove=True,
             network=self.network,
             hostname=self.host_name,
-            labels=[self.container_label],
+            labels=self.container_labels,
+            stop_signal=self.stop_signal,
         )  # type: ignore
 
-    def check_container_health(self, docker_client: DockerClient, timeout: int = 120) -> None:  # noqa: E501
+    def check_container_health(
+        self,
+        docker_client: DockerClient,
+        timeout: int = 120,
+        event_tracker: Optional[ContainerEventTracker] = None,
+    ) -> None:
+        """Wait for the container to be running and for its waiters to succeed.
+
+        Args:
+            docker_client (DockerClient): Docker client
+            timeout (int, optional): seconds to wait for the container to run. Defaults to 120.
+            event_tracker (Optional[ContainerEventTracker], optional): event subscription of the
+                stack. When given, state changes are taken from docker events instead of polling.
+
+        Raises:
+            RuntimeError: when the container is not running or reports to be unhealthy
+        """  # noqa: E501
         start_time: datetime = datetime.now()
+        with trace_phase("status_wait"):
+            self._wait_for_running_state(docker_client, timeout, event_tracker)
+
+        if event_tracker:
+            with trace_phase("health_wait"):
+                self._wait_for_container_health(
+                    event_tracker, timeout - (datetime.now() - start_time).total_seconds()
+                )
+        self.reload(docker_client, self.get_container_id())
+
+        with trace_phase("log_wait"):
+            LogWaiter.search_container_logs(docker_client, self.container, self.log_waiter)
+
+        self.reload(docker_client, self.get_container_id())
+
+        if self.tcp_waiter:
+            with trace_phase("tcp_wait"):
+                TcpWaiter.wait_for_ports(
+                    docker_client,
+                    self.get_container_id(),  # type: ignore
+                    self.tcp_waiter,
+                    self._get_mapped_container_ports([str(x) for x in self.tcp_waiter.ports]),
+                )
+
+        if self.protocol_waiter:
+            with trace_phase("protocol_wait"):
+                ProtocolWaiter.wait_for_protocol(
+                    docker_client,
+                    self.get_container_id(),  # type: ignore
+                    self.protocol_waiter,
+                    self._get_mapped_container_ports([str(self.protocol_waiter.port)]),
+                )
+
+        endpoint_waiters: List[ContainerHttpWaitParameter] = list()
+        if self.http_waiter:
+            endpoint_waiters.append(self.http_waiter)
+        if self.https_waiter:
+            endpoint_waiters.append(self.https_waiter.copy(update={"use_https": True}))
+        if endpoint_waiters:
+            mapped_http_ports: Dict[str, str] = self._get_mapped_container_ports(
+                [str(x.http_port) for x in endpoint_waiters]
+            )
+            with trace_phase("endpoint_wait"):
+                EndpointWaiters.wait_for_endpoints(
+                    docker_client,
+                    self.get_container_id(),  # type: ignore
+                    endpoint_waiters,
+                    mapped_http_ports,
+                )
+
+    def _wait_for_running_state(
+        self, docker_client: DockerClient, timeout: int, event_tracker: Optional[ContainerEventTracker]
+    ) -> None:
+        """Block until the container is running.
+
+        Args:
+            docker_client (DockerClient): Docker client
+            timeout (int): seconds to wait for the container to run
+            event_tracker (Optional[ContainerEventTracker]): event subscription of the stack
+
+        Raises:
+            RuntimeError: when the container is not running once the timeout expires
+        """
+        start_time: datetime = datetime.now()
+        if event_tracker and event_tracker.is_alive:
+            state: Optional[str] = event_tracker.wait_for_container(self.get_container_id(), timeout)  # type: ignore  # noqa: E501
+            logger.info(f"Container:{self.container.name} status changed to {state}")
         while (datetime.now() - start_time).total_seconds() < timeout:
             logger.info(
                 f"Waiting for containe:{self.container.name} status to \
                 change from {self.container.status} to {PossibleContainerStates.RUNNING}"  # noqa: E501
             )
-            self.container.reload()
+            self.reload(docker_client, self.get_container_id())
             if self.container.status == PossibleContainerStates.RUNNING:
                 logger.info(f"Container:{self.container.name} status changed to {self.container.status}")  # noqa: E501
                 break
+            if event_tracker and event_tracker.container_state(self.get_container_id()) == PossibleContainerStates.EXITED:  # type: ignore  # noqa: E501
+                break
             sleep(2)
 
         self.reload(docker_client, self.get_container_id())
@@ -112,41 +237,65 @@ class GenericContainer(BaseContainer):
                 logger.debug(line.decode())
             raise RuntimeError(f"Container is in an unwanted state {self.container.status}")  # noqa: E501
 
-        self.reload(docker_client, self.get_container_id())
-
-        LogWaiter.search_container_logs(docker_client, self.container, self.log_waiter)
+    def _wait_for_container_health(self, event_tracker: ContainerEventTracker, timeout: float) -> None:  # noqa: E501
+        """Block until a container with a docker healthcheck reports a health status.
 
-        self.reload(docker_client, self.get_container_id())
+        Args:
+            event_tracker (ContainerEventTracker): event subscription of the stack
+            timeout (float): seconds to wait
 
-        if self.http_waiter:
-            mapped_http_port: Dict[str, str] = dict()
-            mapped_http_port[str(self.http_waiter.http_port)] = self.get_exposed_port(  # type: ignore  # noqa: E501
-                str(self.http_waiter.http_port)
-            )
-            EndpointWaiters.wait_for_http(
-                docker_client,
-                self.get_container_id(),  # type: ignore
-                self.http_waiter,
-                mapped_http_port,  # type: ignore
-            )
+        Raises:
+            RuntimeError: when the container reports to be unhealthy
+        """
+        health: Optional[str] = (self.container.attrs.get("State", {}).get("Health") or {}).get("Status")  # noqa: E501
+        if health == 'starting':
+            health = event_tracker.wait_for_health(self.get_container_id(), timeout)  # type: ignore  # noqa: E501
+        if health == 'unhealthy':
+            raise RuntimeError(f"Container {self.container.name} reported to be unhealthy")
 
     def stop(self, force=True, delete_volume=True) -> None:
-        """Stop a running container
+        """Stop a running container and remove it with its anonymous volumes.
+        A container with `kill_on_stop` is only killed, the daemon then removes it as
+        it was started with auto remove. A container with a `stop_timeout` or
+        `stop_signal` is first stopped gracefully, and killed once the timeout expires.
+
         Args:
-            force (bool, optional): [description]. Defaults to True.
-            delete_volume (bool, optional): [description]. Defaults to True.
-        """
+            force (bool, optional): kill the container if it is still running. Defaults to True.
+            delete_volume (bool, optional): remove the anonymous volumes of the container. Defaults to True.
+        """  # noqa: E501
         try:
-            if self.container:
-                self.container.remove(v=delete_volume, force=force)
+            if not self.container:
+                return
+            if self.kill_on_stop:
+                self.container.kill()
+                return
+            if self.stop_timeout is not None or self.stop_signal:
+                self.container.stop(timeout=self.stop_timeout if self.stop_timeout is not None else 10)
+            self.container.remove(v=delete_volume, force=force)
+        except NotFound:
+            pass
         except APIError as exc:
-            logger.error(exc)
+            # an auto removed container may already be on its way out
+            if exc.status_code != 409:
+                logger.error(exc)
+        finally:
+            self.release_host_ports()
+
+    def release_host_ports(self) -> None:
+        """Drop the reservations of the host ports of the container"""
+        if self.reserved_host_ports:
+            (self.port_allocator or PortAllocator.instance()).release(self.reserved_host_ports)
+            self.reserved_host_ports = list()
 
     def reload(self, docker_client, container_id) -> None:
         """Reload the attributes of a running container"""
-        if is_container_still_running(docker_client, container_id):
-            self.container.reload()
-            self.container_attr = self.container.attrs  # type: ignore
+        try:
+            container: Container = docker_client.containers.get(container_id)
+        except APIError:
+            return
+        # one inspect, possibly shared through a caching client, refreshes both views of the container
+        self.container.attrs = container.attrs
+        self.container_attr = self.container.attrs
 
     def get_exposed_port(self, port: str) -> Optional[str]:
         """Get host port bound to the container exposed port
@@ -171,14 +320,23 @@ class GenericContainer(BaseContainer):
         Returns:
             Dict[str, str]: Mapped container-host ports.
         """
-        mapped_ports: Dict[str, str] = dict()
-        ports: Dict[str, Any] = self.container_attr.NetworkSettings.Ports
-        for port in ports:
-            container_port: str = re.sub("[^0-9]", "", port)
-            if container_port in exposed_ports and ports[port] and isinstance(ports[port], list):  # noqa: E501
-                host_ports: ContainerMappedPorts = ContainerMappedPorts(**(ports[port][0]))  # noqa: E501
-                mapped_ports.update({container_port: host_ports.HostPort})
-        return mapped_ports
+        return {x: self._mapped_ports[x] for x in exposed_ports if x in self._mapped_ports}
+
+    @staticmethod
+    def _mapped_port_index(ports: Dict[str, Any]) -> Dict[str, str]:
+        """Index the port bindings of a container inspect by container port
+
+        Args:
+            ports (Dict[str, Any]): `NetworkSettings.Ports` of the container, e.g. `{"8080/tcp": [{"HostIp": "0.0.0.0", "HostPort": "49153"}]}`
+
+        Returns:
+            Dict[str, str]: container port to the first host port bound to it
+        """  # noqa: E501
+        index: Dict[str, str] = dict()
+        for port, bindings in (ports or dict()).items():
+            if bindings and isinstance(bindings, list):
+                index[port.split("/")[0]] = bindings[0]["HostPort"]
+        return index
 
     def get_container_id(self) -> Optional[str]:
         """Container id
@@ -198,6 +356,22 @@ class GenericContainer(BaseContainer):
         """
         return socket.gethostbyname(socket.gethostname())
 
+    def run_init_command(self, command: Union[str, List[str]]) -> None:
+        """Run the init command of a service, e.g. migrations or a seed script,
+        once the container is ready.
+
+        Args:
+            command (Union[str, List[str]]): command to run in the container
+
+        Raises:
+            RuntimeError: when the command exits with a non zero exit code
+        """
+        exit_code, output = self.exe_command(command)
+        if exit_code != 0:
+            raise RuntimeError(
+                f"Init command of container {self.container.name} failed with exit code {exit_code}: {output!r}"  # noqa: E501
+            )
+
     def exe_command(self, command: Union[str, List[str]]) -> Tuple[int, ByteString]:
         """Execute a command inside a container after it has started running.
 
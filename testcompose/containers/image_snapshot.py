@@ -0,0 +1,191 @@
+import hashlib
+import os
+import pathlib
+import re
+import time
+from datetime import datetime
+from logging import Logger
+from typing import List, Match, Optional, Pattern, Tuple
+
+from docker.client import DockerClient  # type: ignore
+from docker.errors import APIError, ImageNotFound  # type: ignore
+from docker.models.containers import Container  # type: ignore
+from docker.models.images import Image  # type: ignore
+
+from testcompose.containers.stack_reuse import StackReuse
+from testcompose.file_lock import FileLock
+from testcompose.log_setup import stream_logger
+from testcompose.models.bootstrap.container_snapshot_parameter import ContainerSnapshotParameter
+from testcompose.models.container.container_labels import ContainerLabels
+from testcompose.models.container.image_snapshot import SnapshotIndex, SnapshotParameters
+
+logger: Logger = stream_logger(__name__)
+
+_RFC3339: Pattern[str] = re.compile(
+    r"^(?P<seconds>\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2})(?:\.(?P<fraction>\d+))?(?P<zone>Z|[+-]\d{2}:\d{2})$"
+)
+
+
+class ImageSnapshots:
+    """Commits the initialized state of seeded services into locally tagged images,
+    so later runs start from the snapshot instead of seeding again. A snapshot is
+    tagged by the config hash of its service and a hash of the seed inputs. The
+    snapshots are evicted least recently used first, bounded by count, total size
+    and age.
+
+    Args:
+        docker_client (DockerClient): Docker client
+        snapshot_param (SnapshotParameters): snapshot settings
+    """
+
+    REPOSITORY: str = "testcompose-snapshot"
+
+    def __init__(self, docker_client: DockerClient, snapshot_param: SnapshotParameters) -> None:
+        self._docker_client: DockerClient = docker_client
+        self._snapshot_param: SnapshotParameters = snapshot_param
+        state_directory: str = snapshot_param.state_directory or StackReuse.default_state_directory()
+        self._index_file: pathlib.Path = pathlib.Path(state_directory) / "snapshots.json"
+        self._lock: FileLock = FileLock(os.path.join(state_directory, "snapshots.lock"))
+
+    @staticmethod
+    def seed_hash(snapshot_parameter: ContainerSnapshotParameter) -> str:
+        """Hash of the init command, seed key and the content of all seed files.
+
+        Args:
+            snapshot_parameter (ContainerSnapshotParameter): seed inputs of a service
+
+        Returns:
+            str: hex digest
+        """
+        digest = hashlib.sha256()
+        digest.update(repr(snapshot_parameter.init_command).encode())
+        digest.update(snapshot_parameter.seed_key.encode())
+        for seed_file in snapshot_parameter.seed_files:
+            path: pathlib.Path = pathlib.Path(seed_file)
+            files: List[pathlib.Path] = sorted([x for x in path.rglob("*") if x.is_file()]) if path.is_dir() else [path]  # noqa: E501
+            for file in files:
+                digest.update(str(file.relative_to(path) if path.is_dir() else file.name).encode())
+                digest.update(file.read_bytes())
+        return digest.hexdigest()
+
+    @staticmethod
+    def snapshot_image(service_name: str, service_hash: str, seed_hash: str) -> str:
+        tag_prefix: str = re.sub(r"[^A-Za-z0-9_.-]", "_", service_name)[:64]
+        key: str = hashlib.sha256(f"{service_hash}:{seed_hash}".encode()).hexdigest()[:32]
+        return f"{ImageSnapshots.REPOSITORY}:{tag_prefix}-{key}"
+
+    def find(self, snapshot_image: str) -> Optional[str]:
+        """Look up a snapshot and mark it as used.
+
+        Args:
+            snapshot_image (str): snapshot image name
+
+        Returns:
+            Optional[str]: the image name, if the snapshot exists
+        """
+        try:
+            self._docker_client.images.get(snapshot_image)
+        except ImageNotFound:
+            return None
+        self._touch(snapshot_image)
+        return snapshot_image
+
+    def create(self, container: Container, snapshot_image: str, service_name: str) -> str:
+        """Commit a container into a snapshot image.
+
+        Args:
+            container (Container): the initialized container
+            snapshot_image (str): snapshot image name
+            service_name (str): service of the container
+
+        Returns:
+            str: the image name
+        """
+        repository, tag = snapshot_image.rsplit(":", 1)
+        container.commit(repository=repository, tag=tag, conf={"Labels": {ContainerLabels.SNAPSHOT: service_name}})  # noqa: E501
+        logger.info("Snapshot %s of service %s created", snapshot_image, service_name)
+        self._touch(snapshot_image)
+        return snapshot_image
+
+    def evict(self) -> List[str]:
+        """Remove the snapshots that exceed the age, count or size bound, least
+        recently used first. Snapshots still used by a container are kept.
+
+        Returns:
+            List[str]: removed snapshot images
+        """
+        now: float = time.time()
+        removed: List[str] = list()
+        with self._lock:
+            index: SnapshotIndex = self._load_index()
+            snapshots: List[Tuple[float, str, int]] = list()
+            for image in self._docker_client.images.list(filters={"label": ContainerLabels.SNAPSHOT}):
+                for snapshot_image in [x for x in image.tags if x.startswith(f"{self.REPOSITORY}:")]:
+                    last_used: float = index.last_used.get(snapshot_image, self._created_at(image, now))
+                    snapshots.append((last_used, snapshot_image, int(image.attrs.get("Size") or 0)))
+
+            kept_count: int = 0
+            kept_size: int = 0
+            max_size: int = self._snapshot_param.max_size_mb * 1024 * 1024
+            for last_used, snapshot_image, size in sorted(snapshots, reverse=True):
+                if (
+                    now - last_used <= self._snapshot_param.max_age_seconds
+                    and kept_count < self._snapshot_param.max_snapshots
+                    and kept_size + size <= max_size
+                ):
+                    kept_count += 1
+                    kept_size += size
+                    continue
+                try:
+                    self._docker_client.images.remove(snapshot_image)
+                    removed.append(snapshot_image)
+                except APIError as exc:
+                    logger.info("Snapshot %s is kept: %s", snapshot_image, exc)
+
+            known_images: List[str] = [x[1] for x in snapshots if x[1] not in removed]
+            index.last_used = {k: v for k, v in index.last_used.items() if k in known_images}
+            self._save_index(index)
+        if removed:
+            logger.info("Evicted snapshots: %s", removed)
+        return removed
+
+    @staticmethod
+    def _created_at(image: Image, default: float) -> float:
+        """Creation time of an image. Inspected images, as returned by `images.list`,
+        have an RFC 3339 timestamp with up to nanosecond precision.
+
+        Args:
+            image (Image): snapshot image
+            default (float): returned when the creation time can not be read
+
+        Returns:
+            float: creation time in seconds since the epoch
+        """
+        created = image.attrs.get("Created")
+        if isinstance(created, (int, float)):
+            return float(created)
+        match: Optional[Match[str]] = _RFC3339.match(created or "")
+        if not match:
+            return default
+        seconds: float = datetime.strptime(f"{match['seconds']}{match['zone']}", "%Y-%m-%dT%H:%M:%S%z").timestamp()
+        return seconds + float(f"0.{match['fraction'] or 0}")
+
+    def _touch(self, snapshot_image: str) -> None:
+        with self._lock:
+            index: SnapshotIndex = self._load_index()
+            index.last_used[snapshot_image] = time.time()
+            self._save_index(index)
+
+    def _load_index(self) -> SnapshotIndex:
+        if not self._index_file.exists():
+            return SnapshotIndex()
+        try:
+            return SnapshotIndex.parse_file(self._index_file)
+        except Exception as exc:
+            logger.info("Ignoring unreadable snapshot index %s: %s", self._index_file, exc)
+            return SnapshotIndex()
+
+    def _save_index(self, index: SnapshotIndex) -> None:
+        temporary_file: pathlib.Path = self._index_file.with_suffix(f".{os.getpid()}.tmp")
+        temporary_file.write_text(index.json())
+        os.replace(temporary_file, self._index_file)
@@ -0,0 +1,208 @@
+import os
+import socket
+import threading
+import time
+from logging import Logger
+from typing import Dict, List, Optional, Set, Tuple
+
+from testcompose.containers.stack_reuse import StackReuse
+from testcompose.file_lock import FileLock
+from testcompose.log_setup import stream_logger
+from testcompose.models.container.port_reservation import PortRegistry, PortReservation
+
+logger: Logger = stream_logger(__name__)
+
+_MAX_PORT: int = 65535
+
+
+class PortAllocator:
+    """Reserves free host ports for containers that are started with a fixed host
+    port, e.g. for `${self.external_port_9092}` placeholders. A reserved port stays
+    bound by a socket of the allocator until `hand_over` is called right before the
+    container binds it, so no other process can take it in between. Reservations
+    are published to a registry file under an inter-process lock, so the stacks of
+    all processes on the host, e.g. the workers of `pytest-xdist`, never get the
+    same port. Reservations of processes that are gone, or older than the lease,
+    are dropped.
+
+    Args:
+        state_directory (str): directory of the lock and registry file, shared by all processes
+        lease_seconds (float, optional): seconds after which a reservation is dropped. Defaults to 3600.
+        max_attempts (int, optional): candidate blocks tried per reservation. Defaults to 100.
+    """  # noqa: E501
+
+    _instances: Dict[Tuple[int, str], 'PortAllocator'] = dict()
+    _instances_lock: threading.Lock = threading.Lock()
+
+    def __init__(self, state_directory: str, lease_seconds: float = 3600, max_attempts: int = 100) -> None:
+        self._state_directory: str = state_directory
+        self._lease_seconds: float = lease_seconds
+        self._max_attempts: int = max_attempts
+        self._file_lock: FileLock = FileLock(os.path.join(state_directory, "ports.lock"))
+        # the file lock is per process, threads of the process take turns on this lock
+        self._lock: threading.Lock = threading.Lock()
+        self._held_sockets: Dict[int, socket.socket] = dict()
+
+    @classmethod
+    def instance(cls, state_directory: Optional[str] = None) -> 'PortAllocator':
+        """The allocator shared by every stack of this process.
+
+        Args:
+            state_directory (Optional[str], optional): directory of the registry. Defaults to the testcompose cache directory.
+
+        Returns:
+            PortAllocator: the shared allocator
+        """  # noqa: E501
+        key: Tuple[int, str] = (os.getpid(), state_directory or StackReuse.default_state_directory())
+        with cls._instances_lock:
+            if key not in cls._instances:
+                cls._instances[key] = PortAllocator(key[1])
+            return cls._instances[key]
+
+    @property
+    def registry_file(self) -> str:
+        return os.path.join(self._state_directory, "ports.json")
+
+    @property
+    def held_ports(self) -> List[int]:
+        """Reserved ports still bound by the allocator
+
+        Returns:
+            List[int]: held ports
+        """
+        with self._lock:
+            return sorted(self._held_sockets)
+
+    def reserve(self, count: int = 1) -> List[int]:
+        """Reserve a block of contiguous free host ports, e.g. for a port range.
+
+        Args:
+            count (int, optional): number of ports. Defaults to 1.
+
+        Raises:
+            ValueError: when count is not positive
+            RuntimeError: when no free block was found
+
+        Returns:
+            List[int]: the reserved ports, in ascending order
+        """
+        if count < 1:
+            raise ValueError("At least one port must be reserved")
+        with self._lock, self._file_lock:
+            registry: PortRegistry = self._load()
+            reserved_ports: Set[int] = {x for reservation in registry.reservations for x in reservation.ports}
+            for _ in range(self._max_attempts):
+                sockets: Optional[List[socket.socket]] = self._bind_block(count, reserved_ports)
+                if sockets:
+                    break
+            else:
+                raise RuntimeError(f"No block of {count} free host ports found")
+            ports: List[int] = [x.getsockname()[1] for x in sockets]
+            registry.reservations.append(
+                PortReservation(first_port=ports[0], count=count, pid=os.getpid(), reserved_at=time.time())
+            )
+            self._save(registry)
+            self._held_sockets.update(zip(ports, sockets))
+        logger.debug("Reserved host ports %s", ports)
+        return ports
+
+    def hand_over(self, ports: List[int]) -> None:
+        """Unbind reserved ports, so a container can bind them. The ports stay
+        reserved for the container until they are released.
+
+        Args:
+            ports (List[int]): reserved ports
+        """
+        with self._lock:
+            for port in ports:
+                held_socket: Optional[socket.socket] = self._held_sockets.pop(port, None)
+                if held_socket:
+                    held_socket.close()
+
+    def release(self, ports: List[int]) -> None:
+        """Unbind reserved ports and drop their reservations
+
+        Args:
+            ports (List[int]): reserved ports
+        """
+        if not ports:
+            return
+        self.hand_over(ports)
+        with self._lock, self._file_lock:
+            registry: PortRegistry = self._load()
+            registry.reservations = [
+                x
+                for x in registry.reservations
+                if x.pid != os.getpid() or not set(x.ports).intersection(ports)
+            ]
+            self._save(registry)
+
+    def _bind_block(self, count: int, reserved_ports: Set[int]) -> Optional[List[socket.socket]]:
+        """Bind a block of ports starting at a free port the system picks
+
+        Args:
+            count (int): number of ports
+            reserved_ports (Set[int]): ports reserved in the registry
+
+        Returns:
+            Optional[List[socket.socket]]: the bound sockets, None when a port of the block is taken
+        """  # noqa: E501
+        sockets: List[socket.socket] = [self._bind(0)]
+        first_port: int = sockets[0].getsockname()[1]
+        try:
+            if first_port in reserved_ports or first_port + count - 1 > _MAX_PORT:
+                raise OSError(f"Port {first_port} can not start a block of {count} ports")
+            for port in range(first_port + 1, first_port + count):
+                if port in reserved_ports:
+                    raise OSError(f"Port {port} is reserved")
+                sockets.append(self._bind(port))
+        except OSError:
+            for bound_socket in sockets:
+                bound_socket.close()
+            return None
+        return sockets
+
+    @staticmethod
+    def _bind(port: int) -> socket.socket:
+        _socket: socket.socket = socket.socket(family=socket.AF_INET, type=socket.SOCK_STREAM)
+        try:
+            _socket.bind(("", port))
+        except OSError:
+            _socket.close()
+            raise
+        return _socket
+
+    def _load(self) -> PortRegistry:
+        if not os.path.exists(self.registry_file):
+            return PortRegistry()
+        try:
+            registry: PortRegistry = PortRegistry.parse_file(self.registry_file)
+        except ValueError:
+            logger.warning("Discarding unreadable port registry %s", self.registry_file)
+            return PortRegistry()
+        expiry: float = time.time() - self._lease_seconds
+        registry.reservations = [
+            x for x in registry.reservations if x.reserved_at > expiry and self._is_alive(x.pid)
+        ]
+        return registry
+
+    def _save(self, registry: PortRegistry) -> None:
+        temporary_file: str = f"{self.registry_file}.{os.getpid()}.tmp"
+        with open(temporary_file, "w") as fh:
+            fh.write(registry.json())
+        os.replace(temporary_file, self.registry_file)
+
+    @staticmethod
+    def _is_alive(pid: int) -> bool:
+        if pid == os.getpid():
+            return True
+        if os.name == "nt":  # pragma: no cover
+            # signal 0 would terminate the process on windows, its reservations expire with the lease
+            return True
+        try:
+            os.kill(pid, 0)
+        except ProcessLookupError:
+            return False
+        except PermissionError:
+            return True
+        return True
@@ -0,0 +1,118 @@
+import os
+from logging import Logger
+from typing import Callable, List, Optional
+
+from testcompose.file_lock import FileLock
+from testcompose.log_setup import stream_logger
+from testcompose.models.container.shared_stack import SharedStack
+
+logger: Logger = stream_logger(__name__)
+
+
+class SharedStackCoordinator:
+    """Share one stack between test processes, e.g. the workers of `pytest-xdist`.
+    The first process to attach starts the stack while holding an inter-process
+    lock and publishes its connection details to a state file. Every other process
+    waits on the lock and attaches to the published stack. Given the number of
+    processes, the stack is torn down once all of them detached, whether they
+    attached or not, so a process that finishes before another one attached does
+    not remove the stack. Otherwise the last attached process to detach tears it down.
+
+    Args:
+        state_directory (str): directory of the lock and state file, shared by all processes
+        worker_id (str): unique id of the attaching process
+        start_stack (Callable[[], SharedStack]): starts the stack and returns its connection details
+        teardown_stack (Callable[[List[str]], None]): removes the resources with the given labels
+        worker_count (Optional[int]): number of processes sharing the stack, e.g. `PYTEST_XDIST_WORKER_COUNT`
+    """  # noqa: E501
+
+    def __init__(
+        self,
+        state_directory: str,
+        worker_id: str,
+        start_stack: Callable[[], SharedStack],
+        teardown_stack: Callable[[List[str]], None],
+        worker_count: Optional[int] = None,
+    ) -> None:
+        self._state_directory: str = state_directory
+        self._worker_id: str = worker_id
+        self._start_stack: Callable[[], SharedStack] = start_stack
+        self._teardown_stack: Callable[[List[str]], None] = teardown_stack
+        self._worker_count: Optional[int] = worker_count
+        self._lock: FileLock = FileLock(os.path.join(state_directory, "stack.lock"))
+
+    @property
+    def state_file(self) -> str:
+        return os.path.join(self._state_directory, "stack.json")
+
+    def attach(self) -> SharedStack:
+        """Start the stack, or attach to the stack another process started.
+
+        Raises:
+            RuntimeError: when the stack could not be started, also in processes that only attach
+
+        Returns:
+            SharedStack: connection details of the stack
+        """
+        with self._lock:
+            stack: Optional[SharedStack] = self._load()
+            if not stack or not (stack.stack_id or stack.error):
+                logger.info("Worker %s starts the shared stack", self._worker_id)
+                # processes that finished before the stack was started still count towards its teardown
+                finished_workers: List[str] = stack.finished_workers if stack else list()
+                try:
+                    stack = self._start_stack()
+                except Exception as exc:
+                    # the failure is published, so waiting processes fail fast instead of starting the stack again  # noqa: E501
+                    self._save(SharedStack(stack_id="", error=str(exc), finished_workers=finished_workers))
+                    raise
+                stack.finished_workers = finished_workers
+            elif stack.error:
+                raise RuntimeError(f"The shared stack could not be started: {stack.error}")
+            else:
+                logger.info("Worker %s attaches to shared stack %s", self._worker_id, stack.stack_id)
+            stack.workers.append(self._worker_id)
+            self._save(stack)
+            return stack
+
+    def detach(self) -> None:
+        """Detach from the stack once the process is done with it. Processes that
+        never attached detach as well when the number of processes is given. The
+        last process tears the stack down. Detaching twice has no effect.
+        """
+        with self._lock:
+            stack: Optional[SharedStack] = self._load()
+            if self._worker_count is None:
+                if not stack or self._worker_id not in stack.workers:
+                    return
+                stack.workers.remove(self._worker_id)
+                if stack.workers:
+                    self._save(stack)
+                    return
+            else:
+                stack = stack or SharedStack(stack_id="")
+                if self._worker_id in stack.workers:
+                    stack.workers.remove(self._worker_id)
+                if self._worker_id not in stack.finished_workers:
+                    stack.finished_workers.append(self._worker_id)
+                if len(stack.finished_workers) < self._worker_count:
+                    self._save(stack)
+                    return
+            try:
+                if stack.stack_id:
+                    logger.info("Worker %s tears down shared stack %s", self._worker_id, stack.stack_id)
+                    self._teardown_stack(stack.labels)
+            finally:
+                if os.path.exists(self.state_file):
+                    os.remove(self.state_file)
+
+    def _load(self) -> Optional[SharedStack]:
+        if not os.path.exists(self.state_file):
+            return None
+        return SharedStack.parse_file(self.state_file)
+
+    def _save(self, stack: SharedStack) -> None:
+        temporary_file: str = f"{self.state_file}.{os.getpid()}.tmp"
+        with open(temporary_file, "w") as fh:
+            fh.write(stack.json())
+        os.replace(temporary_file, self.state_file)
@@ -0,0 +1,124 @@
+import hashlib
+import json
+import os
+import pathlib
+import time
+from logging import Logger
+from typing import Dict, List, Optional
+
+from testcompose.log_setup import stream_logger
+from testcompose.models.bootstrap.container_service import ContainerService
+from testcompose.models.bootstrap.container_volume import VolumeSourceTypes
+from testcompose.models.container.stack_reuse import ReuseParameters, StackState
+
+logger: Logger = stream_logger(__name__)
+
+
+class StackReuse:
+    """Computes stable hashes of resolved services and persists the state of
+    running stacks, so a later run can reattach to an identical stack instead
+    of creating it again.
+
+    Args:
+        reuse_param (ReuseParameters): reuse settings
+    """
+
+    def __init__(self, reuse_param: ReuseParameters) -> None:
+        self._reuse_param: ReuseParameters = reuse_param
+        self._state_directory: pathlib.Path = pathlib.Path(
+            reuse_param.state_directory or StackReuse.default_state_directory()
+        )
+
+    @staticmethod
+    def default_state_directory() -> str:
+        cache_home: str = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")  # noqa: E501
+        return os.path.join(cache_home, "testcompose")
+
+    @staticmethod
+    def service_config_hash(service: ContainerService, image_id: str, dependency_hashes: List[str]) -> str:  # noqa: E501
+        """Hash everything that defines the container of a service. The hashes of
+        the services it depends on are folded in, so a changed dependency also
+        changes the hash of all its dependents.
+
+        Args:
+            service (ContainerService): config service
+            image_id (str): id of the local image, i.e. its digest
+            dependency_hashes (List[str]): hashes of the services the service depends on
+
+        Returns:
+            str: hex digest
+        """
+        volumes: List[Dict[str, str]] = [
+            dict(
+                x.dict(),
+                host=str(pathlib.Path(x.host).absolute())
+                if x.source == VolumeSourceTypes.FILESYSTEM_SOURCE
+                else x.host,
+            )
+            for x in service.volumes
+        ]
+        definition = {
+            "name": service.name,
+            "image_id": image_id,
+            "command": service.command,
+            "entrypoint": service.entrypoint,
+            "environment": service.environment,
+            "exposed_ports": [str(x) for x in service.exposed_ports],
+            "volumes": volumes,
+            "dependencies": sorted(dependency_hashes),
+        }
+        return hashlib.sha256(json.dumps(definition, sort_keys=True, default=str).encode()).hexdigest()  # noqa: E501
+
+    @staticmethod
+    def stack_config_hash(service_hashes: Dict[str, str]) -> str:
+        return hashlib.sha256(
+            "\n".join([f"{name}:{service_hashes[name]}" for name in sorted(service_hashes)]).encode()
+        ).hexdigest()
+
+    def state_file(self, stack_hash: str) -> pathlib.Path:
+        return self._state_directory / f"stack-{stack_hash[:32]}.json"
+
+    def load(self, stack_hash: str) -> Optional[StackState]:
+        state_file: pathlib.Path = self.state_file(stack_hash)
+        if not state_file.exists():
+            return None
+        try:
+            state: StackState = StackState.parse_file(state_file)
+        except Exception as exc:
+            logger.info("Ignoring unreadable stack state %s: %s", state_file, exc)
+            return None
+        return state if state.stack_hash == stack_hash else None
+
+    def save(self, state: StackState) -> None:
+        self._state_directory.mkdir(parents=True, exist_ok=True)
+        state_file: pathlib.Path = self.state_file(state.stack_hash)
+        temporary_file: pathlib.Path = state_file.with_suffix(f".{os.getpid()}.tmp")
+        temporary_file.write_text(state.json(indent=2))
+        os.replace(temporary_file, state_file)
+
+    def discard(self, stack_hash: str) -> None:
+        try:
+            self.state_file(stack_hash).unlink()
+        except FileNotFoundError:
+            pass
+
+    def is_expired(self, state: StackState) -> bool:
+        return time.time() - state.created_at > self._reuse_param.ttl_seconds
+
+    def expired_states(self) -> List[StackState]:
+        """States of all expired kept stacks, including those of configs that
+        changed since, whose state is never loaded again.
+
+        Returns:
+            List[StackState]: expired stack states
+        """
+        expired: List[StackState] = list()
+        for state_file in sorted(self._state_directory.glob("stack-*.json")):
+            try:
+                state: StackState = StackState.parse_file(state_file)
+            except Exception as exc:
+                logger.info("Ignoring unreadable stack state %s: %s", state_file, exc)
+                continue
+            if self.is_expired(state):
+                expired.append(state)
+        return expired
@@ -0,0 +1,67 @@
+import os
+import sys
+from types import TracebackType
+from typing import IO, Any, Optional, Type
+
+# checked by sys.platform, so type checkers only check the locking calls of their platform
+if sys.platform == "win32":  # pragma: no cover
+    import msvcrt
+else:
+    import fcntl
+
+
+class FileLock:
+    """Exclusive lock shared between processes on the same host, held on a lock file.
+    The lock is released when the holder closes the file or exits, so a crashed
+    process never leaves a stale lock behind.
+
+    Args:
+        lock_file (str): path of the lock file, created when missing
+    """
+
+    def __init__(self, lock_file: str) -> None:
+        self._lock_file: str = lock_file
+        self._handle: Optional[IO[Any]] = None
+
+    @property
+    def lock_file(self) -> str:
+        return self._lock_file
+
+    def acquire(self) -> 'FileLock':
+        os.makedirs(os.path.dirname(os.path.abspath(self._lock_file)), exist_ok=True)
+        handle: IO[Any] = open(self._lock_file, "a+")
+        try:
+            if sys.platform == "win32":  # pragma: no cover
+                handle.seek(0)
+                msvcrt.locking(handle.fileno(), msvcrt.LK_LOCK, 1)
+            else:
+                fcntl.flock(handle.fileno(), fcntl.LOCK_EX)
+        except Exception:
+            handle.close()
+            raise
+        self._handle = handle
+        return self
+
+    def release(self) -> None:
+        if not self._handle:
+            return
+        try:
+            if sys.platform == "win32":  # pragma: no cover
+                self._handle.seek(0)
+                msvcrt.locking(self._handle.fileno(), msvcrt.LK_UNLCK, 1)
+            else:
+                fcntl.flock(self._handle.fileno(), fcntl.LOCK_UN)
+        finally:
+            self._handle.close()
+            self._handle = None
+
+    def __enter__(self) -> 'FileLock':
+        return self.acquire()
+
+    def __exit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc_value: Optional[BaseException],
+        exc_tb: Optional[TracebackType],
+    ) -> None:
+        self.release()
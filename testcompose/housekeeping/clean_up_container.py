@@ -1,17 +1,56 @@
-import socket
+from time import monotonic
 from typing import Any, Dict, List
 from uuid import uuid4
 
 from testcompose.containers.container_network import ContainerNetwork
 from testcompose.containers.generic_container import GenericContainer
+from testcompose.housekeeping.native_reaper import NativeReaper
 from testcompose.log_setup import stream_logger
 from testcompose.models.bootstrap.container_service import ContainerService
+from testcompose.models.housekeeping.reaper import CleanupBackends, ReaperReport
 
 logger = stream_logger(__name__)
 
 
 class Housekeeping:
-    """description"""
+    """Teardown of the resources of a stack. Resources are removed right away. With
+    the Ryuk backend `RunContainers` registers the labels of a stack with the Ryuk
+    container of the process when the stack starts, so Ryuk removes anything left
+    over once the process exits, even after a SIGKILL. Labels that were not
+    registered yet, e.g. of a stack another process started, are registered here.
+    """
+
+    @staticmethod
+    def register_labels(docker_client, labels: List[str], cleanup_backend: str = CleanupBackends.RYUK) -> None:
+        """Have the backend remove the resources of the labels once the process exits.
+
+        Args:
+            docker_client (DockerClient): Docker client
+            labels (List[str]): label filters, `key` or `key=value`
+            cleanup_backend (str, optional): one of `CleanupBackends`. Defaults to `CleanupBackends.RYUK`.
+        """  # noqa: E501
+        if cleanup_backend == CleanupBackends.NATIVE:
+            NativeReaper.instance(docker_client).register(labels)
+            return
+
+        # imported here, as the reaper starts its Ryuk container through this class
+        from testcompose.housekeeping.ryuk_reaper import RyukReaper
+
+        RyukReaper.instance(docker_client).register(labels)
+
+    @staticmethod
+    def unregister_labels(docker_client, labels: List[str], cleanup_backend: str = CleanupBackends.RYUK) -> None:
+        """Keep the backend from removing the resources of the labels, e.g. once they
+        were removed. Ryuk keeps its filters until the process exits, it no longer
+        finds the removed resources then.
+
+        Args:
+            docker_client (DockerClient): Docker client
+            labels (List[str]): label filters, `key` or `key=value`
+            cleanup_backend (str, optional): one of `CleanupBackends`. Defaults to `CleanupBackends.RYUK`.
+        """  # noqa: E501
+        if cleanup_backend == CleanupBackends.NATIVE:
+            NativeReaper.instance(docker_client).unregister(labels)
 
     @staticmethod
     def cleanup_parameters() -> Dict[str, Any]:
@@ -49,15 +88,30 @@ class Housekeeping:
         return generic_container
 
     @staticmethod
-    def perform_housekeeping(docker_client, labels: List[str]):
-        if labels:
-            container: GenericContainer = Housekeeping.start_ryuk_container(docker_client)  # noqa: E501
-            TCP_IP = container.get_container_host_ip()
-            TCP_PORT = int(str(container.get_exposed_port(port="8080")))
-            for label in labels:
-                _socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-                _socket.connect((TCP_IP, TCP_PORT))
-                _socket.send(bytes(f"label={label}", encoding="utf-8"))
-                data = _socket.recv(0)
-                logger.info(f"Received: {str(data)} From RYUK")
-                _socket.close()
+    def perform_housekeeping(
+        docker_client, labels: List[str], cleanup_backend: str = CleanupBackends.RYUK
+    ) -> ReaperReport:
+        """Remove the resources of the label filters.
+
+        Args:
+            docker_client (DockerClient): Docker client
+            labels (List[str]): label filters, `key` or `key=value`
+            cleanup_backend (str, optional): one of `CleanupBackends`. Defaults to `CleanupBackends.RYUK`.
+
+        Returns:
+            ReaperReport: removed resources and step durations
+        """  # noqa: E501
+        if not labels:
+            return ReaperReport()
+        if cleanup_backend == CleanupBackends.NATIVE:
+            return NativeReaper.instance(docker_client).reap(labels)
+
+        # imported here, as the reaper starts its Ryuk container through this class
+        from testcompose.housekeeping.ryuk_reaper import RyukReaper
+
+        start: float = monotonic()
+        RyukReaper.instance(docker_client).register(labels)
+        ryuk_duration_ms: float = round((monotonic() - start) * 1000, 3)
+        report: ReaperReport = NativeReaper.instance(docker_client).remove_resources(labels)
+        report.step_durations_ms["ryuk"] = ryuk_duration_ms
+        return report
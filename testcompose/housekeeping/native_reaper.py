@@ -0,0 +1,217 @@
+import atexit
+import os
+import signal
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from logging import Logger
+from time import monotonic
+from types import FrameType
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from docker.client import DockerClient  # type: ignore
+from docker.errors import APIError, NotFound  # type: ignore
+
+from testcompose.client.base_docker_client import BaseDockerClient
+from testcompose.log_setup import stream_logger
+from testcompose.models.housekeeping.reaper import ReaperReport
+
+logger: Logger = stream_logger(__name__)
+
+
+class NativeReaper:
+    """Removes the containers, networks and volumes of a stack from this process,
+    without a Ryuk container. Resources are found with one filtered list call per
+    resource type and label, and removed concurrently on a worker pool. Labels of
+    running stacks are registered, so they are also removed when the process exits
+    or receives SIGTERM, SIGINT or SIGHUP. The signal handlers only turn the signal
+    into an exit of the process, the resources are removed by the exit handler. A
+    process killed with SIGKILL leaves them behind, use Ryuk where that can happen.
+
+    Args:
+        docker_client (DockerClient): Docker client
+        max_workers (int): resources removed at the same time. Defaults to 8.
+    """
+
+    HANDLED_SIGNALS: Tuple[str, ...] = ("SIGTERM", "SIGINT", "SIGHUP")
+    _instances: Dict[Tuple[int, str], 'NativeReaper'] = dict()
+    _instances_lock: threading.Lock = threading.Lock()
+    _previous_handlers: Dict[int, Any] = dict()
+    _exit_handlers_pid: Optional[int] = None
+
+    def __init__(self, docker_client: DockerClient, max_workers: int = 8) -> None:
+        self._docker_client: DockerClient = docker_client
+        self._max_workers: int = max_workers
+        self._registered_labels: Set[str] = set()
+        self._lock: threading.Lock = threading.Lock()
+
+    @classmethod
+    def instance(cls, docker_client: DockerClient) -> 'NativeReaper':
+        """The reaper shared by every stack of this process on the docker host of the client.
+
+        Args:
+            docker_client (DockerClient): Docker client
+
+        Returns:
+            NativeReaper: the shared reaper
+        """
+        key: Tuple[int, str] = (os.getpid(), BaseDockerClient.docker_host(docker_client))
+        with cls._instances_lock:
+            if key not in cls._instances:
+                cls._instances[key] = NativeReaper(docker_client)
+            return cls._instances[key]
+
+    @property
+    def registered_labels(self) -> Set[str]:
+        return set(self._registered_labels)
+
+    def register(self, labels: List[str]) -> None:
+        """Remove the resources of the labels when the process exits, unless they
+        were reaped before.
+
+        Args:
+            labels (List[str]): label filters, `key` or `key=value`
+        """
+        with self._lock:
+            self._registered_labels.update(labels)
+        NativeReaper._install_exit_handlers()
+
+    def unregister(self, labels: List[str]) -> None:
+        with self._lock:
+            self._registered_labels.difference_update(labels)
+
+    def reap(self, labels: List[str], concurrent: bool = True) -> ReaperReport:
+        """Remove the resources of the labels now.
+
+        Args:
+            labels (List[str]): label filters, `key` or `key=value`
+            concurrent (bool, optional): remove them on a worker pool. Defaults to True.
+
+        Returns:
+            ReaperReport: removed resources and step durations
+        """
+        self.unregister(labels)
+        return self.remove_resources(labels, concurrent)
+
+    def remove_resources(self, labels: List[str], concurrent: bool = True) -> ReaperReport:
+        """Remove the containers, then the networks and volumes, that match any of
+        the label filters.
+
+        Args:
+            labels (List[str]): label filters, `key` or `key=value`
+            concurrent (bool, optional): remove them on a worker pool. Defaults to True. The exit
+                handler removes them one by one, as no thread can be started once the interpreter shuts down.
+
+        Returns:
+            ReaperReport: removed resources and step durations
+        """  # noqa: E501
+        report: ReaperReport = ReaperReport()
+        if not labels:
+            return report
+        if not concurrent:
+            self._remove_resources(map, labels, report)
+            return report
+        with ThreadPoolExecutor(max_workers=self._max_workers, thread_name_prefix="testcompose-reaper") as executor:  # noqa: E501
+            self._remove_resources(executor.map, labels, report)
+        return report
+
+    def _remove_resources(self, map_function: Callable[..., Iterable[Any]], labels: List[str], report: ReaperReport) -> None:  # noqa: E501
+        start: float = monotonic()
+        containers = map_function(self._list_containers, labels)
+        networks = map_function(self._list_networks, labels)
+        volumes = map_function(self._list_volumes, labels)
+        found_containers: Dict[str, Any] = {x.id: x for found in containers for x in found}
+        found_networks: Dict[str, Any] = {x.id: x for found in networks for x in found}
+        found_volumes: Dict[str, Any] = {x.id: x for found in volumes for x in found}
+        report.step_durations_ms["list"] = round((monotonic() - start) * 1000, 3)
+
+        # networks and volumes can only be removed once no container uses them
+        self._remove_all(map_function, report, "containers", found_containers, lambda x: x.remove(v=True, force=True))  # noqa: E501
+        self._remove_all(map_function, report, "networks", found_networks, lambda x: x.remove())
+        self._remove_all(map_function, report, "volumes", found_volumes, lambda x: x.remove(force=True))
+        logger.info(
+            "Reaped %s containers, %s networks, %s volumes in %s ms; failures: %s",
+            len(report.containers),
+            len(report.networks),
+            len(report.volumes),
+            report.step_durations_ms,
+            report.failures,
+        )
+
+    def _list_containers(self, label: str) -> List[Any]:
+        return self._docker_client.containers.list(all=True, sparse=True, filters={"label": label})
+
+    def _list_networks(self, label: str) -> List[Any]:
+        return self._docker_client.networks.list(filters={"label": label})
+
+    def _list_volumes(self, label: str) -> List[Any]:
+        return self._docker_client.volumes.list(filters={"label": label})
+
+    @staticmethod
+    def _remove_all(
+        map_function: Callable[..., Iterable[Any]],
+        report: ReaperReport,
+        resource_type: str,
+        resources: Dict[str, Any],
+        remove: Callable[[Any], None],
+    ) -> None:
+        start: float = monotonic()
+
+        def _remove(resource: Any) -> Optional[str]:
+            try:
+                remove(resource)
+            except NotFound:
+                pass
+            except APIError as exc:
+                # a removal that is already in progress, e.g. of an auto removed container
+                if exc.status_code != 409:
+                    report.failures[f"{resource_type}/{resource.id}"] = str(exc)
+                return None
+            except Exception as exc:
+                report.failures[f"{resource_type}/{resource.id}"] = str(exc)
+                return None
+            return resource.name if resource_type != "containers" else resource.id
+
+        removed: List[Optional[str]] = list(map_function(_remove, resources.values()))
+        getattr(report, resource_type).extend([x for x in removed if x])
+        report.step_durations_ms[resource_type] = round((monotonic() - start) * 1000, 3)
+
+    @classmethod
+    def reap_registered(cls) -> None:
+        """Remove the resources of all labels still registered in this process. Runs
+        when the process exits, so the resources are removed one by one.
+        """
+        for key, reaper in list(cls._instances.items()):
+            if key[0] == os.getpid() and reaper.registered_labels:
+                try:
+                    reaper.reap(list(reaper.registered_labels), concurrent=False)
+                except Exception as exc:
+                    logger.error("Resources could not be reaped: %s", exc)
+
+    @classmethod
+    def _install_exit_handlers(cls) -> None:
+        with cls._instances_lock:
+            if cls._exit_handlers_pid == os.getpid():
+                return
+            cls._exit_handlers_pid = os.getpid()
+        atexit.register(cls.reap_registered)
+        if threading.current_thread() is not threading.main_thread():
+            logger.info("Signal handlers can only be installed from the main thread, relying on atexit")
+            return
+        for signal_name in cls.HANDLED_SIGNALS:
+            signal_number: Optional[int] = getattr(signal, signal_name, None)
+            if signal_number is not None:
+                cls._previous_handlers[signal_number] = signal.signal(signal_number, cls._handle_signal)
+
+    @classmethod
+    def _handle_signal(cls, signal_number: int, frame: Optional[FrameType]) -> None:
+        """Hand the signal on to the handler that was installed before. The handler
+        can interrupt the main thread while it holds a lock of a reaper, so it makes
+        no docker calls. Where the signal would kill the process, it exits the process
+        instead, which unwinds the main thread and lets the exit handler reap.
+        """
+        previous_handler: Any = cls._previous_handlers.get(signal_number, signal.SIG_DFL)
+        if callable(previous_handler):
+            previous_handler(signal_number, frame)
+        elif previous_handler == signal.SIG_DFL:
+            signal.signal(signal_number, signal.SIG_DFL)
+            raise SystemExit(128 + signal_number)
@@ -0,0 +1,140 @@
+import os
+import socket
+import threading
+from logging import Logger
+from typing import Dict, List, Optional, Set, Tuple
+
+from docker.client import DockerClient  # type: ignore
+
+from testcompose.client.base_docker_client import BaseDockerClient
+from testcompose.containers.generic_container import GenericContainer
+from testcompose.housekeeping.clean_up_container import Housekeeping
+from testcompose.log_setup import stream_logger
+
+logger: Logger = stream_logger(__name__)
+
+
+class RyukReaper:
+    """Connection to a Ryuk container that removes the resources of registered
+    label filters once the connection closes, i.e. when the process exits or
+    crashes. A single Ryuk container is started lazily per process and docker
+    host, and all filters are sent over one persistent connection.
+
+    Args:
+        docker_client (DockerClient): Docker client
+    """
+
+    ACK_TIMEOUT: float = 30.0
+    _instances: Dict[Tuple[int, str], 'RyukReaper'] = dict()
+    _instances_lock: threading.Lock = threading.Lock()
+
+    def __init__(self, docker_client: DockerClient) -> None:
+        self._docker_client: DockerClient = docker_client
+        self._container: Optional[GenericContainer] = None
+        self._connection: Optional[socket.socket] = None
+        self._address: Optional[Tuple[str, int]] = None
+        self._registered_labels: Set[str] = set()
+        self._lock: threading.Lock = threading.Lock()
+
+    @classmethod
+    def instance(cls, docker_client: DockerClient) -> 'RyukReaper':
+        """The reaper shared by every stack of this process on the docker host of the client.
+
+        Args:
+            docker_client (DockerClient): Docker client
+
+        Returns:
+            RyukReaper: the shared reaper
+        """
+        # a forked process gets a reaper of its own, it must not share the connection of its parent
+        key: Tuple[int, str] = (os.getpid(), BaseDockerClient.docker_host(docker_client))
+        with cls._instances_lock:
+            if key not in cls._instances:
+                cls._instances[key] = RyukReaper(docker_client)
+            return cls._instances[key]
+
+    @property
+    def registered_labels(self) -> Set[str]:
+        return set(self._registered_labels)
+
+    @property
+    def address(self) -> Optional[str]:
+        """`host:port` of the Ryuk container the filters are sent to, once connected"""
+        return f"{self._address[0]}:{self._address[1]}" if self._address else None
+
+    def attach(self, address: str) -> None:
+        """Send the filters to the Ryuk container of another process, e.g. of the
+        process that started a shared stack, instead of starting one. Ryuk removes
+        the resources once the connections of all processes are closed. Ignored when
+        the reaper is connected already.
+
+        Args:
+            address (str): `host:port` of the Ryuk container
+        """
+        with self._lock:
+            if not self._connection:
+                host, port = address.rsplit(":", 1)
+                self._address = (host, int(port))
+
+    def register(self, labels: List[str]) -> None:
+        """Register label filters in one batched exchange, and read back one ACK per filter.
+        Labels registered before are skipped.
+
+        Args:
+            labels (List[str]): label filters, `key` or `key=value`
+
+        Raises:
+            RuntimeError: when Ryuk does not acknowledge the filters
+        """
+        with self._lock:
+            new_labels: List[str] = [x for x in dict.fromkeys(labels) if x not in self._registered_labels]
+            if not new_labels:
+                return
+            try:
+                self._send_filters(new_labels)
+            except OSError as exc:
+                # Ryuk went away, e.g. it was removed by hand. A new one gets all filters again
+                logger.info("Reconnecting to Ryuk: %s", exc)
+                self.close()
+                new_labels = list(self._registered_labels) + new_labels
+                self._send_filters(new_labels)
+            self._registered_labels.update(new_labels)
+
+    def close(self) -> None:
+        """Close the connection. Ryuk then removes the resources of all registered filters."""
+        if self._connection:
+            try:
+                self._connection.close()
+            finally:
+                self._connection = None
+                self._container = None
+                self._address = None
+
+    def _send_filters(self, labels: List[str]) -> None:
+        connection: socket.socket = self._connect()
+        connection.sendall("".join([f"label={x}\n" for x in labels]).encode("utf-8"))
+        self._read_acks(connection, len(labels))
+        logger.info("Ryuk acknowledged filters: %s", labels)
+
+    def _connect(self) -> socket.socket:
+        if not self._connection:
+            if not self._address:
+                self._address = self._start_container()
+            self._connection = socket.create_connection(self._address, timeout=self.ACK_TIMEOUT)
+        return self._connection
+
+    def _start_container(self) -> Tuple[str, int]:
+        self._container = Housekeeping.start_ryuk_container(self._docker_client)
+        return self._container.get_container_host_ip(), int(str(self._container.get_exposed_port(port="8080")))  # noqa: E501
+
+    @staticmethod
+    def _read_acks(connection: socket.socket, count: int) -> None:
+        buffer: bytes = b""
+        while buffer.count(b"\n") < count:
+            data: bytes = connection.recv(4096)
+            if not data:
+                raise ConnectionError("Ryuk closed the connection before acknowledging all filters")
+            buffer += data
+        unexpected: List[bytes] = [x for x in buffer.splitlines() if x.strip() != b"ACK"]
+        if unexpected:
+            raise RuntimeError(f"Unexpected answer from Ryuk: {unexpected}")
@@ -0,0 +1,19 @@
+from typing import Dict, Optional
+
+from pydantic import BaseModel
+
+from .container_service import ContainerServices, RankedContainerServices
+
+
+class CachedConfig(BaseModel):
+    """
+    A validated config, cached for as long as none of the files it was read from changes.
+    Args:
+        inputs: fingerprint, i.e. modification time, size and content hash, of every file the config was read from
+        config_services: the validated services
+        ranked_services: the ranked services, once they were asked for
+    """  # noqa: E501
+
+    inputs: Dict[str, str]
+    config_services: ContainerServices
+    ranked_services: Optional[RankedContainerServices] = None
@@ -1,12 +1,34 @@
+from typing import Optional
+
 from pydantic import BaseModel, validator
 
 
 class ContainerHttpWaitParameter(BaseModel):
+    """
+    Http readiness check of a container. The endpoint is probed with a short
+    initial delay and exponential backoff until it answers with the expected
+    status code or `wait_timeout_ms` expires.
+    Args:
+        startup_delay_time_ms: expected startup time of the service. Without an explicit
+            `wait_timeout_ms` the deadline is three times this value.
+        wait_timeout_ms: overall deadline of the check
+        initial_delay_ms: delay after the first failed probe, doubled after every further one. The first probe is sent right away
+        max_interval_ms: largest delay between two probes
+        connect_timeout_ms, read_timeout_ms: timeouts of a single probe request
+        verify_tls: verify the certificate of https endpoints
+    """
+
     http_port: int
     response_status_code: int = 200
     startup_delay_time_ms: int = 20000
     end_point: str = '/'
     use_https: bool = False
+    wait_timeout_ms: Optional[int] = None
+    initial_delay_ms: int = 100
+    max_interval_ms: int = 2000
+    connect_timeout_ms: int = 1000
+    read_timeout_ms: int = 5000
+    verify_tls: bool = False
 
     @validator('http_port')
     def validate_http_port(cls, v) -> int:
@@ -31,3 +53,7 @@ class ContainerHttpWaitParameter(BaseModel):
         if not v or not isinstance(v, int):
             return 20000
         return v
+
+    @property
+    def deadline_ms(self) -> int:
+        return self.wait_timeout_ms or 3 * self.startup_delay_time_ms
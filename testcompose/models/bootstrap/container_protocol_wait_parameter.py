@@ -0,0 +1,47 @@
+from dataclasses import dataclass
+from typing import Dict
+
+from pydantic import BaseModel, validator
+
+
+@dataclass(frozen=True)
+class SupportedProtocols:
+    POSTGRES: str = "postgres"
+    REDIS: str = "redis"
+    KAFKA: str = "kafka"
+    MYSQL: str = "mysql"
+
+
+class ContainerProtocolWaitParameter(BaseModel):
+    """
+    Protocol level readiness check of a container. The server is considered
+    ready once it answers a protocol handshake the way a ready server does.
+    Args:
+        protocol: one of postgres|redis|kafka|mysql
+        port: exposed container port the server listens on
+        wait_timeout_ms: overall deadline of the check
+        initial_delay_ms: delay after the first failed probe, doubled after every further one. The first probe is sent right away
+        max_interval_ms: largest delay between two probes
+        socket_timeout_ms: timeout of a single probe
+        options: protocol specific options, i.e. `user` and `database` for postgres
+    """
+
+    protocol: str
+    port: int
+    wait_timeout_ms: int = 60000
+    initial_delay_ms: int = 100
+    max_interval_ms: int = 1000
+    socket_timeout_ms: int = 1000
+    options: Dict[str, str] = dict()
+
+    @validator('protocol')
+    def validate_protocol(cls, v: str) -> str:
+        supported = [
+            SupportedProtocols.POSTGRES,
+            SupportedProtocols.REDIS,
+            SupportedProtocols.KAFKA,
+            SupportedProtocols.MYSQL,
+        ]
+        if str(v).lower() not in supported:
+            raise AttributeError(f"Protocol must be one of {supported}")
+        return str(v).lower()
@@ -1,8 +1,14 @@
 from typing import Any, List, Optional, Dict
-from pydantic import BaseModel, validator
+from pydantic import BaseModel, PrivateAttr, validator
 from .container_log_wait_parameter import ContainerLogWaitParameter
 from .container_volume import ContainerVolumeMap
 from .container_http_wait_parameter import ContainerHttpWaitParameter
+from .container_tcp_wait_parameter import ContainerTcpWaitParameter
+from .container_protocol_wait_parameter import ContainerProtocolWaitParameter
+from .container_snapshot_parameter import ContainerSnapshotParameter
+from .placeholder_template import PlaceholderTemplate
+from .port_spec import PortSpec
+from ..container.supported_placeholders import SupportedPlaceholders
 
 
 class ContainerService(BaseModel):
@@ -16,7 +22,38 @@ class ContainerService(BaseModel):
     log_wait_parameters: Optional[ContainerLogWaitParameter] = None
     http_wait_parameters: Optional[ContainerHttpWaitParameter] = None
     https_wait_parameters: Optional[ContainerHttpWaitParameter] = None
+    tcp_wait_parameters: Optional[ContainerTcpWaitParameter] = None
+    protocol_wait_parameters: Optional[ContainerProtocolWaitParameter] = None
+    snapshot_parameters: Optional[ContainerSnapshotParameter] = None
     entrypoint: Optional[str] = None
+    stop_timeout: Optional[int] = None
+    stop_signal: Optional[str] = None
+    kill_on_stop: bool = False
+    _environment_templates: Dict[str, PlaceholderTemplate] = PrivateAttr(default_factory=dict)
+    _port_specs: List[PortSpec] = PrivateAttr(default_factory=list)
+
+    def __init__(self, **data: Any) -> None:
+        super().__init__(**data)
+        self._environment_templates = PlaceholderTemplate.compile_environment(self.environment)
+        self._port_specs = [PortSpec.parse(x) for x in self.exposed_ports]
+
+    @property
+    def environment_templates(self) -> Dict[str, PlaceholderTemplate]:
+        """Environment values with placeholders, compiled when the service is loaded
+
+        Returns:
+            Dict[str, PlaceholderTemplate]: compiled templates by environment variable
+        """
+        return self._environment_templates
+
+    @property
+    def port_specs(self) -> List[PortSpec]:
+        """Exposed ports, parsed when the service is loaded
+
+        Returns:
+            List[PortSpec]: exposed ports and port ranges
+        """
+        return self._port_specs
 
     @validator('name')
     def validate_service_name(cls, v):
@@ -24,6 +61,12 @@ class ContainerService(BaseModel):
             raise AttributeError("Container Service name is required")
         return v
 
+    @validator('stop_timeout')
+    def validate_stop_timeout(cls, v):
+        if v is not None and v < 0:
+            raise AttributeError("The stop timeout can not be negative")
+        return v
+
     @validator('image')
     def validate_image(cls, v):
         if not v:
@@ -40,6 +83,33 @@ class ContainerServices(BaseModel):
 
     services: Dict[str, ContainerService]
 
+    @validator('services')
+    def validate_placeholder_references(cls, v: Dict[str, ContainerService]) -> Dict[str, ContainerService]:
+        for service in v.values():
+            for variable, template in service.environment_templates.items():
+                for reference in template.references:
+                    referenced: Optional[ContainerService] = v.get(reference.service.lower())
+                    if reference.is_self:
+                        port: str = reference.variable[len(SupportedPlaceholders.EXTERNAL_PORT) + 1 :]  # noqa: E203
+                        is_external_port: bool = reference.variable.lower().startswith(
+                            SupportedPlaceholders.EXTERNAL_PORT
+                        )
+                        if is_external_port and not any(
+                            [x.accepts_external_port(port) for x in service.port_specs]
+                        ):
+                            raise ValueError(
+                                f"{service.name}.{variable}: ${{self.{reference.variable}}} must be a valid supplied exposed_ports value"  # noqa: E501
+                            )
+                    elif referenced is None:
+                        raise ValueError(
+                            f"{service.name}.{variable}: ${{{reference.service}.{reference.variable}}} references an unknown service"  # noqa: E501
+                        )
+                    elif reference.needs_running_service and reference.variable.upper() not in referenced.environment:  # noqa: E501
+                        raise ValueError(
+                            f"{service.name}.{variable}: ${{{reference.service}.{reference.variable}}} references an unknown variable of {referenced.name}"  # noqa: E501
+                        )
+        return v
+
 
 class RankedContainerServices(BaseModel):
     """
@@ -47,6 +117,12 @@ class RankedContainerServices(BaseModel):
     be started.
     Args:
         ranked_services: Dict[rank, name]
+        levels: service names grouped into levels that can be started together, in start order
+        dependencies: services a service depends on, declared or inferred from its placeholders
+        inferred_dependencies: dependencies inferred from placeholders and missing from `depends_on`
     """
 
     ranked_services: Dict[int, str] = dict()
+    levels: List[List[str]] = list()
+    dependencies: Dict[str, List[str]] = dict()
+    inferred_dependencies: Dict[str, List[str]] = dict()
@@ -0,0 +1,17 @@
+from typing import List, Optional, Union
+
+from pydantic import BaseModel
+
+
+class ContainerSnapshotParameter(BaseModel):
+    """
+    Seeding of a service whose initialized state can be snapshotted into an image.
+    Args:
+        init_command: command run in the container once it is ready, e.g. migrations or a seed script
+        seed_files: files or directories the seeded state is derived from
+        seed_key: any other input of the seeded state, e.g. a schema version
+    """  # noqa: E501
+
+    init_command: Optional[Union[str, List[str]]] = None
+    seed_files: List[str] = list()
+    seed_key: str = ''
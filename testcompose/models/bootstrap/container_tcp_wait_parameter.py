@@ -0,0 +1,29 @@
+from typing import List
+
+from pydantic import BaseModel, validator
+
+
+class ContainerTcpWaitParameter(BaseModel):
+    """
+    Tcp readiness check of a container. Every listed container port must
+    accept a connection that stays open for `settle_time_ms`; a connection
+    closed right away by the docker port proxy does not count as ready.
+    Args:
+        ports: exposed container ports to probe
+        wait_timeout_ms: overall deadline of the check
+        poll_interval_ms: delay before a refused connection is retried
+        connect_timeout_ms: time a single connection attempt may take
+        settle_time_ms: time an accepted connection has to stay open
+    """
+
+    ports: List[int]
+    wait_timeout_ms: int = 60000
+    poll_interval_ms: int = 50
+    connect_timeout_ms: int = 1000
+    settle_time_ms: int = 50
+
+    @validator('ports')
+    def validate_ports(cls, v) -> List[int]:
+        if not v:
+            raise AttributeError("At least one exposed port must be provided for the tcp check")
+        return v
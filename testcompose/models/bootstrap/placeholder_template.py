@@ -0,0 +1,108 @@
+import re
+from typing import Any, Dict, List, Pattern, Union
+
+from pydantic import BaseModel
+
+from testcompose.models.container.supported_placeholders import SupportedPlaceholders
+
+PLACEHOLDER_PATTERN: Pattern[str] = re.compile(r"\$\{([^}]*)}")
+
+
+class PlaceholderReference(BaseModel):
+    """
+    A `${service.variable}` placeholder in the environment of a service.
+    Args:
+        service: name of the referenced service, or `self`
+        variable: environment variable of the referenced service, or a supported placeholder variable
+    """
+
+    service: str
+    variable: str
+
+    @property
+    def is_self(self) -> bool:
+        return self.service.lower() == SupportedPlaceholders.SELF_HOST
+
+    @property
+    def needs_running_service(self) -> bool:
+        """Whether the placeholder resolves to an environment variable of another
+        service, which is only known once that service was started
+
+        Returns:
+            bool: True for references to environment variables of other services
+        """
+        return not self.is_self and self.variable.lower() not in [
+            SupportedPlaceholders.CONTAINER_HOSTNAME,
+            SupportedPlaceholders.EXTERNAL_PORT,
+            SupportedPlaceholders.CONTAINER_HOST_ADDRESS,
+        ]
+
+
+class PlaceholderTemplate(BaseModel):
+    """
+    An environment value compiled into literal text and placeholder references.
+    Args:
+        segments: literal text and placeholder references, in the order they appear in the value
+        services: services whose environment variables the value references
+    """
+
+    segments: List[Union[PlaceholderReference, str]] = list()
+    services: List[str] = list()
+
+    @property
+    def references(self) -> List[PlaceholderReference]:
+        return [x for x in self.segments if isinstance(x, PlaceholderReference)]
+
+    @classmethod
+    def compile(cls, value: str) -> 'PlaceholderTemplate':
+        """Split a value at its `${service.variable}` placeholders
+
+        Args:
+            value (str): environment value
+
+        Raises:
+            ValueError: when a placeholder is not of the form `${service_name.variable_name}`
+
+        Returns:
+            PlaceholderTemplate: the compiled value
+        """
+        segments: List[Union[PlaceholderReference, str]] = list()
+        services: List[str] = list()
+        position: int = 0
+        for match in PLACEHOLDER_PATTERN.finditer(value):
+            parts: List[str] = match.group(1).split(".")
+            if len(parts) != 2:
+                raise ValueError(
+                    f"Placeholder {match.group(0)} must be of the form ${{service_name.variable_name}}"
+                )
+            if match.start() > position:
+                segments.append(value[position : match.start()])  # noqa: E203
+            reference: PlaceholderReference = PlaceholderReference(service=parts[0], variable=parts[1])
+            segments.append(reference)
+            if reference.needs_running_service and reference.service not in services:
+                services.append(reference.service)
+            position = match.end()
+        if position < len(value):
+            segments.append(value[position:])
+        return cls(segments=segments, services=services)
+
+    @classmethod
+    def compile_environment(cls, environment: Dict[str, Any]) -> Dict[str, 'PlaceholderTemplate']:
+        """Compile the environment values that contain placeholders
+
+        Args:
+            environment (Dict[str, Any]): environment of a service
+
+        Raises:
+            ValueError: when a placeholder is not of the form `${service_name.variable_name}`
+
+        Returns:
+            Dict[str, PlaceholderTemplate]: compiled templates of the values with placeholders
+        """
+        templates: Dict[str, PlaceholderTemplate] = dict()
+        for key, value in environment.items():
+            if isinstance(value, str) and "${" in value:
+                template: PlaceholderTemplate = cls.compile(value)
+                if template.references:
+                    templates[key] = template
+        return templates
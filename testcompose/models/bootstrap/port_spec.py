@@ -0,0 +1,109 @@
+import re
+from typing import Dict, Optional, Pattern, Tuple
+
+from pydantic import BaseModel
+
+_PORT_SPEC: Pattern[str] = re.compile(r"^(?:(\d+)(?:-(\d+))?:)?(\d+)(?:-(\d+))?$")
+_WHITESPACE: Pattern[str] = re.compile(r"\s")
+
+
+class PortSpec(BaseModel):
+    """
+    An exposed port, or a range of exposed ports, of a service as parsed from the
+    config. A range is kept as its first port and its length.
+    Args:
+        container_port: container port, the first port of a range
+        count: number of ports
+        host_port: host port bound to the container port, the first port of a host range. Docker picks a random host port when not set.
+    """  # noqa: E501
+
+    container_port: int
+    count: int = 1
+    host_port: Optional[int] = None
+
+    @classmethod
+    def parse(cls, value: str) -> 'PortSpec':
+        """Parse an exposed port of the config: `port`, `host_port:port`, a range
+        `start-end` or a range bound to a host range `host_start-host_end:start-end`
+
+        Args:
+            value (str): exposed port
+
+        Raises:
+            ValueError: when the value is not a valid port or port range
+
+        Returns:
+            PortSpec: the parsed port
+        """
+        match = _PORT_SPEC.match(_WHITESPACE.sub("", str(value)))
+        if not match:
+            raise ValueError(
+                f"Invalid exposed port {value}. Allowed formats are port, host:container or port1-port2"
+            )
+        host_range: Optional[Tuple[int, int]] = (
+            cls._port_range(value, match.group(1), match.group(2)) if match.group(1) else None
+        )
+        container_start, container_end = cls._port_range(value, match.group(3), match.group(4))
+        count: int = container_end - container_start + 1
+        if host_range and host_range[1] - host_range[0] + 1 != count:
+            raise ValueError(f"Host and container port ranges of {value} must be of the same length")
+        return cls(
+            container_port=container_start, count=count, host_port=host_range[0] if host_range else None
+        )
+
+    @staticmethod
+    def _port_range(value: str, start: str, end: Optional[str]) -> Tuple[int, int]:
+        first_port: int = int(start)
+        last_port: int = int(end) if end else first_port
+        if end and last_port <= first_port:
+            raise ValueError(
+                f"Start exposed port {first_port} must be less than end exposed port {last_port} for port ranges!"  # noqa: E501
+            )
+        return first_port, last_port
+
+    def accepts_external_port(self, port: str) -> bool:
+        """Whether an external port placeholder may bind the container port to a
+        host port, i.e. the port is one of the spec and the spec has no host port.
+        A placeholder for a port of a range binds the whole range.
+
+        Args:
+            port (str): container port of the placeholder
+
+        Returns:
+            bool: True if the placeholder may bind the port
+        """
+        return self.host_port is None and self.contains(port)
+
+    def contains(self, port: str) -> bool:
+        """Whether a container port is one of the ports of the spec
+
+        Args:
+            port (str): container port
+
+        Returns:
+            bool: True if the port is part of the spec
+        """
+        return port.isdigit() and self.container_port <= int(port) < self.container_port + self.count
+
+    def bindings(self) -> Dict[int, Optional[int]]:
+        """Container port to host port of every port of the spec, the form docker
+        expects. A range is expanded here, as the docker API binds single ports.
+
+        Returns:
+            Dict[int, Optional[int]]: container port to host port, None for a random host port
+        """
+        if self.host_port is None:
+            return dict.fromkeys(range(self.container_port, self.container_port + self.count))
+        offset: int = self.host_port - self.container_port
+        return {x: x + offset for x in range(self.container_port, self.container_port + self.count)}
+
+    def __str__(self) -> str:
+        container: str = str(self.container_port)
+        if self.count > 1:
+            container += f"-{self.container_port + self.count - 1}"
+        if self.host_port is None:
+            return container
+        host: str = str(self.host_port)
+        if self.count > 1:
+            host += f"-{self.host_port + self.count - 1}"
+        return f"{host}:{container}"
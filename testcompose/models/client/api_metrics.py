@@ -0,0 +1,47 @@
+from typing import Optional
+
+from pydantic import BaseModel
+
+
+class ApiCall(BaseModel):
+    """
+    One HTTP request to the docker daemon.
+    Args:
+        method: HTTP method
+        endpoint: request path without the API version, with ids and names replaced by placeholders
+        status: HTTP status code of the response
+        latency_ms: time until the response was received. Streamed responses only count until the headers
+        bytes_sent: size of the request body
+        bytes_received: size of the response body, None for streamed responses without a content length
+        service: service of the traced phase the request was made in
+        phase: traced phase the request was made in
+    """
+
+    method: str
+    endpoint: str
+    status: int
+    latency_ms: float
+    bytes_sent: int = 0
+    bytes_received: Optional[int] = None
+    service: Optional[str] = None
+    phase: Optional[str] = None
+
+
+class ApiCallStats(BaseModel):
+    """
+    Aggregate of the requests of one endpoint, service and phase.
+    Args:
+        count: number of requests
+        errors: number of requests answered with a status of 400 or above
+        total_latency_ms: summed latency
+        max_latency_ms: largest latency
+        bytes_sent: summed size of the request bodies
+        bytes_received: summed size of the known response bodies
+    """
+
+    count: int = 0
+    errors: int = 0
+    total_latency_ms: float = 0
+    max_latency_ms: float = 0
+    bytes_sent: int = 0
+    bytes_received: int = 0
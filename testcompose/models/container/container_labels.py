@@ -0,0 +1,9 @@
+from dataclasses import dataclass
+
+
+@dataclass(frozen=True)
+class ContainerLabels:
+    STACK: str = 'testcompose.stack'
+    SNAPSHOT: str = 'testcompose.snapshot'
+    NETWORK_POOL: str = 'testcompose.network_pool'
+    SERVICE: str = 'testcompose.service'
@@ -0,0 +1,27 @@
+from typing import Dict, Optional
+
+from pydantic import BaseModel
+
+
+class SnapshotParameters(BaseModel):
+    """
+    Snapshots of seeded services, committed into locally tagged images.
+    Args:
+        enabled: start seeded services from a snapshot, and snapshot them when none exists
+        max_snapshots: number of snapshots kept
+        max_size_mb: total size of the kept snapshots
+        max_age_seconds: age after which a snapshot is removed
+        state_directory: directory of the snapshot index. Defaults to `$XDG_CACHE_HOME/testcompose`
+    """
+
+    enabled: bool = False
+    max_snapshots: int = 20
+    max_size_mb: int = 10240
+    max_age_seconds: int = 7 * 24 * 3600
+    state_directory: Optional[str] = None
+
+
+class SnapshotIndex(BaseModel):
+    """Time each snapshot image was last used, by image tag"""
+
+    last_used: Dict[str, float] = dict()
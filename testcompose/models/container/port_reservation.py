@@ -0,0 +1,29 @@
+from typing import List
+
+from pydantic import BaseModel
+
+
+class PortReservation(BaseModel):
+    """
+    A block of contiguous host ports reserved by a process on the host.
+    Args:
+        first_port: first port of the block
+        count: number of ports in the block
+        pid: id of the process holding the reservation
+        reserved_at: epoch seconds of the reservation
+    """
+
+    first_port: int
+    count: int = 1
+    pid: int
+    reserved_at: float
+
+    @property
+    def ports(self) -> List[int]:
+        return list(range(self.first_port, self.first_port + self.count))
+
+
+class PortRegistry(BaseModel):
+    """Host ports reserved by the processes of the host, shared through a state file."""
+
+    reservations: List[PortReservation] = list()
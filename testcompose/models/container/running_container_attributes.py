@@ -7,6 +7,7 @@ from dataclasses import dataclass
 class PossibleContainerStates:
     RUNNING: str = 'running'
     EXITED: str = 'exited'
+    DEAD: str = 'dead'
 
 
 class ContainerState(BaseModel):
@@ -0,0 +1,39 @@
+from typing import Any, Dict, List, Optional
+
+from pydantic import BaseModel
+
+
+class SharedService(BaseModel):
+    """Connection details of a service of a stack shared between test processes."""
+
+    service_name: str
+    container_id: str
+    host: str
+    environment: Dict[str, Any] = dict()
+    ports: Dict[str, str] = dict()
+
+    def get_exposed_port(self, port: str) -> Optional[str]:
+        """Host port bound to a container exposed port
+
+        Args:
+            port (str): container exposed port
+
+        Returns:
+            Optional[str]: host port
+        """
+        return self.ports.get(str(port))
+
+
+class SharedStack(BaseModel):
+    """A running stack, published to a state file so that test processes other
+    than the one that started it can attach to it. Attached processes connect to
+    the Ryuk container at `reaper_address`, when the stack was registered with one.
+    """
+
+    stack_id: str
+    services: Dict[str, SharedService] = dict()
+    labels: List[str] = list()
+    workers: List[str] = list()
+    finished_workers: List[str] = list()
+    error: Optional[str] = None
+    reaper_address: Optional[str] = None
@@ -0,0 +1,36 @@
+from typing import Any, Dict, Optional
+
+from pydantic import BaseModel
+
+
+class ReuseParameters(BaseModel):
+    """
+    Opt-in reuse of running stacks across test sessions.
+    Args:
+        enabled: keep the stack running on exit and reattach to it on the next run
+        ttl_seconds: age after which a kept stack is recreated
+        force_recreate: recreate the stack even if a matching one is running
+        state_directory: directory of the stack state files. Defaults to `$XDG_CACHE_HOME/testcompose`
+    """
+
+    enabled: bool = False
+    ttl_seconds: int = 3600
+    force_recreate: bool = False
+    state_directory: Optional[str] = None
+
+
+class ServiceState(BaseModel):
+    service_name: str
+    config_hash: str
+    container_id: str
+    container_label: str
+    environment: Dict[str, Any] = dict()
+    ports: Dict[str, str] = dict()
+
+
+class StackState(BaseModel):
+    stack_hash: str
+    stack_id: str
+    network_name: str
+    created_at: float
+    services: Dict[str, ServiceState] = dict()
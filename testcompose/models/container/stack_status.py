@@ -0,0 +1,23 @@
+from typing import Dict, Optional
+
+from pydantic import BaseModel
+
+
+class ContainerStatus(BaseModel):
+    """
+    State of one container of a stack, as listed by the docker daemon.
+    Args:
+        container_id: container id
+        name: container name
+        service_name: service the container was started for
+        state: container state, e.g. created, running or exited
+        health: health status of a container with a docker healthcheck, i.e. starting, healthy or unhealthy
+        ports: exposed container port to bound host port
+    """
+
+    container_id: str
+    name: str
+    service_name: Optional[str] = None
+    state: str
+    health: Optional[str] = None
+    ports: Dict[str, str] = dict()
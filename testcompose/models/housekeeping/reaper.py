@@ -0,0 +1,28 @@
+from dataclasses import dataclass
+from typing import Dict, List
+
+from pydantic import BaseModel
+
+
+@dataclass(frozen=True)
+class CleanupBackends:
+    RYUK: str = 'ryuk'
+    NATIVE: str = 'native'
+
+
+class ReaperReport(BaseModel):
+    """
+    Resources removed by a teardown.
+    Args:
+        containers: ids of the removed containers
+        networks: names of the removed networks
+        volumes: names of the removed volumes
+        failures: resources that could not be removed, with the reason
+        step_durations_ms: duration of each teardown step
+    """
+
+    containers: List[str] = list()
+    networks: List[str] = list()
+    volumes: List[str] = list()
+    failures: Dict[str, str] = dict()
+    step_durations_ms: Dict[str, float] = dict()
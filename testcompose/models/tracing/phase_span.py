@@ -0,0 +1,27 @@
+from typing import Optional
+
+from pydantic import BaseModel
+
+
+class PhaseSpan(BaseModel):
+    """
+    One recorded phase of a stack, e.g. the image pull or the log wait of a service.
+    Args:
+        name: phase name
+        service: service the phase belongs to, None for phases of the whole stack
+        detail: what the phase works on when it is not a service, e.g. the pulled image
+        start_ms: start of the phase in milliseconds after the tracer was created
+        duration_ms: duration of the phase in milliseconds
+        error: type of the exception that ended the phase
+    """
+
+    name: str
+    service: Optional[str] = None
+    detail: Optional[str] = None
+    start_ms: float
+    duration_ms: float
+    error: Optional[str] = None
+
+    @property
+    def lane(self) -> str:
+        return self.service or self.detail or "stack"
@@ -0,0 +1,222 @@
+"""pytest plugin, registered through the `pytest11` entry point.
+
+Starts the stack of a config file once per test session and shares it between
+all `pytest-xdist` workers of the session. Enable it by passing a config file:
+
+    pytest --testcompose-config=tests/testcompose.yaml -n 4
+
+and request the `testcompose_stack` fixture in tests.
+"""
+import hashlib
+import os
+import tempfile
+from typing import Any, Callable, Dict, Generator, List, Optional
+from uuid import uuid4
+
+import pytest
+
+from testcompose.client.base_docker_client import BaseDockerClient
+from testcompose.configs.parse_config import TestConfigParser
+from testcompose.containers.generic_container import GenericContainer
+from testcompose.containers.shared_stack import SharedStackCoordinator
+from testcompose.housekeeping.clean_up_container import Housekeeping
+from testcompose.housekeeping.ryuk_reaper import RyukReaper
+from testcompose.models.bootstrap.container_service import ContainerServices
+from testcompose.models.client.client_login import ClientFromEnv, ClientFromUrl
+from testcompose.models.container.shared_stack import SharedService, SharedStack
+from testcompose.models.housekeeping.reaper import CleanupBackends
+from testcompose.run_containers import RunContainers
+from testcompose.tracing.phase_tracer import PhaseTracer
+
+# falls back to a run id of its own when the session is not distributed
+_SESSION_RUN_ID: str = uuid4().hex
+
+
+def pytest_addoption(parser: Any) -> None:
+    group = parser.getgroup("testcompose")
+    group.addoption(
+        "--testcompose-config",
+        action="store",
+        dest="testcompose_config",
+        default=None,
+        help="testcompose config file of the stack shared by the tests of the session",
+    )
+    group.addoption(
+        "--testcompose-parallel-startup",
+        action="store_true",
+        dest="testcompose_parallel_startup",
+        default=False,
+        help="start services of the same dependency level concurrently",
+    )
+    group.addoption(
+        "--testcompose-cleanup-backend",
+        action="store",
+        dest="testcompose_cleanup_backend",
+        default=CleanupBackends.RYUK,
+        choices=[CleanupBackends.RYUK, CleanupBackends.NATIVE],
+        help="how the shared stack is removed at the end of the run",
+    )
+    group.addoption(
+        "--testcompose-trace",
+        action="store",
+        dest="testcompose_trace",
+        default=None,
+        help="write the startup phases of the shared stack as Chrome trace to this file",
+    )
+    parser.addini("testcompose_config", help="testcompose config file of the shared stack", default=None)
+
+
+def _worker_id() -> str:
+    return f"{os.environ.get('PYTEST_XDIST_WORKER', 'main')}-{os.getpid()}"
+
+
+def _worker_count() -> Optional[int]:
+    """Number of `pytest-xdist` workers of the run, None when the run is not distributed"""
+    worker_count: str = os.environ.get("PYTEST_XDIST_WORKER_COUNT", "")
+    return int(worker_count) if worker_count.isdigit() else None
+
+
+def _config_file(config: Any) -> Optional[str]:
+    config_file: Optional[str] = config.getoption("testcompose_config") or config.getini("testcompose_config")  # noqa: E501
+    return os.path.join(str(config.rootpath), str(config_file)) if config_file else None
+
+
+def _coordinator(
+    config: Any, config_file: str, start_stack: Callable[[], SharedStack], docker_client: Callable[[], Any]
+) -> SharedStackCoordinator:
+    def _teardown_stack(labels: List[str]) -> None:
+        Housekeeping.perform_housekeeping(
+            docker_client=docker_client(),
+            labels=labels,
+            cleanup_backend=config.getoption("testcompose_cleanup_backend"),
+        )
+
+    return SharedStackCoordinator(
+        _state_directory(config_file), _worker_id(), start_stack, _teardown_stack, _worker_count()
+    )
+
+
+def _env_docker_client() -> Any:
+    return BaseDockerClient(ClientFromEnv(), ClientFromUrl()).docker_client
+
+
+def _stack_not_started() -> SharedStack:
+    raise RuntimeError("The shared stack is only started by the testcompose_stack fixture")
+
+
+def _state_directory(config_file: str) -> str:
+    """Directory shared by all workers of one test run. `pytest-xdist` hands the
+    same run id to every worker of a run, the config file tells stacks apart.
+    """
+    run_id: str = os.environ.get("PYTEST_XDIST_TESTRUNUID", _SESSION_RUN_ID)
+    config_id: str = hashlib.sha256(os.path.abspath(config_file).encode()).hexdigest()[:16]
+    return os.path.join(tempfile.gettempdir(), "testcompose", f"{run_id}-{config_id}")
+
+
+def _config_cache_directory(config_file: str) -> str:
+    return os.environ.get("TESTCOMPOSE_CONFIG_CACHE_DIR") or os.path.join(
+        _state_directory(config_file), "config"
+    )
+
+
+def _shared_stack(runner: RunContainers) -> SharedStack:
+    services: Dict[str, SharedService] = dict()
+    for service_name, running_container in runner.running_containers.running_containers.items():
+        generic_container: GenericContainer = running_container.generic_container
+        container_id: Optional[str] = generic_container.get_container_id()
+        if not container_id:
+            raise RuntimeError(f"Service {service_name} of the shared stack has no container")
+        services[service_name] = SharedService(
+            service_name=service_name,
+            container_id=container_id,
+            host=generic_container.get_container_host_ip(),
+            environment=running_container.config_environment_variables,
+            ports=generic_container.mapped_ports,
+        )
+    reaper: RyukReaper = RyukReaper.instance(runner.docker_client)
+    return SharedStack(
+        stack_id=runner.unique_container_label,
+        services=services,
+        labels=runner.running_container_labels,
+        reaper_address=reaper.address if reaper.registered_labels else None,
+    )
+
+
+@pytest.fixture(scope="session")
+def testcompose_config_file(pytestconfig: Any) -> str:
+    """Config file of the shared stack, from `--testcompose-config` or the
+    `testcompose_config` ini option."""
+    config_file: Optional[str] = _config_file(pytestconfig)
+    if not config_file:
+        pytest.skip("no testcompose config file given, use --testcompose-config")
+    return config_file
+
+
+@pytest.fixture(scope="session")
+def testcompose_services(testcompose_config_file: str) -> ContainerServices:
+    """Services of the config file. The validated config is cached in the state
+    directory of the run, so only the first worker parses it."""
+    return TestConfigParser.parse_config(
+        file_name=testcompose_config_file, cache_directory=_config_cache_directory(testcompose_config_file)
+    )
+
+
+@pytest.fixture(scope="session")
+def testcompose_stack(
+    pytestconfig: Any, testcompose_config_file: str, testcompose_services: ContainerServices
+) -> Generator[SharedStack, None, None]:
+    """The stack of the config file, started once per test run and shared by
+    all workers. The last worker to finish tears it down."""
+    runners: List[RunContainers] = list()
+
+    def _start_stack() -> SharedStack:
+        trace_file: Optional[str] = pytestconfig.getoption("testcompose_trace")
+        runner: RunContainers = RunContainers(
+            config_services=testcompose_services,
+            ranked_services=TestConfigParser.parse_ranked_config(
+                file_name=testcompose_config_file,
+                cache_directory=_config_cache_directory(testcompose_config_file),
+            )[1],
+            parallel_startup=pytestconfig.getoption("testcompose_parallel_startup"),
+            cleanup_backend=pytestconfig.getoption("testcompose_cleanup_backend"),
+            tracer=PhaseTracer(enabled=bool(trace_file)),
+        )
+        runners.append(runner)
+        try:
+            runner.run_containers()
+        finally:
+            if trace_file:
+                runner.tracer.export_chrome_trace(trace_file)
+        # the stack outlives this worker when other workers are still attached
+        runner.detach()
+        return _shared_stack(runner)
+
+    def _docker_client() -> Any:
+        return runners[0].docker_client if runners else _env_docker_client()
+
+    coordinator: SharedStackCoordinator = _coordinator(
+        pytestconfig, testcompose_config_file, _start_stack, _docker_client
+    )
+    stack: SharedStack = coordinator.attach()
+    if stack.reaper_address:
+        # every worker keeps a connection to the Ryuk container of the stack, which removes the stack
+        # once all of them are gone, also when they were killed
+        reaper: RyukReaper = RyukReaper.instance(_docker_client())
+        reaper.attach(stack.reaper_address)
+        reaper.register(stack.labels)
+    try:
+        yield stack
+    finally:
+        # distributed workers detach when their session finishes, see `pytest_sessionfinish`
+        if _worker_count() is None:
+            coordinator.detach()
+
+
+def pytest_sessionfinish(session: Any) -> None:
+    """Every `pytest-xdist` worker detaches from the shared stack once its session
+    finishes, also workers that never requested it. The stack is torn down by the
+    last worker of the run, not by a worker that finishes before another attached.
+    """
+    config_file: Optional[str] = _config_file(session.config)
+    if config_file and _worker_count() is not None:
+        _coordinator(session.config, config_file, _stack_not_started, _env_docker_client).detach()
@@ -1,12 +1,22 @@
+import threading
+import time
+from concurrent.futures import FIRST_EXCEPTION, Future, ThreadPoolExecutor, wait
 from logging import Logger
-from typing import Dict, List
+from typing import Dict, List, Optional
 from uuid import uuid4
 
-from docker.errors import APIError  # type: ignore
+from docker.errors import APIError, NotFound  # type: ignore
+from docker.models.containers import Container  # type: ignore
 
+from testcompose.client.api_metrics import DockerApiMetrics
 from testcompose.client.base_docker_client import BaseDockerClient
+from testcompose.client.caching_docker_client import CachingDockerClient
+from testcompose.containers.container_events import ContainerEventTracker
 from testcompose.containers.container_network import ContainerNetwork
+from testcompose.containers.container_network_pool import ContainerNetworkPool
 from testcompose.containers.generic_container import GenericContainer
+from testcompose.containers.image_snapshot import ImageSnapshots
+from testcompose.containers.stack_reuse import StackReuse
 from testcompose.housekeeping.clean_up_container import Housekeeping
 from testcompose.log_setup import stream_logger
 from testcompose.models.bootstrap.container_service import (  # noqa: E501
@@ -16,12 +26,46 @@ from testcompose.models.bootstrap.container_service import (  # noqa: E501
 )
 from testcompose.models.client.client_login import ClientFromEnv, ClientFromUrl
 from testcompose.models.client.registry_parameters import Login
+from testcompose.models.container.container_labels import ContainerLabels
+from testcompose.models.container.image_snapshot import SnapshotParameters
 from testcompose.models.container.running_container import RunningContainer, RunningContainers  # noqa: E501
+from testcompose.models.container.running_container_attributes import PossibleContainerStates
+from testcompose.models.container.stack_reuse import ReuseParameters, ServiceState, StackState
+from testcompose.models.container.stack_status import ContainerStatus
+from testcompose.models.housekeeping.reaper import CleanupBackends, ReaperReport
+from testcompose.tracing.phase_tracer import PhaseTracer
 
 logger: Logger = stream_logger(__name__)
 
 
 class RunContainers(BaseDockerClient):
+    """Start the services of a config and tear them down again.
+
+    Args:
+        config_services (ContainerServices): services parsed from the config
+        ranked_services (RankedContainerServices): start order computed by `Config`
+        registry_login_param (Login): optional registry credentials
+        env_param (ClientFromEnv): docker client parameters taken from the environment
+        url_param (ClientFromUrl): docker client parameters for an explicit docker host
+        parallel_startup (bool): start services of the same dependency level concurrently.
+            Defaults to False, i.e. one service at a time in rank order.
+        max_workers (int): maximum number of services started at the same time when
+            `parallel_startup` is enabled, and of images pulled at the same time. Defaults to 4.
+        reuse_param (ReuseParameters): keep the stack running on exit and reattach to it
+            when a later run starts the same services. Disabled by default.
+        snapshot_param (SnapshotParameters): start services with `snapshot_parameters` from a
+            snapshot of their seeded state, and snapshot them when none exists. Disabled by default.
+        cleanup_backend (str): one of `CleanupBackends`. `native` removes the stack from this process,
+            also when it exits or is interrupted, without a Ryuk container. Defaults to `ryuk`, which
+            also cleans up after a process killed with SIGKILL.
+        network_pool (ContainerNetworkPool): pool of pre-created networks. The stack leases its
+            network from the pool and returns it at teardown, instead of creating and removing one.
+        tracer (PhaseTracer): records the phases of the startup and teardown of every service,
+            see `PhaseTracer.chrome_trace` and `PhaseTracer.summary`. Disabled by default.
+        api_metrics (DockerApiMetrics): records every request of the docker client of the stack,
+            by service and phase, and logs a report at teardown. Disabled by default.
+    """
+
     def __init_subclass__(cls, **kwargs) -> None:
         if cls is not RunContainers:
             raise TypeError("The class RunContainers can not be extended")
@@ -34,13 +78,49 @@ class RunContainers(BaseDockerClient):
         registry_login_param=Login(),
         env_param: ClientFromEnv = ClientFromEnv(),
         url_param: ClientFromUrl = ClientFromUrl(),
+        parallel_startup: bool = False,
+        max_workers: int = 4,
+        reuse_param: ReuseParameters = ReuseParameters(),
+        snapshot_param: SnapshotParameters = SnapshotParameters(),
+        cleanup_backend: str = CleanupBackends.RYUK,
+        network_pool: Optional[ContainerNetworkPool] = None,
+        tracer: Optional[PhaseTracer] = None,
+        api_metrics: Optional[DockerApiMetrics] = None,
     ) -> None:
-        super(RunContainers, self).__init__(client_env_param=env_param, client_url_param=url_param)  # noqa: E501
+        super(RunContainers, self).__init__(
+            client_env_param=env_param, client_url_param=url_param, api_metrics=api_metrics
+        )
+        if max_workers < 1:
+            raise ValueError("max_workers must be at least 1")
+        if cleanup_backend not in [CleanupBackends.RYUK, CleanupBackends.NATIVE]:
+            raise ValueError(f"Unknown cleanup backend {cleanup_backend}")
         self._config_services: ContainerServices = config_services
         self._ranked_config_services: RankedContainerServices = ranked_services
+        self._parallel_startup: bool = parallel_startup
+        self._max_workers: int = max_workers
         self.running_containers = RunningContainers()
         self.registry_login(login_credentials=registry_login_param)
         self._running_container_labels: List[str] = list()
+        self._event_tracker: Optional[ContainerEventTracker] = None
+        self._reuse_param: ReuseParameters = reuse_param
+        self._stack_reuse: StackReuse = StackReuse(reuse_param)
+        self._service_hashes: Dict[str, str] = dict()
+        self._stack_hash: Optional[str] = None
+        self._keep_stack_running: bool = False
+        self._torn_down: bool = False
+        # set when a service of a level failed, the other services of the level stop starting
+        self._startup_aborted: threading.Event = threading.Event()
+        self._cleanup_backend: str = cleanup_backend
+        self.teardown_report = ReaperReport()
+        self._network_pool: Optional[ContainerNetworkPool] = network_pool
+        self._container_network: Optional[ContainerNetwork] = None
+        self._leased_network: Optional[ContainerNetwork] = None
+        self._stack_client: Optional[CachingDockerClient] = None
+        # requests are attributed to the service and phase they are made in, which the tracer keeps track of
+        self._tracer: PhaseTracer = tracer or PhaseTracer(enabled=api_metrics is not None)
+        self._image_snapshots: Optional[ImageSnapshots] = (
+            ImageSnapshots(self.docker_client, snapshot_param) if snapshot_param.enabled else None
+        )
 
     @property
     def running_containers(self) -> RunningContainers:
@@ -50,6 +130,19 @@ class RunContainers(BaseDockerClient):
     def running_containers(self, containers: RunningContainers) -> None:
         self._running_containers: RunningContainers = containers
 
+    @property
+    def tracer(self) -> PhaseTracer:
+        return self._tracer
+
+    @property
+    def teardown_report(self) -> ReaperReport:
+        """Resources removed by the last teardown, and how long each step took"""
+        return self._teardown_report
+
+    @teardown_report.setter
+    def teardown_report(self, report: ReaperReport) -> None:
+        self._teardown_report: ReaperReport = report
+
     @property
     def unique_container_label(self) -> str:
         return self._unique_container_label
@@ -74,51 +167,534 @@ class RunContainers(BaseDockerClient):
             logger.info(exc.with_traceback(None))
 
     def run_containers(self) -> RunningContainers:
-        self.unique_container_label = uuid4().hex
-        network_name: str = f"{self.unique_container_label}_network"
+        with self._tracer.phase("startup"):
+            return self._run_containers()
+
+    def _run_containers(self) -> RunningContainers:
+        self._torn_down = False
+        self._startup_aborted.clear()
+        with self._tracer.phase("pull"):
+            self._pull_service_images()
+        stack_state: Optional[StackState] = None
+        if self._reuse_param.enabled or self._image_snapshots:
+            self._service_hashes = self._service_config_hashes()
+        if self._reuse_param.enabled:
+            self._remove_expired_stacks()
+            self._stack_hash = StackReuse.stack_config_hash(self._service_hashes)
+            stack_state = self._reusable_stack_state(self._stack_hash)
+        self.unique_container_label = stack_state.stack_id if stack_state else uuid4().hex
+        # one network per stack, shared by all its containers
+        with self._tracer.phase("network"):
+            self._container_network = self._stack_network(stack_state)
+        network_name: str = self._container_network.name  # type: ignore
         processed_containers_services: Dict[str, RunningContainer] = dict()
-        self._running_container_labels.append(f"label={network_name}")
+        # containers and the network are torn down by the value of the stack label. Snapshot images inherit
+        # the labels of their container, so a per service label may also be set on containers of other stacks
+        self._running_container_labels.append(self._stack_label(self.unique_container_label))
+        # the stack is removed when this process exits. Ryuk also removes it when the process is killed
+        if not self._reuse_param.enabled:
+            Housekeeping.register_labels(self.docker_client, self._running_container_labels, self._cleanup_backend)  # noqa: E501
+        # a single event subscription for the whole stack replaces polling the state of every container  # noqa: E501
+        self._event_tracker = ContainerEventTracker(self.docker_client, self.unique_container_label).start()  # noqa: E501
+        # pings and inspects of the stack are shared by all its waiters, and refreshed by its events
+        self._stack_client = CachingDockerClient(self.docker_client, stack_id=self.unique_container_label)
+        self._event_tracker.add_listener(self._stack_client.invalidate)
+        if stack_state:
+            with self._tracer.phase("reattach"):
+                self._reattach_services(stack_state, processed_containers_services, network_name)
+
+        if self._parallel_startup:
+            for level in self.dependency_levels():
+                pending_services: List[str] = [x for x in level if x not in processed_containers_services]  # noqa: E501
+                if pending_services:
+                    self._start_services_concurrently(pending_services, processed_containers_services, network_name)  # noqa: E501
+        else:
+            for rank in sorted(self._ranked_config_services.ranked_services.keys()):
+                service: ContainerService = self._config_services.services[
+                    self._ranked_config_services.ranked_services[rank]
+                ]
+                if service.name in processed_containers_services:
+                    continue
+                try:
+                    running_container: RunningContainer = self._start_service(
+                        service, processed_containers_services, network_name
+                    )
+                    processed_containers_services.update({service.name: running_container})
+                except Exception as exc:
+                    logger.error(exc)
+                    self.running_containers = RunningContainers(running_containers=processed_containers_services)  # noqa: E501
+                    self.stop_running_containers()
+                    raise APIError(exc)
+        logger.info(
+            "The following containers were started: %s", list(processed_containers_services.keys())  # noqa: E501
+        )  # noqa: E501
+        self.running_containers = RunningContainers(running_containers=processed_containers_services)  # noqa: E501
+        if self._reuse_param.enabled:
+            self._save_stack_state(stack_state, network_name)
+            self._keep_stack_running = True
+        if self._image_snapshots:
+            try:
+                self._image_snapshots.evict()
+            except Exception as exc:
+                logger.info("Snapshots could not be evicted: %s", exc)
+        return self.running_containers
+
+    def stack_status(self) -> Dict[str, ContainerStatus]:
+        """State, health and port mappings of every container of the stack, fetched
+        with a single container listing and shared with the waiters of the stack.
+
+        Raises:
+            RuntimeError: when the stack was not started
+
+        Returns:
+            Dict[str, ContainerStatus]: service name to container status
+        """
+        if not self._stack_client:
+            raise RuntimeError("The stack must be started to get its status")
+        service_names: Dict[str, str] = {
+            x.generic_container.get_container_id(): x.service_name
+            for x in self.running_containers.running_containers.values()
+        }
+        return {
+            x.service_name or service_names.get(x.container_id) or x.name: x
+            for x in self._stack_client.stack_status().values()
+        }
+
+    def _pull_service_images(self) -> None:
+        """Pull the images of all services before any container starts, so
+        starting a container never waits on the registry.
+
+        Raises:
+            APIError: when one or more images could not be pulled
+        """
+        failures: Dict[str, str] = self.pull_docker_images(
+            [x.image for x in self._config_services.services.values()], max_workers=self._max_workers
+        )
+        if failures:
+            raise APIError(
+                "Images could not be pulled: "
+                + "; ".join([f"{image}: {error}" for image, error in failures.items()])
+            )
+
+    def dependency_levels(self) -> List[List[str]]:
+        """Group the ranked services into levels that can be started together.
+        A service is placed one level after the highest level of the services
+        it depends on, so services within a level never depend on each other.
+        The levels computed by `Config` are used when the ranked services carry them.
 
+        Returns:
+            List[List[str]]: service names per level, in start order
+        """
+        if self._ranked_config_services.levels:
+            return [list(x) for x in self._ranked_config_services.levels]
+        levels: Dict[str, int] = dict()
+        for rank in sorted(self._ranked_config_services.ranked_services.keys()):
+            service_name: str = self._ranked_config_services.ranked_services[rank]
+            service: ContainerService = self._config_services.services[service_name]
+            levels[service_name] = 1 + max([levels[x] for x in self._dependencies(service)], default=-1)
+
+        grouped_levels: List[List[str]] = [list() for _ in range(max(levels.values(), default=-1) + 1)]  # noqa: E501
+        for service_name, level in levels.items():
+            grouped_levels[level].append(service_name)
+        return grouped_levels
+
+    def _start_services_concurrently(
+        self,
+        service_names: List[str],
+        processed_containers_services: Dict[str, RunningContainer],
+        network_name: str,
+    ) -> None:
+        """Start all services of one dependency level on a bounded worker pool and
+        wait for every one of them to be healthy. The first failure cancels the
+        services that have not started yet and removes the containers of the level,
+        which ends the waits of the services that are starting. Once they returned,
+        the stack is torn down once.
+
+        Args:
+            service_names (List[str]): services of the same dependency level
+            processed_containers_services (Dict[str, RunningContainer]): services already running
+            network_name (str): the test network name
+        """  # noqa: E501
+        executor: ThreadPoolExecutor = ThreadPoolExecutor(
+            max_workers=min(self._max_workers, len(service_names)), thread_name_prefix="testcompose"
+        )
+        futures: Dict[Future, str] = {
+            executor.submit(
+                self._start_service,
+                self._config_services.services[service_name],
+                processed_containers_services,
+                network_name,
+            ): service_name
+            for service_name in service_names
+        }
+        done, not_done = wait(futures, return_when=FIRST_EXCEPTION)
+        failures: List[BaseException] = [x.exception() for x in done if x.exception()]  # type: ignore  # noqa: E501
+        if failures:
+            for future in not_done:
+                future.cancel()
+            self._abort_startup(service_names)
+        # services that are still starting finish first, so the teardown sees every container of the level
+        executor.shutdown(wait=True)
+        for future, service_name in futures.items():
+            if not future.cancelled() and not future.exception():
+                processed_containers_services.update({service_name: future.result()})
+        if failures:
+            logger.error(failures[0])
+            self.running_containers = RunningContainers(running_containers=processed_containers_services)  # noqa: E501
+            self.stop_running_containers()
+            raise APIError(failures[0])
+
+    def _abort_startup(self, service_names: List[str]) -> None:
+        """Keep the services of a level from starting further containers, and remove
+        the containers they already created. Their waits end as soon as they notice
+        the container is gone, instead of running into their timeout.
+
+        Args:
+            service_names (List[str]): services of the failed dependency level
+        """
+        self._startup_aborted.set()
+        container_labels: List[str] = [self._container_label(x) for x in service_names]
+        for container in self.docker_client.containers.list(
+            all=True, sparse=True, filters={"label": self._stack_label(self.unique_container_label)}
+        ):
+            # a sparse container only has the labels of the list response
+            if any([x in (container.attrs.get("Labels") or dict()) for x in container_labels]):
+                try:
+                    container.remove(v=True, force=True)
+                except APIError as exc:
+                    logger.debug("Container %s of a failed startup: %s", container.id, exc)
+
+    def _start_service(
+        self,
+        service: ContainerService,
+        processed_containers_services: Dict[str, RunningContainer],
+        network_name: str,
+    ) -> RunningContainer:
+        with self._tracer.phase("service", service.name):
+            return self._start_traced_service(service, processed_containers_services, network_name)
+
+    def _start_traced_service(
+        self,
+        service: ContainerService,
+        processed_containers_services: Dict[str, RunningContainer],
+        network_name: str,
+    ) -> RunningContainer:
+        generic_container: GenericContainer = GenericContainer()
+        generic_container.container_network = self._container_network  # type: ignore
+        generic_container.with_service(
+            service,
+            processed_containers_services,
+            generic_container.container_network.name,  # type: ignore
+        )
+        try:
+            generic_container.container_label = self._container_label(service.name)
+            generic_container.stack_id = self.unique_container_label
+            snapshot_image: Optional[str] = self._snapshot_image(service)
+            restored: bool = bool(snapshot_image and self._image_snapshots.find(snapshot_image))  # type: ignore  # noqa: E501
+            if restored:
+                logger.info("Starting service %s from snapshot %s", service.name, snapshot_image)
+                generic_container.image = snapshot_image  # type: ignore
+            log_wait_timeout = 120
+            if service.log_wait_parameters:
+                log_wait_timeout = int((service.log_wait_parameters.wait_timeout_ms or 120000) / 1000)  # noqa: E501
+            if self._startup_aborted.is_set():
+                raise RuntimeError(f"Startup of {service.name} aborted")
+            with self._tracer.phase("run"):
+                generic_container.container = generic_container.start(self._stack_client)
+            # a container created after the abort removed the containers of the level is not waited for
+            if self._startup_aborted.is_set():
+                raise RuntimeError(f"Startup of {service.name} aborted")
+            generic_container.check_container_health(
+                self._stack_client, timeout=log_wait_timeout, event_tracker=self._event_tracker
+            )
+            if service.snapshot_parameters and not restored:
+                if service.snapshot_parameters.init_command:
+                    with self._tracer.phase("init_command"):
+                        generic_container.run_init_command(service.snapshot_parameters.init_command)
+                if snapshot_image:
+                    with self._tracer.phase("snapshot"):
+                        self._image_snapshots.create(generic_container.container, snapshot_image, service.name)  # type: ignore  # noqa: E501
+        except BaseException:
+            # a container that is not running does not keep its reserved ports
+            generic_container.release_host_ports()
+            raise
+        return RunningContainer(
+            service_name=service.name,
+            config_environment_variables=generic_container.container_environment_variables,
+            generic_container=generic_container,
+        )
+
+    def _dependencies(self, service: ContainerService) -> List[str]:
+        """Services a service depends on, with those inferred from its placeholders
+        when the ranked services carry them
+
+        Args:
+            service (ContainerService): config service
+
+        Returns:
+            List[str]: names of the services it depends on
+        """
+        return self._ranked_config_services.dependencies.get(service.name, service.depends_on)
+
+    def _service_config_hashes(self) -> Dict[str, str]:
+        """Hash every service in rank order, so the hashes of its dependencies
+        are known when a service is hashed.
+
+        Returns:
+            Dict[str, str]: service name to config hash
+        """
+        service_hashes: Dict[str, str] = dict()
         for rank in sorted(self._ranked_config_services.ranked_services.keys()):
             service: ContainerService = self._config_services.services[
                 self._ranked_config_services.ranked_services[rank]
             ]
-            self.pull_docker_image(service.image)
-            generic_container: GenericContainer = GenericContainer()
-            generic_container.container_network = ContainerNetwork(
-                self.docker_client, network_name, labels={"label": network_name}
-            )
-            generic_container.with_service(
+            service_hashes[service.name] = StackReuse.service_config_hash(
                 service,
-                processed_containers_services,
-                generic_container.container_network.name,  # type: ignore
+                self.docker_client.images.get(service.image).id,
+                [service_hashes[x] for x in self._dependencies(service)],
             )
-            generic_container.container_label = f"{self.unique_container_label}_{service.name}"  # noqa: E501
-            self._running_container_labels.append(generic_container.container_label)
-            try:
-                log_wait_timeout = 120
-                if service.log_wait_parameters:
-                    log_wait_timeout = int((service.log_wait_parameters.wait_timeout_ms or 120000) / 1000)  # noqa: E501
-                generic_container.container = generic_container.start(self.docker_client)  # noqa: E501
-                generic_container.check_container_health(self.docker_client, timeout=log_wait_timeout)  # noqa: E501
-                running_container: RunningContainer = RunningContainer(
-                    service_name=service.name,
-                    config_environment_variables=generic_container.container_environment_variables,
-                    generic_container=generic_container,
+        return service_hashes
+
+    def _reusable_stack_state(self, stack_hash: str) -> Optional[StackState]:
+        """State of a kept stack started from the same config. An expired stack,
+        or any stack when `force_recreate` is set, is torn down instead.
+
+        Args:
+            stack_hash (str): config hash of the stack
+
+        Returns:
+            Optional[StackState]: state of the stack to reattach to
+        """
+        stack_state: Optional[StackState] = self._stack_reuse.load(stack_hash)
+        if not stack_state:
+            return None
+        if self._reuse_param.force_recreate or self._stack_reuse.is_expired(stack_state):
+            logger.info("Recreating kept stack %s", stack_state.stack_id)
+            self._remove_kept_stack(stack_state)
+            return None
+        return stack_state
+
+    def _remove_expired_stacks(self) -> None:
+        """Remove every expired kept stack. The state of a stack is only loaded
+        again by a run of the same config, so a stack kept before its config
+        changed would otherwise keep running.
+        """
+        for stack_state in self._stack_reuse.expired_states():
+            logger.info("Removing expired kept stack %s", stack_state.stack_id)
+            self._remove_kept_stack(stack_state)
+
+    def _remove_kept_stack(self, stack_state: StackState) -> None:
+        self._stack_reuse.discard(stack_state.stack_hash)
+        Housekeeping.perform_housekeeping(
+            docker_client=self.docker_client,
+            labels=[self._stack_label(stack_state.stack_id)],
+            cleanup_backend=self._cleanup_backend,
+        )
+
+    def _reattach_services(
+        self,
+        stack_state: StackState,
+        processed_containers_services: Dict[str, RunningContainer],
+        network_name: str,
+    ) -> None:
+        """Reattach to the containers of a kept stack. A service is reused when
+        its container is still running and healthy and all services it depends on
+        were reused as well. Any other container of the stack is removed, so it is
+        started again together with its dependents.
+
+        Args:
+            stack_state (StackState): state of the kept stack
+            processed_containers_services (Dict[str, RunningContainer]): filled with the reused services
+            network_name (str): the test network name
+        """  # noqa: E501
+        for rank in sorted(self._ranked_config_services.ranked_services.keys()):
+            service: ContainerService = self._config_services.services[
+                self._ranked_config_services.ranked_services[rank]
+            ]
+            service_state: Optional[ServiceState] = stack_state.services.get(service.name)
+            if not service_state:
+                continue
+            container: Optional[Container] = self._healthy_container(service_state.container_id)
+            if container and all([x in processed_containers_services for x in self._dependencies(service)]):
+                running_container: RunningContainer = self._reattach_service(
+                    service, service_state, container, processed_containers_services, network_name
                 )
                 processed_containers_services.update({service.name: running_container})
-            except Exception as exc:
-                logger.error(exc)
-                self.stop_running_containers()
-                raise APIError(exc)
-        logger.info(
-            "The following containers were started: %s", list(processed_containers_services.keys())  # noqa: E501
-        )  # noqa: E501
-        self.running_containers = RunningContainers(running_containers=processed_containers_services)  # noqa: E501
-        return self.running_containers
+            elif container:
+                container.remove(v=True, force=True)
+        logger.info("Reusing running containers: %s", list(processed_containers_services.keys()))
+
+    def _healthy_container(self, container_id: str) -> Optional[Container]:
+        try:
+            container: Container = self.docker_client.containers.get(container_id)
+        except NotFound:
+            return None
+        health: Optional[str] = (container.attrs.get("State", {}).get("Health") or {}).get("Status")
+        if container.status != PossibleContainerStates.RUNNING or health == 'unhealthy':
+            container.remove(v=True, force=True)
+            return None
+        return container
+
+    def _reattach_service(
+        self,
+        service: ContainerService,
+        service_state: ServiceState,
+        container: Container,
+        processed_containers_services: Dict[str, RunningContainer],
+        network_name: str,
+    ) -> RunningContainer:
+        generic_container: GenericContainer = GenericContainer()
+        generic_container.container_network = self._container_network  # type: ignore
+        generic_container.with_service(service, processed_containers_services, network_name)
+        # the environment the container was started with, including its resolved placeholders
+        generic_container.container_environment_variables = service_state.environment
+        generic_container.release_host_ports()
+        generic_container.container_label = service_state.container_label
+        generic_container.stack_id = self.unique_container_label
+        generic_container.container = container
+        generic_container.reload(self._stack_client, container.id)
+        return RunningContainer(
+            service_name=service.name,
+            config_environment_variables=generic_container.container_environment_variables,
+            generic_container=generic_container,
+        )
+
+    def _save_stack_state(self, stack_state: Optional[StackState], network_name: str) -> None:
+        if not self._stack_hash:
+            raise RuntimeError("The state of a stack can only be saved once its config hash is known")
+        services: Dict[str, ServiceState] = dict()
+        for service_name, running_container in self.running_containers.running_containers.items():
+            generic_container: GenericContainer = running_container.generic_container
+            container_id: Optional[str] = generic_container.get_container_id()
+            if not container_id:
+                raise RuntimeError(f"Service {service_name} has no container to save in the stack state")
+            services[service_name] = ServiceState(
+                service_name=service_name,
+                config_hash=self._service_hashes[service_name],
+                container_id=container_id,
+                container_label=generic_container.container_label,
+                environment=generic_container.container_environment_variables,
+                ports=generic_container.mapped_ports,
+            )
+        self._stack_reuse.save(
+            StackState(
+                stack_hash=self._stack_hash,
+                stack_id=self.unique_container_label,
+                network_name=network_name,
+                created_at=stack_state.created_at if stack_state else time.time(),
+                services=services,
+            )
+        )
+
+    def _snapshot_image(self, service: ContainerService) -> Optional[str]:
+        if not (self._image_snapshots and service.snapshot_parameters):
+            return None
+        return ImageSnapshots.snapshot_image(
+            service.name,
+            self._service_hashes[service.name],
+            ImageSnapshots.seed_hash(service.snapshot_parameters),
+        )
+
+    @staticmethod
+    def _stack_label(stack_id: str) -> str:
+        return f"{ContainerLabels.STACK}={stack_id}"
+
+    def _stack_network(self, stack_state: Optional[StackState]) -> ContainerNetwork:
+        """The network of the stack: the network of a kept stack, a network leased from
+        the network pool, or a network created for the stack.
+
+        Args:
+            stack_state (Optional[StackState]): state of a kept stack to reattach to
+
+        Returns:
+            ContainerNetwork: the stack network
+        """
+        if stack_state:
+            return ContainerNetwork(
+                self.docker_client, stack_state.network_name, labels=self._network_labels(stack_state.network_name)  # noqa: E501
+            )
+        # a kept stack outlives the run, so it never uses a network that is returned to the pool
+        if self._network_pool and not self._reuse_param.enabled:
+            self._leased_network = self._network_pool.lease()
+            return self._leased_network
+        network_name: str = f"{self.unique_container_label}_network"
+        return ContainerNetwork(self.docker_client, network_name, labels=self._network_labels(network_name))
+
+    def _network_labels(self, network_name: str) -> Dict[str, str]:
+        return {"label": network_name, ContainerLabels.STACK: self.unique_container_label}
+
+    def _container_label(self, service_name: str) -> str:
+        return f"{self.unique_container_label}_{service_name}"
+
+    @property
+    def running_container_labels(self) -> List[str]:
+        """Labels of the network and containers of the stack, in teardown order
+
+        Returns:
+            List[str]: labels to pass to `Housekeeping.perform_housekeeping`
+        """
+        return sorted(self._running_container_labels, reverse=True)
+
+    def detach(self) -> None:
+        """Stop following the stack without tearing it down, e.g. when another
+        process removes it later by its labels.
+        """
+        if self._event_tracker:
+            self._event_tracker.stop()
+            self._event_tracker = None
+        Housekeeping.unregister_labels(self.docker_client, self._running_container_labels, self._cleanup_backend)  # noqa: E501
 
     def stop_running_containers(self) -> None:
+        # a failed startup already tore the stack down, leaving the context manager would do it again
+        if self._torn_down:
+            return
+        self._torn_down = True
+        self.detach()
+        if self._keep_stack_running:
+            logger.info("Keeping stack %s running for reuse", self.unique_container_label)
+            return
+        if self._stack_hash:
+            self._stack_reuse.discard(self._stack_hash)
+        with self._tracer.phase("teardown"):
+            self._teardown()
+        if self.api_metrics:
+            logger.info("Docker API requests of stack %s:\n%s", self.unique_container_label, self.api_metrics.report())  # noqa: E501
+
+    def _teardown(self) -> None:
+        start: float = time.monotonic()
+        self._stop_services_in_reverse_order()
+        stop_duration_ms: float = round((time.monotonic() - start) * 1000, 3)
         self._running_container_labels.sort(reverse=True)
-        Housekeeping.perform_housekeeping(
-            docker_client=self.docker_client, labels=self._running_container_labels
-        )  # noqa: E501
+        # removes the network, and any container that was not running yet when the teardown started
+        with self._tracer.phase("housekeeping"):
+            self.teardown_report = Housekeeping.perform_housekeeping(
+                docker_client=self.docker_client,
+                labels=self._running_container_labels,
+                cleanup_backend=self._cleanup_backend,
+            )
+        self.teardown_report.step_durations_ms["stop"] = stop_duration_ms
+        if self._leased_network and self._network_pool:
+            self._network_pool.release(self._leased_network)
+            self._leased_network = None
+
+    def _stop_services_in_reverse_order(self) -> None:
+        """Stop the running services level by level in reverse dependency order, so a
+        service is stopped before the services it depends on. Services of the same
+        level are stopped concurrently, at most `max_workers` at a time, like they
+        were started.
+        """
+        running_containers: Dict[str, RunningContainer] = self.running_containers.running_containers
+        for level in reversed(self.dependency_levels()):
+            containers: List[GenericContainer] = [
+                running_containers[x].generic_container for x in level if x in running_containers
+            ]
+            if not containers:
+                continue
+            with ThreadPoolExecutor(
+                max_workers=min(self._max_workers, len(containers)), thread_name_prefix="testcompose-stop"
+            ) as executor:
+                list(executor.map(self._stop_service, containers))
+
+    def _stop_service(self, container: GenericContainer) -> None:
+        with self._tracer.phase("stop", container.host_name):
+            container.stop()
@@ -1,4 +1,5 @@
 from click import group
+from testcompose.configs.plan_cmd import plan
 from testcompose.configs.template_cmd import generate_template
 
 
@@ -8,3 +9,4 @@ def config():
 
 
 config.add_command(generate_template)
+config.add_command(plan)
@@ -0,0 +1,187 @@
+import json
+import os
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from time import perf_counter
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from testcompose.models.tracing.phase_span import PhaseSpan
+
+# tracer, service and name of the enclosing phase, so nested code records phases without a tracer argument
+_active_phase: ContextVar[Optional[Tuple['PhaseTracer', Optional[str], str]]] = ContextVar(
+    "testcompose_active_phase", default=None
+)
+
+
+class _NoPhase:
+    def __enter__(self) -> None:
+        return None
+
+    def __exit__(self, *args: Any) -> None:
+        return None
+
+
+_NO_PHASE: _NoPhase = _NoPhase()
+
+
+class PhaseTracer:
+    """Records the start and end of every phase of a stack: image pulls, the start of
+    every service with its readiness checks, and the teardown. A disabled tracer
+    records nothing and its phases cost a single attribute lookup.
+
+    The recorded phases can be exported as Chrome trace events, to be opened in
+    `chrome://tracing` or https://ui.perfetto.dev, or printed as a summary table.
+
+    Args:
+        enabled (bool): record phases. Defaults to True.
+    """
+
+    def __init__(self, enabled: bool = True) -> None:
+        self._enabled: bool = enabled
+        self._origin: float = perf_counter()
+        self._spans: List[PhaseSpan] = list()
+        self._lock: threading.Lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self._enabled
+
+    @property
+    def spans(self) -> List[PhaseSpan]:
+        """Recorded phases, in the order they ended
+
+        Returns:
+            List[PhaseSpan]: recorded phases
+        """
+        with self._lock:
+            return list(self._spans)
+
+    def phase(self, name: str, service: Optional[str] = None, detail: Optional[str] = None) -> Any:
+        """Context manager recording one phase. Phases recorded with `trace_phase` while
+        it is active belong to the same service.
+
+        Args:
+            name (str): phase name
+            service (Optional[str]): service of the phase. Defaults to the service of the enclosing phase.
+            detail (Optional[str]): what the phase works on when it is not a service
+
+        Returns:
+            ContextManager: the phase
+        """
+        if not self._enabled:
+            return _NO_PHASE
+        if service is None:
+            active: Optional[Tuple[PhaseTracer, Optional[str], str]] = _active_phase.get()
+            service = active[1] if active else None
+        return self._phase(name, service, detail)
+
+    @contextmanager
+    def _phase(self, name: str, service: Optional[str], detail: Optional[str]) -> Iterator[None]:
+        token: Any = _active_phase.set((self, service, name))
+        error: Optional[str] = None
+        start: float = perf_counter()
+        try:
+            yield
+        except BaseException as exc:
+            error = type(exc).__name__
+            raise
+        finally:
+            end: float = perf_counter()
+            _active_phase.reset(token)
+            span: PhaseSpan = PhaseSpan(
+                name=name,
+                service=service,
+                detail=detail,
+                start_ms=round((start - self._origin) * 1000, 3),
+                duration_ms=round((end - start) * 1000, 3),
+                error=error,
+            )
+            with self._lock:
+                self._spans.append(span)
+
+    def chrome_trace(self) -> Dict[str, Any]:
+        """The recorded phases as Chrome trace events. Every service is shown as a
+        thread of its own, phases of the whole stack as the thread `stack`.
+
+        Returns:
+            Dict[str, Any]: trace in the JSON object format of the trace event format
+        """
+        pid: int = os.getpid()
+        spans: List[PhaseSpan] = sorted(self.spans, key=lambda x: (x.start_ms, -x.duration_ms))
+        lanes: Dict[str, int] = dict()
+        for span in spans:
+            lanes.setdefault(span.lane, len(lanes) + 1)
+        events: List[Dict[str, Any]] = [
+            {"name": "thread_name", "ph": "M", "pid": pid, "tid": tid, "args": {"name": lane}}
+            for lane, tid in lanes.items()
+        ]
+        for span in spans:
+            args: Dict[str, str] = {k: v for k, v in span.dict(include={"service", "detail", "error"}).items() if v}  # noqa: E501
+            events.append(
+                {
+                    "name": span.name,
+                    "cat": "testcompose",
+                    "ph": "X",
+                    "ts": round(span.start_ms * 1000, 3),
+                    "dur": round(span.duration_ms * 1000, 3),
+                    "pid": pid,
+                    "tid": lanes[span.lane],
+                    "args": args,
+                }
+            )
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def export_chrome_trace(self, file_name: str) -> None:
+        """Write the recorded phases as a Chrome trace file
+
+        Args:
+            file_name (str): path of the trace file
+        """
+        with open(file_name, "w") as trace_file:
+            json.dump(self.chrome_trace(), trace_file)
+
+    def summary(self) -> str:
+        """The recorded phases as a plain text table, in start order
+
+        Returns:
+            str: summary table
+        """
+        rows: List[Tuple[str, ...]] = [("lane", "phase", "start ms", "duration ms", "error")]
+        for span in sorted(self.spans, key=lambda x: (x.start_ms, -x.duration_ms)):
+            rows.append(
+                (span.lane, span.name, f"{span.start_ms:.1f}", f"{span.duration_ms:.1f}", span.error or "")
+            )
+        widths: List[int] = [max([len(row[i]) for row in rows]) for i in range(len(rows[0]))]
+        return "\n".join(
+            "  ".join(value.ljust(width) for value, width in zip(row, widths)).rstrip() for row in rows
+        )
+
+
+def trace_phase(name: str, detail: Optional[str] = None) -> Any:
+    """Record a phase with the tracer of the enclosing phase, if any. Code that is not
+    called from within a traced phase records nothing.
+
+    Args:
+        name (str): phase name
+        detail (Optional[str]): what the phase works on when it is not a service
+
+    Returns:
+        ContextManager: the phase
+    """
+    active: Optional[Tuple[PhaseTracer, Optional[str], str]] = _active_phase.get()
+    if active is None:
+        return _NO_PHASE
+    return active[0].phase(name, active[1], detail)
+
+
+def active_phase() -> Tuple[Optional[str], Optional[str]]:
+    """Service and name of the innermost traced phase of the caller
+
+    Returns:
+        Tuple[Optional[str], Optional[str]]: service and phase name, None outside of a traced phase
+    """
+    active: Optional[Tuple[PhaseTracer, Optional[str], str]] = _active_phase.get()
+    if active is None:
+        return None, None
+    return active[1], active[2]
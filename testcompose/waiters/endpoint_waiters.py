@@ -1,14 +1,14 @@
 import socket
+from concurrent.futures import ThreadPoolExecutor
 from logging import Logger
-from time import sleep
-from typing import Dict
+from typing import Dict, List
 
 from docker.client import DockerClient  # type: ignore
-from requests import Response, get
+from requests import RequestException, Response, Session
 
 from testcompose.log_setup import stream_logger
 from testcompose.models.bootstrap.container_http_wait_parameter import ContainerHttpWaitParameter  # noqa: E501
-from testcompose.waiters.waiting_utils import is_container_still_running
+from testcompose.waiters.waiting_utils import is_container_still_running, poll_until
 
 logger: Logger = stream_logger(__name__)
 
@@ -31,38 +31,46 @@ class EndpointWaiters:
         exposed_ports: Dict[str, str],
     ) -> None:
         """Endpoint health-check for a container. A running service
-        with an exposed endpoint is queried and the response code is
-        checked with the expected response code.
+        with an exposed endpoint is queried until the response code matches the
+        expected response code or the deadline of the wait parameter expires.
+        Probes start after a short delay and back off exponentially, and all
+        probes reuse the connection of one http session.
 
         Args:
-            http_port (str): container service port
-            status_code (int, optional): Defaults to 200.
-            end_point (str, optional): Provided service endpoint. Defaults to "/".
-            server_startup_time (int, optional): Expected wait time for the service to start. Defaults to 20.
+            docker_client (DockerClient): Docker client
+            container_id (str): id of the probed container
+            wait_parameter (ContainerHttpWaitParameter): endpoint, expected status code and timing
+            exposed_ports (Dict[str, str]): container port to mapped host port
 
-        Returns:
-            bool: Endpoint returned expected status code
+        Raises:
+            RuntimeError: when the container stops or the endpoint is not ready in time
         """  # noqa: E501
-        response_check: bool = True
-        for _ in range(0, 3):
-            sleep(wait_parameter.startup_delay_time_ms / 1000)
-            if not is_container_still_running(docker_client, container_id):
-                response_check = False
-                break
-            try:
-                host: str = EndpointWaiters._get_container_host_ip()
-                mapped_port: str = exposed_ports[str(wait_parameter.http_port)]
-                scheme: str = "https://" if wait_parameter.use_https else "http://"
-                site_url: str = scheme + f"{host}:{mapped_port}/{wait_parameter.end_point.lstrip('/')}"  # noqa: E501
-                response: Response = get(url=site_url.rstrip("/"))
-                if response.status_code == wait_parameter.response_status_code:
-                    break
-            except Exception as exc:
-                response_check = False
-                logger.error("HTTP_CHECK_ERROR: %s", exc)
-        if not response_check:
-            raise RuntimeError(f"Http check on port {wait_parameter.http_port} failed")
-        return
+        host: str = EndpointWaiters._get_container_host_ip()
+        mapped_port: str = exposed_ports[str(wait_parameter.http_port)]
+        scheme: str = "https://" if wait_parameter.use_https else "http://"
+        site_url: str = scheme + f"{host}:{mapped_port}/{wait_parameter.end_point.lstrip('/')}"  # noqa: E501
+        timeout = (wait_parameter.connect_timeout_ms / 1000, wait_parameter.read_timeout_ms / 1000)
+
+        with Session() as session:
+            session.verify = wait_parameter.verify_tls
+
+            def _probe() -> bool:
+                if not is_container_still_running(docker_client, container_id):
+                    raise RuntimeError(f"Http check on port {wait_parameter.http_port} failed, container stopped")  # noqa: E501
+                try:
+                    response: Response = session.get(url=site_url.rstrip("/"), timeout=timeout)
+                    return response.status_code == wait_parameter.response_status_code
+                except RequestException as exc:
+                    logger.debug("HTTP_CHECK_ERROR: %s", exc)
+                    return False
+
+            if not poll_until(
+                _probe,
+                timeout=wait_parameter.deadline_ms / 1000,
+                initial_interval=wait_parameter.initial_delay_ms / 1000,
+                max_interval=wait_parameter.max_interval_ms / 1000,
+            ):
+                raise RuntimeError(f"Http check on port {wait_parameter.http_port} failed")
 
     @staticmethod
     def wait_for_http(
@@ -73,3 +81,35 @@ class EndpointWaiters:
     ) -> None:
         if wait_parameter:
             EndpointWaiters._check_endpoint(docker_client, container_id, wait_parameter, exposed_ports)  # noqa: E501
+
+    @staticmethod
+    def wait_for_endpoints(
+        docker_client: DockerClient,
+        container_id: str,
+        wait_parameters: List[ContainerHttpWaitParameter],
+        exposed_ports: Dict[str, str],
+    ) -> None:
+        """Probe several endpoints of a container concurrently, e.g. its http and
+        https endpoints. Returns when all of them are ready.
+
+        Args:
+            docker_client (DockerClient): Docker client
+            container_id (str): id of the probed container
+            wait_parameters (List[ContainerHttpWaitParameter]): endpoints to probe
+            exposed_ports (Dict[str, str]): container port to mapped host port
+
+        Raises:
+            RuntimeError: when one of the endpoints is not ready in time
+        """
+        if len(wait_parameters) <= 1:
+            for wait_parameter in wait_parameters:
+                EndpointWaiters.wait_for_http(docker_client, container_id, wait_parameter, exposed_ports)  # noqa: E501
+            return
+
+        with ThreadPoolExecutor(max_workers=len(wait_parameters), thread_name_prefix="testcompose-http") as executor:  # noqa: E501
+            futures = [
+                executor.submit(EndpointWaiters.wait_for_http, docker_client, container_id, x, exposed_ports)  # noqa: E501
+                for x in wait_parameters
+            ]
+            for future in futures:
+                future.result()
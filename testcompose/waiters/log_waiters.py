@@ -1,37 +1,40 @@
+import codecs
 import re
-from datetime import datetime
 from logging import Logger
-from time import sleep
-from typing import Match, Optional
+from queue import Empty, Queue
+from threading import Thread
+from time import monotonic
+from typing import Any, Callable, Iterable, Match, Optional
 
 from docker.client import DockerClient  # type: ignore
 from docker.models.containers import Container  # type: ignore
 
 from testcompose.log_setup import stream_logger
 from testcompose.models.bootstrap.container_log_wait_parameter import ContainerLogWaitParameter  # noqa: E501
-from testcompose.waiters.waiting_utils import is_container_still_running
 
 logger: Logger = stream_logger(__name__)
 
 
 class LogWaiter:
+    TAIL_BUFFER_SIZE: int = 64 * 1024
+
     @staticmethod
     def search_container_logs(
         docker_client: DockerClient, container: Container, log_parameter: ContainerLogWaitParameter  # noqa: E501
     ) -> None:
         """Search for a given predicate in the container log. Useful to check if a
-        container is running and healthy
+        container is running and healthy. The log is followed as a stream, so every
+        line is downloaded and searched only once and the search returns as soon as
+        the predicate matches. Only a bounded tail of the log is kept, which lets the
+        predicate match across chunk boundaries.
 
         Args:
-            search_string (str): predicate to search in the log
-            timeout (float, optional): Defaults to 300.0.
-            interval (int, optional): Defaults to 1.
+            docker_client (DockerClient): Docker client
+            container (Container): container whose log is searched
+            log_parameter (ContainerLogWaitParameter): predicate and timeout
 
         Raises:
             ValueError: if a non string predicate is passed
-
-        Returns:
-            bool: True if the log contains the provided predicate
         """
         if not log_parameter:
             return
@@ -39,19 +42,50 @@ class LogWaiter:
         if not isinstance(log_parameter.log_line_regex, str):
             raise ValueError
 
-        prog = re.compile(log_parameter.log_line_regex, re.MULTILINE).search
-        start: datetime = datetime.now()
-        output: Optional[Match[str]] = None
-        while (datetime.now() - start).total_seconds() < (log_parameter.wait_timeout_ms / 1000):  # noqa: E501
-            if not is_container_still_running(docker_client, container.id):  # type: ignore  # noqa: E501
-                return
-            output = prog(container.logs().decode())
-            if output:
-                return
-            if (datetime.now() - start).total_seconds() > (log_parameter.wait_timeout_ms / 1000):  # noqa: E501
-                raise TimeoutError(
-                    "container %s did not emit logs satisfying predicate in %.3f seconds"  # noqa: E501
-                    % (container.name, float(log_parameter.wait_timeout_ms or 60000))
-                )
-            sleep(log_parameter.poll_interval_ms / 1000)
-        logger.info(container.logs().decode())
+        prog: Callable[[str], Optional[Match[str]]] = re.compile(log_parameter.log_line_regex, re.MULTILINE).search  # noqa: E501
+        deadline: float = monotonic() + log_parameter.wait_timeout_ms / 1000
+        decoder: Any = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        chunks: "Queue[Optional[bytes]]" = Queue()
+        log_stream: Any = container.logs(stream=True, follow=True)
+        Thread(
+            target=LogWaiter._read_log_stream, args=(log_stream, chunks), name=f"logs-{container.name}", daemon=True  # noqa: E501
+        ).start()
+
+        tail: str = ""
+        try:
+            while True:
+                try:
+                    chunk: Optional[bytes] = chunks.get(timeout=max(deadline - monotonic(), 0))
+                except Empty:
+                    break
+                if chunk is None:
+                    # the log stream ends when the container stops running
+                    return
+                buffer: str = tail + decoder.decode(chunk)
+                if prog(buffer):
+                    return
+                tail = LogWaiter._bounded_tail(buffer)
+        finally:
+            log_stream.close()
+        logger.info(tail)
+
+    @staticmethod
+    def _read_log_stream(log_stream: Iterable[bytes], chunks: "Queue[Optional[bytes]]") -> None:
+        try:
+            for chunk in log_stream:
+                chunks.put(chunk)
+        except Exception as exc:
+            logger.debug("Log stream closed: %s", exc)
+        finally:
+            chunks.put(None)
+
+    @staticmethod
+    def _bounded_tail(buffer: str) -> str:
+        """Keep the end of the searched log, cut at a line start so a `^` anchored
+        predicate never matches in the middle of a line.
+        """
+        if len(buffer) <= LogWaiter.TAIL_BUFFER_SIZE:
+            return buffer
+        tail: str = buffer[-LogWaiter.TAIL_BUFFER_SIZE :]  # noqa: E203
+        line_start: int = tail.find("\n")
+        return tail[line_start + 1 :] if line_start >= 0 else tail  # noqa: E203
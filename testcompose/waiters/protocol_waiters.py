@@ -0,0 +1,159 @@
+import socket
+import struct
+from logging import Logger
+from typing import Callable, Dict
+
+from docker.client import DockerClient  # type: ignore
+
+from testcompose.log_setup import stream_logger
+from testcompose.models.bootstrap.container_protocol_wait_parameter import (  # noqa: E501
+    ContainerProtocolWaitParameter,
+    SupportedProtocols,
+)
+from testcompose.waiters.waiting_utils import is_container_still_running, poll_until
+
+logger: Logger = stream_logger(__name__)
+
+POSTGRES_PROTOCOL_VERSION: int = 196608
+POSTGRES_CANNOT_CONNECT_NOW: str = "57P03"
+KAFKA_API_VERSIONS_KEY: int = 18
+MYSQL_HANDSHAKE_V10: int = 0x0A
+REDIS_NOT_READY_REPLIES = (b"-LOADING", b"-BUSY", b"-MASTERDOWN")
+
+
+def _recv_exactly(sock: socket.socket, size: int) -> bytes:
+    data: bytes = b""
+    while len(data) < size:
+        chunk: bytes = sock.recv(size - len(data))
+        if not chunk:
+            raise ConnectionError("Connection closed by the server")
+        data += chunk
+    return data
+
+
+class ProtocolWaiter:
+    """Readiness probes that speak just enough of a server protocol to tell a
+    server that accepts requests from one that is still starting up. The probes
+    use plain sockets, no client library is needed.
+    """
+
+    @staticmethod
+    def _get_container_host_ip() -> str:
+        return socket.gethostbyname(socket.gethostname())
+
+    @staticmethod
+    def wait_for_protocol(
+        docker_client: DockerClient,
+        container_id: str,
+        wait_parameter: ContainerProtocolWaitParameter,
+        exposed_ports: Dict[str, str],
+    ) -> None:
+        """Probe the server until it is ready or the deadline expires.
+
+        Args:
+            docker_client (DockerClient): Docker client
+            container_id (str): id of the probed container
+            wait_parameter (ContainerProtocolWaitParameter): protocol, port and timing
+            exposed_ports (Dict[str, str]): container port to mapped host port
+
+        Raises:
+            RuntimeError: when the container stops or the server is not ready in time
+        """
+        if not wait_parameter:
+            return
+        host: str = ProtocolWaiter._get_container_host_ip()
+        port: int = int(exposed_ports[str(wait_parameter.port)])
+        probe: Callable[[socket.socket, Dict[str, str]], bool] = ProtocolWaiter.probes()[wait_parameter.protocol]  # noqa: E501
+
+        def _check() -> bool:
+            if not is_container_still_running(docker_client, container_id):
+                raise RuntimeError(f"{wait_parameter.protocol} check on port {wait_parameter.port} failed, container stopped")  # noqa: E501
+            return ProtocolWaiter.probe(probe, host, port, wait_parameter.socket_timeout_ms / 1000, wait_parameter.options)  # noqa: E501
+
+        if not poll_until(
+            _check,
+            timeout=wait_parameter.wait_timeout_ms / 1000,
+            initial_interval=wait_parameter.initial_delay_ms / 1000,
+            max_interval=wait_parameter.max_interval_ms / 1000,
+        ):
+            raise RuntimeError(f"{wait_parameter.protocol} check on port {wait_parameter.port} failed")
+
+    @staticmethod
+    def probes() -> Dict[str, Callable[[socket.socket, Dict[str, str]], bool]]:
+        return {
+            SupportedProtocols.POSTGRES: ProtocolWaiter.probe_postgres,
+            SupportedProtocols.REDIS: ProtocolWaiter.probe_redis,
+            SupportedProtocols.KAFKA: ProtocolWaiter.probe_kafka,
+            SupportedProtocols.MYSQL: ProtocolWaiter.probe_mysql,
+        }
+
+    @staticmethod
+    def probe(
+        probe: Callable[[socket.socket, Dict[str, str]], bool],
+        host: str,
+        port: int,
+        timeout: float,
+        options: Dict[str, str],
+    ) -> bool:
+        """Run a single probe on a fresh connection. Connection errors mean not ready.
+
+        Returns:
+            bool: True if the server is ready
+        """
+        try:
+            with socket.create_connection((host, port), timeout=timeout) as sock:
+                return probe(sock, options)
+        except (OSError, struct.error) as exc:
+            logger.debug("Probe of %s:%s failed: %s", host, port, exc)
+            return False
+
+    @staticmethod
+    def probe_postgres(sock: socket.socket, options: Dict[str, str]) -> bool:
+        """Send a startup message. A ready server asks for authentication or rejects
+        the credentials, a starting server answers with SQLSTATE 57P03.
+        """
+        parameters: bytes = b"".join(
+            [
+                b"user\0" + options.get("user", "postgres").encode() + b"\0",
+                b"database\0" + options.get("database", options.get("user", "postgres")).encode() + b"\0",  # noqa: E501
+                b"\0",
+            ]
+        )
+        sock.sendall(struct.pack("!ii", 8 + len(parameters), POSTGRES_PROTOCOL_VERSION) + parameters)
+        message_type: bytes = _recv_exactly(sock, 1)
+        if message_type == b"R":
+            return True
+        if message_type != b"E":
+            return False
+        (length,) = struct.unpack("!i", _recv_exactly(sock, 4))
+        fields: Dict[str, str] = {
+            x[:1].decode(): x[1:].decode(errors="replace") for x in _recv_exactly(sock, length - 4).split(b"\0") if x  # noqa: E501
+        }
+        return fields.get("C") != POSTGRES_CANNOT_CONNECT_NOW
+
+    @staticmethod
+    def probe_redis(sock: socket.socket, options: Dict[str, str]) -> bool:
+        """Send PING. Any reply but a loading or busy error means the server serves requests"""
+        sock.sendall(b"*1\r\n$4\r\nPING\r\n")
+        reply: bytes = sock.recv(256)
+        return bool(reply) and not reply.startswith(REDIS_NOT_READY_REPLIES)
+
+    @staticmethod
+    def probe_kafka(sock: socket.socket, options: Dict[str, str]) -> bool:
+        """Send an ApiVersions v0 request and expect an answer without error code"""
+        correlation_id: int = 0x7E57
+        client_id: bytes = options.get("client_id", "testcompose").encode()
+        request: bytes = struct.pack("!hhih", KAFKA_API_VERSIONS_KEY, 0, correlation_id, len(client_id)) + client_id  # noqa: E501
+        sock.sendall(struct.pack("!i", len(request)) + request)
+        (length,) = struct.unpack("!i", _recv_exactly(sock, 4))
+        response_correlation_id, error_code = struct.unpack("!ih", _recv_exactly(sock, min(length, 6)))
+        return response_correlation_id == correlation_id and error_code == 0
+
+    @staticmethod
+    def probe_mysql(sock: socket.socket, options: Dict[str, str]) -> bool:
+        """Read the initial handshake packet the server sends on connect. Error
+        packets, e.g. while the server is initializing, mean not ready.
+        """
+        header: bytes = _recv_exactly(sock, 4)
+        length: int = int.from_bytes(header[:3], "little")
+        return length > 0 and _recv_exactly(sock, 1)[0] == MYSQL_HANDSHAKE_V10
@@ -0,0 +1,162 @@
+import errno
+import selectors
+import socket
+from logging import Logger
+from time import monotonic
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+from docker.client import DockerClient  # type: ignore
+
+from testcompose.log_setup import stream_logger
+from testcompose.models.bootstrap.container_tcp_wait_parameter import ContainerTcpWaitParameter  # noqa: E501
+from testcompose.waiters.waiting_utils import Deadline, is_container_still_running
+
+logger: Logger = stream_logger(__name__)
+
+Address = Tuple[str, int]
+
+
+class _ConnectAttempt:
+    def __init__(self, address: Address, connect_deadline: float) -> None:
+        self.address: Address = address
+        self.deadline: float = connect_deadline
+        self.connected: bool = False
+        self.sock: socket.socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.sock.setblocking(False)
+
+
+class TcpWaiter:
+    RUNNING_CHECK_INTERVAL_S: float = 1.0
+
+    @staticmethod
+    def _get_container_host_ip() -> str:
+        return socket.gethostbyname(socket.gethostname())
+
+    @staticmethod
+    def wait_for_ports(
+        docker_client: DockerClient,
+        container_id: str,
+        wait_parameter: ContainerTcpWaitParameter,
+        exposed_ports: Dict[str, str],
+    ) -> None:
+        """Wait until all ports of the wait parameter accept connections on the host.
+        The ports of one container share a selector. The containers of a level
+        each wait on their own selector from their startup thread.
+
+        Args:
+            docker_client (DockerClient): Docker client
+            container_id (str): id of the probed container
+            wait_parameter (ContainerTcpWaitParameter): ports and timing
+            exposed_ports (Dict[str, str]): container port to mapped host port
+
+        Raises:
+            RuntimeError: when the container stops or a port is not ready in time
+        """
+        if not wait_parameter:
+            return
+        host: str = TcpWaiter._get_container_host_ip()
+        addresses: List[Address] = [(host, int(exposed_ports[str(port)])) for port in wait_parameter.ports]  # noqa: E501
+        not_ready: List[Address] = TcpWaiter.wait_for_addresses(
+            addresses,
+            timeout=wait_parameter.wait_timeout_ms / 1000,
+            poll_interval=wait_parameter.poll_interval_ms / 1000,
+            connect_timeout=wait_parameter.connect_timeout_ms / 1000,
+            settle_time=wait_parameter.settle_time_ms / 1000,
+            abort=lambda: not is_container_still_running(docker_client, container_id),
+        )
+        if not_ready:
+            raise RuntimeError(f"Tcp check failed for ports {[port for _, port in not_ready]}")
+
+    @staticmethod
+    def wait_for_addresses(
+        addresses: List[Address],
+        timeout: float,
+        poll_interval: float = 0.05,
+        connect_timeout: float = 1.0,
+        settle_time: float = 0.05,
+        abort: Optional[Callable[[], bool]] = None,
+    ) -> List[Address]:
+        """Probe many addresses from a single thread. All connection attempts are
+        non-blocking and multiplexed through one selector, so any number of ports,
+        e.g. of several containers, can be watched at the granularity of `poll_interval`.
+
+        An address is ready once a connection to it stays open for `settle_time`
+        or the server sends data. A connection that is accepted and closed right
+        away, as done by the docker port proxy while nothing listens in the
+        container, is retried.
+
+        Args:
+            addresses (List[Tuple[str, int]]): host and port pairs
+            timeout (float): overall deadline in seconds
+            poll_interval (float, optional): delay before a failed address is retried. Defaults to 0.05.
+            connect_timeout (float, optional): time a connection attempt may take. Defaults to 1.0.
+            settle_time (float, optional): time an accepted connection has to stay open. Defaults to 0.05.
+            abort (Optional[Callable[[], bool]], optional): checked about once a second, stops waiting when True.
+
+        Returns:
+            List[Tuple[str, int]]: addresses that were not ready before the deadline
+        """  # noqa: E501
+        deadline: Deadline = Deadline(timeout)
+        pending: Set[Address] = set(addresses)
+        retry_at: Dict[Address, float] = {x: 0.0 for x in pending}
+        attempts: Dict[Address, _ConnectAttempt] = dict()
+        next_abort_check: float = monotonic() + TcpWaiter.RUNNING_CHECK_INTERVAL_S
+
+        with selectors.DefaultSelector() as selector:
+
+            def _finish(attempt: _ConnectAttempt, ready: bool) -> None:
+                selector.unregister(attempt.sock)
+                attempt.sock.close()
+                attempts.pop(attempt.address)
+                if ready:
+                    pending.discard(attempt.address)
+                else:
+                    retry_at[attempt.address] = monotonic() + poll_interval
+
+            try:
+                while pending and not deadline.expired:
+                    now: float = monotonic()
+                    if abort and now >= next_abort_check:
+                        if abort():
+                            break
+                        next_abort_check = now + TcpWaiter.RUNNING_CHECK_INTERVAL_S
+                    for address in [x for x in pending if x not in attempts and retry_at[x] <= now]:
+                        attempt = _ConnectAttempt(address, now + connect_timeout)
+                        result: int = attempt.sock.connect_ex(address)
+                        if result not in (0, errno.EINPROGRESS, errno.EWOULDBLOCK):
+                            attempt.sock.close()
+                            retry_at[address] = now + poll_interval
+                            continue
+                        attempts[address] = attempt
+                        selector.register(attempt.sock, selectors.EVENT_WRITE, attempt)
+
+                    wake_ups: List[float] = [x.deadline for x in attempts.values()]
+                    wake_ups += [retry_at[x] for x in pending if x not in attempts]
+                    wait_time: float = min([x - now for x in wake_ups] + [poll_interval, deadline.remaining()])  # noqa: E501
+                    for key, _ in selector.select(timeout=max(wait_time, 0)):
+                        attempt = key.data
+                        if not attempt.connected:
+                            if attempt.sock.getsockopt(socket.SOL_SOCKET, socket.SO_ERROR):
+                                _finish(attempt, ready=False)
+                                continue
+                            # connected, now make sure the connection is not dropped right away
+                            attempt.connected = True
+                            attempt.deadline = monotonic() + settle_time
+                            selector.modify(attempt.sock, selectors.EVENT_READ, attempt)
+                        else:
+                            try:
+                                _finish(attempt, ready=bool(attempt.sock.recv(1, socket.MSG_PEEK)))
+                            except OSError:
+                                _finish(attempt, ready=False)
+
+                    now = monotonic()
+                    for attempt in [x for x in attempts.values() if x.deadline <= now]:
+                        # a connection that stayed open for the settle time is ready
+                        _finish(attempt, ready=attempt.connected)
+            finally:
+                for attempt in list(attempts.values()):
+                    selector.unregister(attempt.sock)
+                    attempt.sock.close()
+        if pending:
+            logger.info("Addresses not ready: %s", sorted(pending))
+        return sorted(pending)
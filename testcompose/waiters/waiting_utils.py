@@ -1,9 +1,76 @@
+from random import uniform
+from time import monotonic, sleep
+from typing import Callable, Iterator
+
 from docker.client import DockerClient  # type: ignore
 from docker.errors import APIError  # type: ignore
 
+from testcompose.client.caching_docker_client import CachingDockerClient
+
 
 def is_container_still_running(docker_client: DockerClient, container_id: str) -> bool:
     try:
+        # the status of the whole stack is listed at once instead of inspecting every container
+        if isinstance(docker_client, CachingDockerClient) and docker_client.stack_id:
+            return docker_client.is_container_running(container_id)
         return bool(docker_client.containers.get(container_id).short_id)
     except APIError:
         return False
+
+
+class Deadline:
+    """An absolute point in time after which waiting stops.
+
+    Args:
+        timeout (float): seconds from now
+    """
+
+    def __init__(self, timeout: float) -> None:
+        self._end: float = monotonic() + timeout
+
+    def remaining(self) -> float:
+        return max(self._end - monotonic(), 0.0)
+
+    @property
+    def expired(self) -> bool:
+        return monotonic() >= self._end
+
+
+def backoff_intervals(initial: float, maximum: float, factor: float = 2.0, jitter: float = 0.2) -> Iterator[float]:  # noqa: E501
+    """Exponentially growing, jittered sleep intervals in seconds, capped at `maximum`.
+    The jitter keeps many waiters started at the same time from probing in lockstep.
+
+    Args:
+        initial (float): first interval
+        maximum (float): largest interval
+        factor (float, optional): growth per interval. Defaults to 2.0.
+        jitter (float, optional): relative random deviation of every interval. Defaults to 0.2.
+    """
+    interval: float = initial
+    while True:
+        yield min(interval, maximum) * uniform(1 - jitter, 1 + jitter)
+        interval *= factor
+
+
+def poll_until(check: Callable[[], bool], timeout: float, initial_interval: float, max_interval: float) -> bool:  # noqa: E501
+    """Call `check` until it returns True or the deadline expires, backing off
+    exponentially between attempts. The first attempt is made right away, the last
+    one right at the deadline.
+
+    Args:
+        check (Callable[[], bool]): readiness probe, exceptions are propagated
+        timeout (float): overall deadline in seconds
+        initial_interval (float): first sleep interval in seconds
+        max_interval (float): largest sleep interval in seconds
+
+    Returns:
+        bool: True if the probe succeeded before the deadline
+    """
+    deadline: Deadline = Deadline(timeout)
+    for interval in backoff_intervals(initial_interval, max_interval):
+        if check():
+            return True
+        if deadline.expired:
+            return False
+        sleep(min(interval, deadline.remaining()))
+    return False
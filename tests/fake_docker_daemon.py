@@ -0,0 +1,771 @@
+"""In-process stand-in for the Docker Engine API, served over a Unix socket.
+
+Used by the benchmarks and tests to run `RunContainers` without a docker daemon:
+
+    with FakeDockerDaemon(latencies={"start": 0.05}) as fake:
+        RunContainers(..., env_param=ClientFromEnv(environment={"DOCKER_HOST": fake.base_url}))
+"""
+import hashlib
+import json
+import os
+import re
+import socket
+import socketserver
+import struct
+import tempfile
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler
+from typing import Any, Dict, Iterable, List, Optional, Pattern, Tuple
+from urllib.parse import parse_qs, unquote, urlparse
+from uuid import uuid4
+
+API_VERSION = "1.41"
+_VERSION_PREFIX: Pattern[str] = re.compile(r"^/v[0-9.]+")
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.%fZ")
+
+
+def _labels_match(labels: Dict[str, str], wanted: Iterable[str]) -> bool:
+    """Docker semantics: every label filter must match (AND)."""
+    for label in wanted:
+        key, _, value = label.partition("=")
+        if key not in labels or (value and labels[key] != value):
+            return False
+    return True
+
+
+class FakeContainer:
+    def __init__(
+        self, name: str, body: Dict[str, Any], image_id: str, log_lines: List[Tuple[float, str]]
+    ) -> None:
+        self.id: str = uuid4().hex + uuid4().hex
+        self.name: str = name or f"fake_{self.id[:12]}"
+        self.body: Dict[str, Any] = body
+        self.image_id: str = image_id
+        self.status: str = "created"
+        self.exit_code: int = 0
+        self.started_at: Optional[float] = None
+        self.created: str = _now()
+        self.log_lines: List[Tuple[float, str]] = log_lines
+        self.ports: Dict[str, List[Dict[str, str]]] = dict()
+        self.listeners: List[socket.socket] = list()
+        self.changed: threading.Condition = threading.Condition()
+
+    @property
+    def labels(self) -> Dict[str, str]:
+        return self.body.get("Labels") or dict()
+
+    @property
+    def network(self) -> str:
+        return (self.body.get("HostConfig") or {}).get("NetworkMode") or "bridge"
+
+    def is_stopped(self) -> bool:
+        return self.status != "running"
+
+    def emitted_logs(self) -> List[str]:
+        if self.started_at is None:
+            return list()
+        elapsed: float = time.monotonic() - self.started_at
+        return [line for delay, line in self.log_lines if delay <= elapsed]
+
+    def inspect(self) -> Dict[str, Any]:
+        running: bool = self.status == "running"
+        return {
+            "Id": self.id,
+            "Created": self.created,
+            "Name": f"/{self.name}",
+            "Image": self.image_id,
+            "Platform": "linux",
+            "State": {
+                "Status": self.status,
+                "Running": running,
+                "Paused": False,
+                "Restarting": False,
+                "OOMKilled": False,
+                "Dead": False,
+                "Pid": 4242 if running else 0,
+                "ExitCode": self.exit_code,
+                "Error": "",
+                "StartedAt": self.created,
+                "FinishedAt": "0001-01-01T00:00:00Z",
+            },
+            "Config": {
+                "Image": self.body.get("Image"),
+                "Env": self.body.get("Env") or list(),
+                "Cmd": self.body.get("Cmd"),
+                "Hostname": self.body.get("Hostname") or self.id[:12],
+                "Labels": self.labels,
+                "Tty": False,
+            },
+            "HostConfig": dict(self.body.get("HostConfig") or {}, LogConfig={"Type": "json-file"}),
+            "NetworkSettings": {
+                "Ports": self.ports if running else dict(),
+                "Networks": {
+                    self.network: {
+                        "Aliases": None,
+                        "NetworkID": hashlib.sha256(self.network.encode()).hexdigest(),
+                        "EndpointID": self.id,
+                        "Gateway": "172.28.0.1",
+                        "IPAddress": "172.28.0.2",
+                    }
+                },
+            },
+            "Mounts": list(),
+        }
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "Id": self.id,
+            "Names": [f"/{self.name}"],
+            "Image": self.body.get("Image"),
+            "ImageID": self.image_id,
+            "Labels": self.labels,
+            "State": self.status,
+            "Status": self.status,
+            "Ports": [
+                {
+                    "PrivatePort": int(port.split("/")[0]),
+                    "PublicPort": int(bindings[0]["HostPort"]),
+                    "Type": port.split("/")[1],
+                    "IP": "0.0.0.0",
+                }
+                for port, bindings in self.ports.items()
+                if self.status == "running"
+            ],
+            "NetworkSettings": {"Networks": {self.network: {}}},
+        }
+
+
+class FakeDockerDaemon:
+    """A small stand-in for the Docker Engine API served over a Unix socket.
+
+    It implements just enough of the API for `testcompose` to pull images,
+    create, start, inspect, log, stop and remove containers, manage networks
+    and volumes and stream events. Every operation can be slowed down with an
+    artificial latency and every request is counted so orchestration overhead
+    can be measured without a real daemon.
+
+    Args:
+        latencies (Dict[str, float], optional): operation name to delay in seconds,
+            e.g. ``{"start": 0.05, "pull": 0.2}``. Use the key ``*`` as a default.
+        log_lines (List[Tuple[float, str]], optional): lines every container logs,
+            each emitted ``delay`` seconds after start.
+        images (Iterable[str], optional): images already present locally.
+        publish_ports (bool, optional): listen on published host ports so TCP and
+            HTTP waiters see a live endpoint. Defaults to True.
+    """
+
+    def __init__(
+        self,
+        latencies: Optional[Dict[str, float]] = None,
+        log_lines: Optional[List[Tuple[float, str]]] = None,
+        images: Iterable[str] = (),
+        publish_ports: bool = True,
+    ) -> None:
+        self.latencies: Dict[str, float] = dict(latencies or {})
+        self.log_lines: List[Tuple[float, str]] = list(log_lines or [(0.0, "Application startup complete")])
+        self.publish_ports: bool = publish_ports
+        self.api_calls: Counter = Counter()
+        self.images: Dict[str, Dict[str, Any]] = dict()
+        self.containers: Dict[str, FakeContainer] = dict()
+        self.networks: Dict[str, Dict[str, Any]] = dict()
+        self.volumes: Dict[str, Dict[str, Any]] = dict()
+        self._subscribers: List[Tuple[Dict[str, List[str]], "_EventQueue"]] = list()
+        self._lock: threading.RLock = threading.RLock()
+        self._socket_dir: str = tempfile.mkdtemp(prefix="fake-docker-")
+        self.socket_path: str = os.path.join(self._socket_dir, "docker.sock")
+        self._server: Optional[socketserver.ThreadingUnixStreamServer] = None
+        for image in images:
+            self.add_image(image)
+
+    @property
+    def base_url(self) -> str:
+        return f"unix://{self.socket_path}"
+
+    def __enter__(self) -> "FakeDockerDaemon":
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, exc_tb) -> None:
+        self.stop()
+
+    def start(self) -> "FakeDockerDaemon":
+        daemon = self
+
+        class _Handler(_FakeDockerHandler):
+            fake = daemon
+
+        self._server = _ThreadingUnixServer(self.socket_path, _Handler)
+        threading.Thread(target=self._server.serve_forever, name="fake-docker", daemon=True).start()
+        return self
+
+    def stop(self) -> None:
+        with self._lock:
+            for _, queue in self._subscribers:
+                queue.close()
+            for container in self.containers.values():
+                self._close_listeners(container)
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+        os.rmdir(self._socket_dir)
+
+    def reset_counters(self) -> None:
+        self.api_calls.clear()
+
+    def add_image(self, name: str, labels: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
+        name = self._normalise_image(name)
+        image: Dict[str, Any] = {
+            "Id": "sha256:" + hashlib.sha256(f"{name}{time.time()}".encode()).hexdigest(),
+            "RepoTags": [name],
+            "Created": int(time.time()),
+            "Size": 1024,
+            "Labels": labels or dict(),
+            "Config": {"Labels": labels or dict()},
+        }
+        with self._lock:
+            self.images[name] = image
+        return image
+
+    @staticmethod
+    def _normalise_image(name: str) -> str:
+        if name.startswith("sha256:"):
+            return name
+        return name if ":" in name.rsplit("/", 1)[-1] else f"{name}:latest"
+
+    def find_image(self, name: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            if name.startswith("sha256:"):
+                return next((x for x in self.images.values() if x["Id"] == name), None)
+            return self.images.get(self._normalise_image(name))
+
+    def find_container(self, ref: str) -> Optional[FakeContainer]:
+        with self._lock:
+            if ref in self.containers:
+                return self.containers[ref]
+            for container in self.containers.values():
+                if container.name == ref or container.id.startswith(ref):
+                    return container
+        return None
+
+    def delay(self, operation: str) -> None:
+        seconds: float = self.latencies.get(operation, self.latencies.get("*", 0.0))
+        if seconds:
+            time.sleep(seconds)
+
+    def subscribe(self, filters: Dict[str, List[str]]) -> "_EventQueue":
+        queue = _EventQueue()
+        with self._lock:
+            self._subscribers.append((filters, queue))
+        return queue
+
+    def unsubscribe(self, queue: "_EventQueue") -> None:
+        with self._lock:
+            self._subscribers = [x for x in self._subscribers if x[1] is not queue]
+
+    def emit(self, kind: str, action: str, actor_id: str, attributes: Dict[str, str]) -> None:
+        now: float = time.time()
+        event: Dict[str, Any] = {
+            "status": action,
+            "id": actor_id,
+            "Type": kind,
+            "Action": action,
+            "Actor": {"ID": actor_id, "Attributes": attributes},
+            "scope": "local",
+            "time": int(now),
+            "timeNano": int(now * 1e9),
+        }
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for filters, queue in subscribers:
+            if filters.get("type") and kind not in filters["type"]:
+                continue
+            if filters.get("event") and action.split(":")[0] not in filters["event"]:
+                continue
+            if filters.get("label") and not _labels_match(attributes, filters["label"]):
+                continue
+            queue.put(event)
+
+    def container_event(self, container: FakeContainer, action: str) -> None:
+        attributes: Dict[str, str] = dict(container.labels, name=container.name, image=str(container.body.get("Image")))  # noqa: E501
+        self.emit("container", action, container.id, attributes)
+
+    def create_container(self, name: str, body: Dict[str, Any]) -> FakeContainer:
+        image: Optional[Dict[str, Any]] = self.find_image(str(body.get("Image")))
+        if not image:
+            raise LookupError(f"No such image: {body.get('Image')}")
+        container = FakeContainer(name, body, image["Id"], self.log_lines)
+        with self._lock:
+            if any(x.name == container.name for x in self.containers.values()):
+                raise ValueError(f"Conflict. The container name /{name} is already in use")
+            self.containers[container.id] = container
+        self.container_event(container, "create")
+        return container
+
+    def start_container(self, container: FakeContainer) -> None:
+        bindings: Dict[str, Any] = (container.body.get("HostConfig") or {}).get("PortBindings") or {}
+        for port, host_bindings in bindings.items():
+            host_port: str = str((host_bindings or [{}])[0].get("HostPort") or "")
+            listener: Optional[socket.socket] = None
+            if self.publish_ports or not host_port:
+                listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+                listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+                listener.bind(("", int(host_port or 0)))
+                host_port = str(listener.getsockname()[1])
+                if self.publish_ports:
+                    listener.listen(64)
+                    container.listeners.append(listener)
+                    threading.Thread(target=_serve_http_ok, args=(listener,), daemon=True).start()
+                else:
+                    listener.close()
+            container.ports[port] = [{"HostIp": "0.0.0.0", "HostPort": host_port}]
+        with container.changed:
+            container.status = "running"
+            container.started_at = time.monotonic()
+            container.changed.notify_all()
+        self.container_event(container, "start")
+
+    def _close_listeners(self, container: FakeContainer) -> None:
+        for listener in container.listeners:
+            try:
+                listener.close()
+            except OSError:
+                pass
+        container.listeners = list()
+
+    def stop_container(self, container: FakeContainer, action: str = "stop") -> None:
+        if container.status != "running":
+            return
+        self._close_listeners(container)
+        with container.changed:
+            container.status = "exited"
+            container.exit_code = 137 if action == "kill" else 0
+            container.changed.notify_all()
+        if action == "kill":
+            self.container_event(container, "kill")
+        self.container_event(container, "die")
+        self.container_event(container, "stop")
+        if (container.body.get("HostConfig") or {}).get("AutoRemove"):
+            self.remove_container(container)
+
+    def remove_container(self, container: FakeContainer) -> None:
+        with self._lock:
+            removed: Optional[FakeContainer] = self.containers.pop(container.id, None)
+        if removed:
+            self.container_event(container, "destroy")
+
+
+class _ThreadingUnixServer(socketserver.ThreadingUnixStreamServer):
+    daemon_threads = True
+    # concurrent startups open many connections at once, a unix socket refuses them once the backlog is full
+    request_queue_size = 256
+
+
+class _EventQueue:
+    def __init__(self) -> None:
+        self._items: List[Dict[str, Any]] = list()
+        self._closed: bool = False
+        self._condition = threading.Condition()
+
+    def put(self, item: Dict[str, Any]) -> None:
+        with self._condition:
+            self._items.append(item)
+            self._condition.notify_all()
+
+    def close(self) -> None:
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+
+    def get(self, timeout: float) -> Optional[Dict[str, Any]]:
+        with self._condition:
+            if not self._items and not self._closed:
+                self._condition.wait(timeout)
+            if self._items:
+                return self._items.pop(0)
+            return None
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+
+def _serve_http_ok(listener: socket.socket) -> None:
+    while True:
+        try:
+            conn, _ = listener.accept()
+        except OSError:
+            return
+        try:
+            conn.settimeout(2)
+            conn.recv(65536)
+            conn.sendall(b"HTTP/1.1 200 OK\r\nContent-Length: 2\r\nConnection: close\r\n\r\nOK")
+        except OSError:
+            pass
+        finally:
+            conn.close()
+
+
+def _frame(line: str) -> bytes:
+    data: bytes = (line + "\n").encode()
+    return struct.pack(">BxxxL", 1, len(data)) + data
+
+
+Route = Tuple[str, Pattern[str], str, str]
+_ROUTES: List[Route] = [
+    (method, re.compile(f"^{pattern}$"), operation, handler)
+    for method, pattern, operation, handler in [
+        ("GET", r"/_ping", "ping", "ping"),
+        ("HEAD", r"/_ping", "ping", "ping"),
+        ("GET", r"/version", "version", "version"),
+        ("GET", r"/info", "version", "version"),
+        ("GET", r"/events", "events", "events"),
+        ("GET", r"/images/json", "list_images", "list_images"),
+        ("POST", r"/images/create", "pull", "pull"),
+        ("GET", r"/images/(?P<name>.+)/json", "inspect_image", "inspect_image"),
+        ("DELETE", r"/images/(?P<name>.+)", "remove_image", "remove_image"),
+        ("POST", r"/commit", "commit", "commit"),
+        ("GET", r"/containers/json", "list_containers", "list_containers"),
+        ("POST", r"/containers/create", "create", "create"),
+        ("GET", r"/containers/(?P<id>[^/]+)/json", "inspect", "inspect"),
+        ("POST", r"/containers/(?P<id>[^/]+)/start", "start", "start"),
+        ("POST", r"/containers/(?P<id>[^/]+)/stop", "stop", "stop"),
+        ("POST", r"/containers/(?P<id>[^/]+)/kill", "kill", "kill"),
+        ("POST", r"/containers/(?P<id>[^/]+)/wait", "wait", "wait"),
+        ("GET", r"/containers/(?P<id>[^/]+)/logs", "logs", "logs"),
+        ("POST", r"/containers/(?P<id>[^/]+)/exec", "exec", "exec_create"),
+        ("POST", r"/exec/(?P<id>[^/]+)/start", "exec", "exec_start"),
+        ("GET", r"/exec/(?P<id>[^/]+)/json", "exec", "exec_inspect"),
+        ("DELETE", r"/containers/(?P<id>[^/]+)", "remove", "remove"),
+        ("GET", r"/networks", "list_networks", "list_networks"),
+        ("POST", r"/networks/create", "network_create", "network_create"),
+        ("GET", r"/networks/(?P<id>[^/]+)", "network_inspect", "network_inspect"),
+        ("DELETE", r"/networks/(?P<id>[^/]+)", "network_remove", "network_remove"),
+        ("GET", r"/volumes", "list_volumes", "list_volumes"),
+        ("DELETE", r"/volumes/(?P<id>[^/]+)", "volume_remove", "volume_remove"),
+    ]
+]
+
+
+class _FakeDockerHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    fake: FakeDockerDaemon
+
+    def log_message(self, format: str, *args: Any) -> None:
+        pass
+
+    def address_string(self) -> str:
+        return "fake-docker"
+
+    def _dispatch(self) -> None:
+        parsed = urlparse(self.path)
+        path: str = _VERSION_PREFIX.sub("", unquote(parsed.path))
+        self.query: Dict[str, List[str]] = parse_qs(parsed.query)
+        length: int = int(self.headers.get("Content-Length") or 0)
+        raw: bytes = self.rfile.read(length) if length else b""
+        self.body: Dict[str, Any] = json.loads(raw) if raw.strip() else dict()
+        for method, pattern, operation, handler in _ROUTES:
+            match = pattern.match(path)
+            if method == self.command and match:
+                self.fake.api_calls[operation] += 1
+                self.fake.delay(operation)
+                getattr(self, f"_{handler}")(**match.groupdict())
+                return
+        self._json(404, {"message": f"page not found: {self.command} {path}"})
+
+    do_GET = do_POST = do_DELETE = do_HEAD = _dispatch
+
+    def _param(self, name: str, default: str = "") -> str:
+        return (self.query.get(name) or [default])[0]
+
+    def _filters(self) -> Dict[str, List[str]]:
+        raw: str = self._param("filters")
+        if not raw:
+            return dict()
+        filters: Dict[str, Any] = json.loads(raw)
+        return {k: list(v.keys()) if isinstance(v, dict) else list(v) for k, v in filters.items()}
+
+    def _json(self, status: int, payload: Any) -> None:
+        data: bytes = json.dumps(payload).encode() if payload is not None else b""
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        if self.command != "HEAD":
+            self.wfile.write(data)
+
+    def _not_found(self, what: str) -> None:
+        self._json(404, {"message": f"No such {what}"})
+
+    def _begin_chunked(self, content_type: str) -> None:
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        self.wfile.flush()
+
+    def _chunk(self, data: bytes) -> bool:
+        try:
+            self.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+            self.wfile.flush()
+            return True
+        except OSError:
+            return False
+
+    def _end_chunked(self) -> None:
+        try:
+            self.wfile.write(b"0\r\n\r\n")
+            self.wfile.flush()
+        except OSError:
+            pass
+
+    def _ping(self) -> None:
+        data: bytes = b"OK"
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain")
+        self.send_header("Api-Version", API_VERSION)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        if self.command != "HEAD":
+            self.wfile.write(data)
+
+    def _version(self) -> None:
+        self._json(
+            200, {"ApiVersion": API_VERSION, "MinAPIVersion": "1.12", "Version": "fake", "Os": "linux"}
+        )
+
+    def _events(self) -> None:
+        queue: _EventQueue = self.fake.subscribe(self._filters())
+        self._begin_chunked("application/json")
+        try:
+            while not queue.closed:
+                event: Optional[Dict[str, Any]] = queue.get(timeout=0.5)
+                if event and not self._chunk(json.dumps(event).encode() + b"\n"):
+                    break
+        finally:
+            self.fake.unsubscribe(queue)
+            self.close_connection = True
+
+    def _list_images(self) -> None:
+        labels: List[str] = self._filters().get("label", list())
+        with self.fake._lock:
+            images = [x for x in self.fake.images.values() if _labels_match(x["Labels"], labels)]
+        self._json(200, images)
+
+    def _pull(self) -> None:
+        name: str = self._param("fromImage")
+        tag: str = self._param("tag", "latest")
+        self.fake.add_image(name if "@" in name else f"{name}:{tag}")
+        self._begin_chunked("application/json")
+        self._chunk(json.dumps({"status": f"Pulled {name}:{tag}"}).encode() + b"\n")
+        self._end_chunked()
+
+    def _inspect_image(self, name: str) -> None:
+        image = self.fake.find_image(name)
+        if not image:
+            return self._not_found(f"image: {name}")
+        # the image list has a unix timestamp, an inspected image an RFC 3339 one
+        created: str = datetime.fromtimestamp(image["Created"], timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.%fZ")
+        self._json(200, dict(image, Created=created))
+
+    def _remove_image(self, name: str) -> None:
+        image = self.fake.find_image(name)
+        if not image:
+            return self._not_found(f"image: {name}")
+        with self.fake._lock:
+            for key in [k for k, v in self.fake.images.items() if v is image]:
+                self.fake.images.pop(key)
+        self._json(200, [{"Untagged": name}, {"Deleted": image["Id"]}])
+
+    def _commit(self) -> None:
+        container = self.fake.find_container(self._param("container"))
+        if not container:
+            return self._not_found("container")
+        repo: str = self._param("repo")
+        tag: str = self._param("tag", "latest")
+        image = self.fake.add_image(f"{repo}:{tag}", labels=(self.body or {}).get("Labels"))
+        self._json(201, {"Id": image["Id"]})
+
+    def _list_containers(self) -> None:
+        filters: Dict[str, List[str]] = self._filters()
+        show_all: bool = self._param("all") in ("1", "true", "True")
+        with self.fake._lock:
+            containers = list(self.fake.containers.values())
+        result = [
+            x.summary()
+            for x in containers
+            if (show_all or x.status == "running")
+            and _labels_match(x.labels, filters.get("label", list()))
+            and (not filters.get("id") or any(x.id.startswith(i) for i in filters["id"]))
+            and (not filters.get("name") or x.name in filters["name"])
+        ]
+        self._json(200, result)
+
+    def _create(self) -> None:
+        try:
+            container = self.fake.create_container(self._param("name"), self.body)
+        except LookupError as exc:
+            return self._json(404, {"message": str(exc)})
+        except ValueError as exc:
+            return self._json(409, {"message": str(exc)})
+        self._json(201, {"Id": container.id, "Warnings": []})
+
+    def _container(self, id: str) -> Optional[FakeContainer]:
+        container = self.fake.find_container(id)
+        if not container:
+            self._not_found(f"container: {id}")
+        return container
+
+    def _inspect(self, id: str) -> None:
+        container = self._container(id)
+        if container:
+            self._json(200, container.inspect())
+
+    def _start(self, id: str) -> None:
+        container = self._container(id)
+        if container:
+            self.fake.start_container(container)
+            self._json(204, None)
+
+    def _stop(self, id: str) -> None:
+        container = self._container(id)
+        if container:
+            self.fake.stop_container(container)
+            self._json(204, None)
+
+    def _kill(self, id: str) -> None:
+        container = self._container(id)
+        if container:
+            self.fake.stop_container(container, action="kill")
+            self._json(204, None)
+
+    def _wait(self, id: str) -> None:
+        container = self._container(id)
+        if container:
+            with container.changed:
+                container.changed.wait_for(container.is_stopped)
+            self._json(200, {"StatusCode": container.exit_code})
+
+    def _remove(self, id: str) -> None:
+        container = self._container(id)
+        if not container:
+            return
+        if container.status == "running" and self._param("force") not in ("1", "true", "True"):
+            return self._json(409, {"message": "You cannot remove a running container"})
+        self.fake.stop_container(container, action="kill")
+        self.fake.remove_container(container)
+        self._json(204, None)
+
+    def _logs(self, id: str) -> None:
+        container = self._container(id)
+        if not container:
+            return
+        follow: bool = self._param("follow") in ("1", "true", "True")
+        self._begin_chunked("application/vnd.docker.raw-stream")
+        sent: int = 0
+        while True:
+            lines: List[str] = container.emitted_logs()
+            for line in lines[sent:]:
+                if not self._chunk(_frame(line)):
+                    return
+            sent = len(lines)
+            pending: bool = sent < len(container.log_lines)
+            if not follow or container.status != "running" or not pending:
+                break
+            with container.changed:
+                container.changed.wait(0.01)
+        if follow and container.status == "running":
+            with container.changed:
+                container.changed.wait_for(container.is_stopped, timeout=60)
+        self._end_chunked()
+
+    def _exec_create(self, id: str) -> None:
+        container = self._container(id)
+        if container:
+            self._json(201, {"Id": uuid4().hex})
+
+    def _exec_start(self, id: str) -> None:
+        self.send_response(200)
+        self.send_header("Content-Type", "application/vnd.docker.raw-stream")
+        self.end_headers()
+        self.wfile.flush()
+        time.sleep(0.01)
+        self.wfile.write(_frame("ok"))
+        self.wfile.flush()
+        self.close_connection = True
+
+    def _exec_inspect(self, id: str) -> None:
+        self._json(200, {"ID": id, "Running": False, "ExitCode": 0})
+
+    def _list_networks(self) -> None:
+        filters: Dict[str, List[str]] = self._filters()
+        with self.fake._lock:
+            networks = list(self.fake.networks.values())
+        self._json(
+            200,
+            [
+                x
+                for x in networks
+                if (not filters.get("name") or x["Name"] in filters["name"])
+                and _labels_match(x["Labels"], filters.get("label", list()))
+            ],
+        )
+
+    def _network_create(self) -> None:
+        name: str = self.body["Name"]
+        with self.fake._lock:
+            if self.body.get("CheckDuplicate") and any(x["Name"] == name for x in self.fake.networks.values()):  # noqa: E501
+                return self._json(409, {"message": f"network with name {name} already exists"})
+            network_id: str = hashlib.sha256(name.encode()).hexdigest()
+            self.fake.networks[network_id] = {
+                "Name": name,
+                "Id": network_id,
+                "Driver": self.body.get("Driver") or "bridge",
+                "Labels": self.body.get("Labels") or dict(),
+                "Containers": dict(),
+            }
+        self.fake.emit("network", "create", network_id, dict(self.body.get("Labels") or {}, name=name))
+        self._json(201, {"Id": network_id, "Warning": ""})
+
+    def _network(self, id: str) -> Optional[Dict[str, Any]]:
+        with self.fake._lock:
+            for network in self.fake.networks.values():
+                if network["Id"].startswith(id) or network["Name"] == id:
+                    return network
+        self._not_found(f"network: {id}")
+        return None
+
+    def _network_inspect(self, id: str) -> None:
+        network = self._network(id)
+        if network:
+            self._json(200, network)
+
+    def _network_remove(self, id: str) -> None:
+        network = self._network(id)
+        if not network:
+            return
+        with self.fake._lock:
+            attached = [x for x in self.fake.containers.values() if x.network == network["Name"]]
+            if attached:
+                return self._json(403, {"message": f"error while removing network: {network['Name']} has active endpoints"})  # noqa: E501
+            self.fake.networks.pop(network["Id"], None)
+        self.fake.emit("network", "destroy", network["Id"], dict(network["Labels"], name=network["Name"]))
+        self._json(204, None)
+
+    def _list_volumes(self) -> None:
+        labels: List[str] = self._filters().get("label", list())
+        with self.fake._lock:
+            volumes = [x for x in self.fake.volumes.values() if _labels_match(x["Labels"], labels)]
+        self._json(200, {"Volumes": volumes, "Warnings": None})
+
+    def _volume_remove(self, id: str) -> None:
+        with self.fake._lock:
+            volume = self.fake.volumes.pop(id, None)
+        self._json(204, None) if volume else self._not_found(f"volume: {id}")
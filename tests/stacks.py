@@ -0,0 +1,29 @@
+"""Generated stacks for tests and benchmarks that run against `FakeDockerDaemon`."""
+from typing import Any, Dict
+
+from testcompose.models.bootstrap.container_service import ContainerServices
+
+
+def synthetic_stack(size: int, width: int = 10) -> ContainerServices:
+    """A stack of `size` services in dependency levels of `width` services. Every
+    service depends on one service of the level before it.
+
+    Args:
+        size (int): number of services
+        width (int, optional): services per dependency level. Defaults to 10.
+
+    Returns:
+        ContainerServices: the stack
+    """
+    services: Dict[str, Any] = dict()
+    for index in range(size):
+        level, position = divmod(index, width)
+        services[f"service{index}"] = {
+            "name": f"service{index}",
+            "image": f"benchmark/image{index % 4}:1",
+            "exposed_ports": ["8000"],
+            "environment": {"SERVICE_INDEX": str(index)},
+            "depends_on": [f"service{(level - 1) * width + position}"] if level else [],
+            "log_wait_parameters": {"log_line_regex": ".*startup complete.*", "poll_interval_ms": 10},
+        }
+    return ContainerServices(services=services)
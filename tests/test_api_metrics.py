@@ -0,0 +1,49 @@
+from datetime import timedelta
+from unittest import mock
+
+import pytest
+
+from testcompose.client.api_metrics import DockerApiMetrics
+from testcompose.tracing.phase_tracer import PhaseTracer
+
+
+@pytest.mark.parametrize(
+    "url, endpoint",
+    [
+        ("http+docker://localhost/v1.43/containers/json?all=1", "/containers/json"),
+        ("http+docker://localhost/v1.43/containers/4f2a9c/json", "/containers/{id}/json"),
+        ("http+docker://localhost/v1.43/containers/create?name=db", "/containers/create"),
+        ("http+docker://localhost/v1.43/networks/stack_network", "/networks/{id}"),
+        ("http+docker://localhost/v1.43/images/library/redis:7/json", "/images/{name}/json"),
+        ("http+docker://localhost/v1.43/images/create?fromImage=redis", "/images/create"),
+        ("http+docker://localhost/_ping", "/_ping"),
+    ],
+)
+def test_endpoint(url, endpoint):
+    assert DockerApiMetrics.endpoint(url) == endpoint
+
+
+def _response(method, url, status=200, content=b"{}"):
+    response = mock.Mock(status_code=status, content=content, headers={}, elapsed=timedelta(milliseconds=2))
+    response.request = mock.Mock(method=method, url=url, body=None)
+    return response
+
+
+def test_calls_are_attributed_to_traced_phases():
+    metrics = DockerApiMetrics()
+    tracer = PhaseTracer()
+    url = "http+docker://localhost/v1.43/containers/abc/json"
+    metrics._record(_response("GET", "http+docker://localhost/v1.43/_ping"), stream=False)
+    with tracer.phase("service", "db"):
+        with tracer.phase("log_wait"):
+            metrics._record(_response("GET", url), stream=False)
+            metrics._record(_response("GET", url, status=404), stream=False)
+        metrics._record(_response("GET", "http+docker://localhost/v1.43/containers/abc/logs"), stream=True)
+
+    assert metrics.count() == 4
+    assert metrics.count(service="db") == 3
+    assert metrics.count(endpoint="/containers/{id}/json", phase="log_wait") == 2
+    stats = metrics.stats()[("db", "log_wait", "GET /containers/{id}/json")]
+    assert (stats.count, stats.errors, stats.bytes_received) == (2, 1, 4)
+    assert metrics.calls[-1].bytes_received is None
+    assert metrics.report().splitlines()[-1].split()[:3] == ["total", "4", "1"]
@@ -0,0 +1,47 @@
+import threading
+from typing import List
+from unittest import mock
+
+from docker.errors import APIError, ImageNotFound  # type: ignore
+
+from testcompose.client.base_docker_client import BaseDockerClient
+
+
+class _DockerClient(BaseDockerClient):
+    def __init__(self, docker_client) -> None:
+        # no daemon is pinged, the docker client is mocked
+        self.docker_client = docker_client
+
+
+def test_distinct_images_are_pulled_once_and_failures_reported_per_image():
+    pulled: List[str] = list()
+    lock = threading.Lock()
+
+    def _get(name):
+        if name != "local:1":
+            raise ImageNotFound(f"No such image: {name}")
+
+    def _pull(repository):
+        with lock:
+            pulled.append(repository)
+        if repository.startswith("broken"):
+            raise APIError(f"manifest for {repository} not found")
+
+    docker_client = mock.Mock()
+    docker_client.images.get.side_effect = _get
+    docker_client.images.pull.side_effect = _pull
+
+    failures = _DockerClient(docker_client).pull_docker_images(
+        ["redis:7", "broken:1", "postgres:13", "redis:7", "local:1", "broken:2", "postgres:13"], max_workers=2
+    )
+
+    assert sorted(pulled) == ["broken:1", "broken:2", "postgres:13", "redis:7"]
+    assert sorted(failures) == ["broken:1", "broken:2"]
+    assert "manifest for broken:1 not found" in failures["broken:1"]
+    assert "manifest for broken:2 not found" in failures["broken:2"]
+
+
+def test_nothing_is_pulled_without_images():
+    docker_client = mock.Mock()
+    assert _DockerClient(docker_client).pull_docker_images([]) == dict()
+    docker_client.images.get.assert_not_called()
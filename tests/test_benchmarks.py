@@ -0,0 +1,145 @@
+import threading
+import time
+
+import pytest
+from docker.errors import APIError
+
+from testcompose.configs.service_config import Config
+from testcompose.models.client.client_login import ClientFromEnv
+from testcompose.models.container.container_labels import ContainerLabels
+from testcompose.models.container.stack_reuse import ReuseParameters, StackState
+from testcompose.models.housekeeping.reaper import CleanupBackends
+from testcompose.run_containers import RunContainers
+
+from .fake_docker_daemon import FakeDockerDaemon
+from .stacks import synthetic_stack
+
+
+def test_stack_runs_against_the_fake_daemon():
+    # the benchmarks are not shipped with the package
+    bench_orchestration = pytest.importorskip("benchmarks.bench_orchestration")
+    result = bench_orchestration.run_benchmark(12, parallel_startup=True)
+    calls = result["api_calls_by_operation"]
+    assert (calls["create"], calls["start"]) == (12, 12)
+    assert calls["network_create"] == 1 and calls["network_remove"] == 1
+
+    baseline = {"results": {"12": dict(result, startup_s=result["startup_s"] * 2, api_calls=result["api_calls"] - 1)}}  # noqa: E501
+    assert bench_orchestration.compare({"results": {"12": result}}, baseline, tolerance=0.2) == [
+        f"12 services: api_calls {result['api_calls']} exceeds the baseline {result['api_calls'] - 1}"
+    ]
+
+
+def test_failed_parallel_startup_tears_down_every_started_container(monkeypatch):
+    services = synthetic_stack(4, width=4)
+    start_service = RunContainers._start_traced_service
+
+    def _start_traced_service(self, service, *args):
+        if service.name == "service0":
+            raise RuntimeError("service0 failed")
+        return start_service(self, service, *args)
+
+    monkeypatch.setattr(RunContainers, "_start_traced_service", _start_traced_service)
+    with FakeDockerDaemon(latencies={"create": 0.2}, images={x.image for x in services.services.values()}) as fake:
+        runner = RunContainers(
+            config_services=services,
+            ranked_services=Config(test_services=services).ranked_config_services,
+            env_param=ClientFromEnv(environment={"DOCKER_HOST": fake.base_url}),
+            parallel_startup=True,
+            cleanup_backend=CleanupBackends.NATIVE,
+        )
+        with runner as running_containers:
+            assert running_containers.running_containers == dict()
+        # containers created by workers that were still starting must not outlive the teardown
+        for thread in threading.enumerate():
+            if thread.name.startswith("testcompose"):
+                thread.join(10)
+
+        # workers that had not reached the create call yet when service0 failed skip it
+        assert fake.api_calls["create"] <= 3
+        assert fake.containers == dict()
+        assert fake.api_calls["network_remove"] == 1
+
+
+def test_reuse_removes_expired_stacks_of_changed_configs(tmp_path):
+    reuse_param = ReuseParameters(enabled=True, ttl_seconds=60, state_directory=str(tmp_path))
+    kept, edited = synthetic_stack(2), synthetic_stack(3)
+    images = {x.image for x in edited.services.values()}
+    with FakeDockerDaemon(images=images) as fake:
+        for services in (kept, edited):
+            runner = RunContainers(
+                config_services=services,
+                ranked_services=Config(test_services=services).ranked_config_services,
+                env_param=ClientFromEnv(environment={"DOCKER_HOST": fake.base_url}),
+                cleanup_backend=CleanupBackends.NATIVE,
+                reuse_param=reuse_param,
+            )
+            with runner:
+                pass
+            if services is kept:
+                kept_stack = runner.unique_container_label
+                (state_file,) = tmp_path.glob("stack-*.json")
+                state = StackState.parse_file(state_file)
+                state_file.write_text(state.copy(update={"created_at": state.created_at - 120}).json())
+
+        stacks = {x.labels[ContainerLabels.STACK] for x in fake.containers.values()}
+        assert stacks == {runner.unique_container_label} and kept_stack not in stacks
+        assert len(list(tmp_path.glob("stack-*.json"))) == 1
+
+
+def test_failed_parallel_startup_does_not_wait_for_the_rest_of_the_level(monkeypatch):
+    services = synthetic_stack(4, width=4)
+    for service in services.services.values():
+        # the log line never appears, a service waits for it until its timeout
+        service.log_wait_parameters = service.log_wait_parameters.copy(
+            update={"log_line_regex": "never logged", "wait_timeout_ms": 30000}
+        )
+    start_service = RunContainers._start_traced_service
+
+    def _start_traced_service(self, service, *args):
+        if service.name == "service0":
+            time.sleep(0.5)
+            raise RuntimeError("service0 failed")
+        return start_service(self, service, *args)
+
+    monkeypatch.setattr(RunContainers, "_start_traced_service", _start_traced_service)
+    with FakeDockerDaemon(images={x.image for x in services.services.values()}) as fake:
+        runner = RunContainers(
+            config_services=services,
+            ranked_services=Config(test_services=services).ranked_config_services,
+            env_param=ClientFromEnv(environment={"DOCKER_HOST": fake.base_url}),
+            parallel_startup=True,
+            cleanup_backend=CleanupBackends.NATIVE,
+        )
+        start = time.monotonic()
+        with pytest.raises(APIError, match="service0 failed"):
+            runner.run_containers()
+        assert time.monotonic() - start < 10
+        assert fake.containers == dict()
+
+
+def test_services_of_a_level_are_stopped_on_at_most_max_workers_threads(monkeypatch):
+    services = synthetic_stack(6, width=6)
+    stopping, peak = set(), list()
+    lock = threading.Lock()
+    stop_service = RunContainers._stop_service
+
+    def _stop_service(self, container):
+        with lock:
+            stopping.add(container.host_name)
+            peak.append(len(stopping))
+        time.sleep(0.05)
+        stop_service(self, container)
+        with lock:
+            stopping.discard(container.host_name)
+
+    monkeypatch.setattr(RunContainers, "_stop_service", _stop_service)
+    with FakeDockerDaemon(images={x.image for x in services.services.values()}) as fake:
+        with RunContainers(
+            config_services=services,
+            ranked_services=Config(test_services=services).ranked_config_services,
+            env_param=ClientFromEnv(environment={"DOCKER_HOST": fake.base_url}),
+            max_workers=2,
+            cleanup_backend=CleanupBackends.NATIVE,
+        ):
+            pass
+        assert len(peak) == 6 and max(peak) == 2
@@ -0,0 +1,109 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+
+from docker.errors import NotFound
+
+from testcompose.client.caching_docker_client import CachingDockerClient
+
+
+def test_inspects_are_shared_and_invalidated():
+    docker_client = mock.Mock()
+
+    def _get(container_id):
+        time.sleep(0.1)
+        return mock.Mock(id=container_id)
+
+    docker_client.containers.get.side_effect = _get
+    client = CachingDockerClient(docker_client, inspect_ttl=60)
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        containers = list(executor.map(client.containers.get, ["abc"] * 4))
+    assert docker_client.containers.get.call_count == 1
+    assert all([x is containers[0] for x in containers])
+
+    client.containers.get("abc")
+    assert docker_client.containers.get.call_count == 1
+    client.invalidate("abc", "die")
+    client.containers.get("abc")
+    assert docker_client.containers.get.call_count == 2
+
+    client.ping()
+    client.ping()
+    assert docker_client.ping.call_count == 1
+    client.containers.list(all=True)
+    docker_client.containers.list.assert_called_once_with(all=True)
+
+
+def test_stack_status_is_listed_once_per_tick():
+    docker_client = mock.Mock()
+    docker_client.containers.list.return_value = [
+        mock.Mock(
+            id=container_id,
+            attrs={
+                "Id": container_id,
+                "Names": [f"/{container_id}_name"],
+                "Labels": {"testcompose.stack": "stack", "testcompose.service": service},
+                "State": state,
+                "Status": status,
+                "Ports": [{"PrivatePort": 8000, "PublicPort": 49153, "Type": "tcp", "IP": "0.0.0.0"}],
+            },
+        )
+        for container_id, service, state, status in [
+            ("abc", "db", "running", "Up 5 seconds (health: starting)"),
+            ("def", "app", "exited", "Exited (1) 2 seconds ago"),
+        ]
+    ]
+    docker_client.containers.get.side_effect = NotFound("No such container: ghi")
+    client = CachingDockerClient(docker_client, inspect_ttl=60, stack_id="stack")
+    assert client.is_container_running("abc")
+    assert not client.is_container_running("def")
+    assert not client.is_container_running("ghi")
+    docker_client.containers.list.assert_called_once_with(
+        all=True, sparse=True, filters={"label": "testcompose.stack=stack"}
+    )
+    status = client.stack_status()["abc"]
+    assert (status.service_name, status.health, status.ports) == ("db", "starting", {"8000": "49153"})
+    client.invalidate("def", "die")
+    client.stack_status()
+    assert docker_client.containers.list.call_count == 2
+
+
+def test_containers_missing_from_a_stale_listing_are_not_stopped():
+    docker_client = mock.Mock()
+    docker_client.containers.list.return_value = [
+        mock.Mock(id="abc", attrs={"Id": "abc", "Labels": {}, "State": "created", "Status": "Created"})
+    ]
+    client = CachingDockerClient(docker_client, inspect_ttl=60, stack_id="stack")
+    client.stack_status()
+    # the listing was taken before the container of a starting service was created
+    docker_client.containers.get.return_value = mock.Mock(id="def", short_id="def")
+
+    assert client.is_container_running("abc")
+    assert client.is_container_running("def")
+    assert docker_client.containers.list.call_count == 1
+
+
+def test_fetches_started_before_an_invalidation_are_not_cached():
+    docker_client = mock.Mock()
+    fetching, invalidated = threading.Event(), threading.Event()
+
+    def _get(container_id):
+        call = docker_client.containers.get.call_count
+        if call == 1:
+            fetching.set()
+            invalidated.wait(5)
+        return mock.Mock(id=container_id, status=f"call{call}")
+
+    docker_client.containers.get.side_effect = _get
+    client = CachingDockerClient(docker_client, inspect_ttl=60)
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        stale = executor.submit(client.containers.get, "abc")
+        fetching.wait(5)
+        client.invalidate("abc", "die")
+        assert client.containers.get("abc").status == "call2"
+        invalidated.set()
+        assert stale.result().status == "call1"
+
+    assert client.containers.get("abc").status == "call2"
+    assert docker_client.containers.get.call_count == 2
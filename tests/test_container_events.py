@@ -0,0 +1,161 @@
+import threading
+from queue import Queue
+from typing import Any, Dict, List, Optional, Tuple
+from unittest import mock
+
+import pytest
+from docker.errors import APIError  # type: ignore
+
+from testcompose.containers.container_events import ContainerEventTracker
+from testcompose.containers.generic_container import GenericContainer
+from testcompose.models.container.running_container_attributes import PossibleContainerStates
+
+
+class _FakeEvents:
+    """Blocking event stream like the one of `DockerClient.events`, fed by the test"""
+
+    def __init__(self) -> None:
+        self._queue: "Queue[Optional[Dict[str, Any]]]" = Queue()
+        self.closed: bool = False
+
+    def emit(self, container_id: str, action: str) -> None:
+        self._queue.put({"Type": "container", "Action": action, "Actor": {"ID": container_id}})
+
+    def fail(self) -> None:
+        self._queue.put({"raise": True})
+
+    def close(self) -> None:
+        self.closed = True
+        self._queue.put(None)
+
+    def __iter__(self):
+        while True:
+            event = self._queue.get()
+            if event is None:
+                return
+            if event.get("raise"):
+                raise ConnectionError("daemon went away")
+            yield event
+
+
+def _tracker() -> Tuple[ContainerEventTracker, _FakeEvents, mock.Mock]:
+    events = _FakeEvents()
+    docker_client = mock.Mock()
+    docker_client.events.return_value = events
+    return ContainerEventTracker(docker_client, "stack").start(), events, docker_client
+
+
+def _join(tracker: ContainerEventTracker) -> None:
+    tracker._thread.join(5)  # type: ignore
+    assert not tracker._thread.is_alive()  # type: ignore
+
+
+def test_tracker_subscribes_to_the_events_of_its_stack():
+    tracker, events, docker_client = _tracker()
+    docker_client.events.assert_called_once_with(
+        decode=True, filters={"type": "container", "label": "testcompose.stack=stack"}
+    )
+    assert tracker.is_alive
+    tracker.stop()
+    assert events.closed and not tracker.is_alive
+    _join(tracker)
+
+
+def test_tracker_records_states_and_calls_listeners_first():
+    tracker, events, _ = _tracker()
+    calls: List[Tuple[str, str, Optional[str]]] = list()
+    # a listener sees an event before the state it changes is visible to waiters
+    tracker.add_listener(lambda x, y: calls.append((x, y, tracker.container_state(x))))
+
+    events.emit("a", "create")
+    events.emit("a", "start")
+    assert tracker.wait_for_container("a", 5) == PossibleContainerStates.RUNNING
+    events.emit("a", "health_status: healthy")
+    assert tracker.wait_for_health("a", 5) == "healthy"
+    events.emit("b", "die")
+    assert tracker.wait_for_container("b", 5) == PossibleContainerStates.EXITED
+    assert tracker.wait_for_health("b", 5) is None
+    tracker.stop()
+
+    assert calls == [
+        ("a", "create", None),
+        ("a", "start", None),
+        ("a", "health_status: healthy", PossibleContainerStates.RUNNING),
+        ("b", "die", None),
+    ]
+    _join(tracker)
+
+
+def test_stop_wakes_up_waiters():
+    tracker, _, _ = _tracker()
+    states: List[Optional[str]] = list()
+    waiter = threading.Thread(target=lambda: states.append(tracker.wait_for_container("a", 30)))
+    waiter.start()
+    tracker.stop()
+    waiter.join(5)
+    assert not waiter.is_alive() and states == [None]
+    _join(tracker)
+
+
+def test_ended_event_stream_marks_the_tracker_dead():
+    tracker, events, _ = _tracker()
+    events.fail()
+    _join(tracker)
+    assert not tracker.is_alive
+    # waiters fall back to polling, they no longer wait for events
+    assert tracker.wait_for_container("a", 30) is None
+    tracker.stop()
+
+
+def _generic_container(status: str, health: Optional[str] = None) -> GenericContainer:
+    generic_container = GenericContainer()
+    generic_container.container = mock.Mock(
+        id="a", status=status, attrs={"State": {"Health": {"Status": health}} if health else {}}
+    )
+    generic_container.container.name = "a"
+    generic_container.container.logs.return_value = iter([])
+    return generic_container
+
+
+def _docker_client() -> mock.Mock:
+    # the mocked container keeps its status, reloading it is a no-op
+    docker_client = mock.Mock()
+    docker_client.containers.get.side_effect = APIError("not reloaded")
+    return docker_client
+
+
+def test_running_state_is_taken_from_events():
+    tracker, events, _ = _tracker()
+    events.emit("a", "start")
+    generic_container = _generic_container(PossibleContainerStates.RUNNING)
+    with mock.patch("testcompose.containers.generic_container.sleep") as sleep:
+        generic_container._wait_for_running_state(_docker_client(), 30, tracker)
+    sleep.assert_not_called()
+    tracker.stop()
+    _join(tracker)
+
+
+def test_died_container_fails_without_polling_until_the_timeout():
+    tracker, events, _ = _tracker()
+    events.emit("a", "die")
+    generic_container = _generic_container(PossibleContainerStates.EXITED)
+    with mock.patch("testcompose.containers.generic_container.sleep") as sleep:
+        with pytest.raises(RuntimeError, match="unwanted state exited"):
+            generic_container._wait_for_running_state(_docker_client(), 30, tracker)
+    sleep.assert_not_called()
+    tracker.stop()
+    _join(tracker)
+
+
+@pytest.mark.parametrize("health, error", [("healthy", False), ("unhealthy", True)])
+def test_container_health_is_taken_from_events(health, error):
+    tracker, events, _ = _tracker()
+    events.emit("a", f"health_status: {health}")
+    generic_container = _generic_container(PossibleContainerStates.RUNNING, health="starting")
+    if error:
+        with pytest.raises(RuntimeError, match="unhealthy"):
+            generic_container._wait_for_container_health(tracker, 30)
+    else:
+        generic_container._wait_for_container_health(tracker, 30)
+    tracker.stop()
+    _join(tracker)
@@ -0,0 +1,43 @@
+from unittest import mock
+
+from testcompose.containers.container_network_pool import ContainerNetworkPool
+from testcompose.housekeeping.native_reaper import NativeReaper
+from testcompose.housekeeping.ryuk_reaper import RyukReaper
+from testcompose.models.container.container_labels import ContainerLabels
+from testcompose.models.housekeeping.reaper import CleanupBackends
+
+
+def test_network_pool_lease_and_release():
+    docker_client = mock.Mock()
+    docker_client.api.base_url = "http+fake://pool"
+    docker_client.networks.create.side_effect = lambda **kwargs: mock.Mock(attrs={"Containers": {}}, **kwargs)
+
+    with mock.patch.object(NativeReaper, "_install_exit_handlers"):
+        pool = ContainerNetworkPool(docker_client, size=2, cleanup_backend=CleanupBackends.NATIVE)
+    assert pool.size == 2
+    assert docker_client.networks.create.call_args[1]["labels"] == {ContainerLabels.NETWORK_POOL: pool._pool_id}  # noqa: E501
+
+    leased = [pool.lease() for _ in range(3)]
+    assert pool.size == 3
+    assert len({id(x) for x in leased}) == 3
+    pool.release(leased[0])
+    assert pool.lease() is leased[0]
+    assert pool.size == 3
+
+    pool.close()
+    assert pool.size == 0
+    assert pool.pool_label not in NativeReaper.instance(docker_client).registered_labels
+    docker_client.networks.list.assert_not_called()
+
+
+def test_network_pool_registers_with_the_ryuk_backend():
+    docker_client = mock.Mock()
+    docker_client.api.base_url = "http+fake://ryuk-pool"
+    with mock.patch.object(RyukReaper, "register", autospec=True) as register, mock.patch.object(
+        NativeReaper, "_install_exit_handlers"
+    ) as install_exit_handlers:
+        with ContainerNetworkPool(docker_client, size=0) as pool:
+            pass
+    register.assert_called_once_with(mock.ANY, [pool.pool_label])
+    install_exit_handlers.assert_not_called()
+    assert pool.pool_label not in NativeReaper.instance(docker_client).registered_labels
@@ -0,0 +1,166 @@
+import os
+import signal
+import socket
+import subprocess
+import sys
+import textwrap
+import threading
+from typing import List, Tuple
+from unittest import mock
+
+import pytest
+from docker import DockerClient
+
+from testcompose.configs.service_config import Config
+from testcompose.containers.generic_container import GenericContainer
+from testcompose.housekeeping.native_reaper import NativeReaper
+from testcompose.housekeeping.ryuk_reaper import RyukReaper
+from testcompose.models.bootstrap.container_service import ContainerService
+from testcompose.models.client.client_login import ClientFromEnv
+from testcompose.run_containers import RunContainers
+
+from .fake_docker_daemon import FakeDockerDaemon
+from .stacks import synthetic_stack
+
+
+def _fake_ryuk(received: List[str], connections: List[socket.socket]) -> int:
+    server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    server.bind(("127.0.0.1", 0))
+    server.listen(4)
+
+    def _serve():
+        while True:
+            connection, _ = server.accept()
+            connections.append(connection)
+            with connection, connection.makefile("rb") as lines:
+                for line in lines:
+                    received.append(line.decode().strip())
+                    connection.sendall(b"ACK\n")
+
+    threading.Thread(target=_serve, daemon=True).start()
+    return server.getsockname()[1]
+
+
+def test_ryuk_reaper_batches_filters_on_one_connection():
+    received: List[str] = list()
+    connections: List[socket.socket] = list()
+    port: int = _fake_ryuk(received, connections)
+    docker_client = mock.Mock()
+    docker_client.api.base_url = f"http+fake://{port}"
+    reaper: RyukReaper = RyukReaper.instance(docker_client)
+    assert reaper is RyukReaper.instance(docker_client)
+
+    with mock.patch.object(RyukReaper, "_start_container", return_value=("127.0.0.1", port)) as start:
+        reaper.register(["testcompose.stack=a", "label=a_network"])
+        reaper.register(["testcompose.stack=a", "testcompose.stack=b"])
+        reaper.register(["testcompose.stack=b"])
+    reaper.close()
+
+    assert start.call_count == 1
+    assert len(connections) == 1
+    assert received == ["label=testcompose.stack=a", "label=label=a_network", "label=testcompose.stack=b"]
+    assert reaper.registered_labels == {"testcompose.stack=a", "label=a_network", "testcompose.stack=b"}
+
+
+def test_ryuk_reaper_attaches_to_the_ryuk_of_another_process():
+    received: List[str] = list()
+    connections: List[socket.socket] = list()
+    port: int = _fake_ryuk(received, connections)
+    docker_client = mock.Mock()
+    docker_client.api.base_url = "http+fake://attached"
+    reaper: RyukReaper = RyukReaper.instance(docker_client)
+
+    with mock.patch.object(RyukReaper, "_start_container") as start:
+        reaper.attach(f"127.0.0.1:{port}")
+        reaper.register(["testcompose.stack=shared"])
+    reaper.close()
+
+    start.assert_not_called()
+    assert received == ["label=testcompose.stack=shared"]
+
+
+def test_stack_is_registered_with_ryuk_before_its_containers_are_created():
+    services = synthetic_stack(2)
+    registered: List[Tuple[List[str], int]] = list()
+    with FakeDockerDaemon(images={x.image for x in services.services.values()}) as fake:
+        runner = RunContainers(
+            config_services=services,
+            ranked_services=Config(test_services=services).ranked_config_services,
+            env_param=ClientFromEnv(environment={"DOCKER_HOST": fake.base_url}),
+        )
+        with mock.patch.object(
+            RyukReaper, "register", autospec=True, side_effect=lambda _, x: registered.append((list(x), fake.api_calls["create"]))  # noqa: E501
+        ):
+            with runner:
+                pass
+
+    assert registered[0] == ([f"testcompose.stack={runner.unique_container_label}"], 0)
+
+
+def test_native_reaper_removes_labelled_resources():
+    docker_client = mock.Mock()
+    docker_client.api.base_url = "http+fake://native"
+    container = mock.Mock(id="c1")
+    network = mock.Mock(id="n1")
+    network.name = "stack_network"
+    docker_client.containers.list.return_value = [container]
+    docker_client.networks.list.return_value = [network]
+    docker_client.volumes.list.return_value = []
+
+    reaper: NativeReaper = NativeReaper.instance(docker_client)
+    with mock.patch.object(NativeReaper, "_install_exit_handlers") as install_exit_handlers:
+        reaper.register(["testcompose.stack=a"])
+    install_exit_handlers.assert_called_once()
+    report = reaper.reap(["testcompose.stack=a"])
+
+    assert not reaper.registered_labels
+    container.remove.assert_called_once_with(v=True, force=True)
+    network.remove.assert_called_once_with()
+    docker_client.containers.list.assert_called_once_with(all=True, sparse=True, filters={"label": "testcompose.stack=a"})  # noqa: E501
+    assert report.containers == ["c1"]
+    assert report.networks == ["stack_network"]
+    assert set(report.step_durations_ms) == {"list", "containers", "networks", "volumes"}
+
+
+@pytest.mark.skipif(not hasattr(signal, "SIGTERM") or sys.platform == "win32", reason="needs POSIX signals")
+def test_native_reaper_reaps_at_exit_when_signalled_during_registration():
+    script = textwrap.dedent(
+        """
+        import os, signal, sys, time
+        from docker import DockerClient
+        from testcompose.housekeeping.native_reaper import NativeReaper
+
+        reaper = NativeReaper.instance(DockerClient(base_url=sys.argv[1]))
+        reaper.register(["testcompose.stack=a"])
+        # the signal arrives while the main thread holds the lock of the reaper
+        with reaper._lock:
+            os.kill(os.getpid(), signal.SIGTERM)
+            time.sleep(10)
+        """
+    )
+    with FakeDockerDaemon() as fake:
+        DockerClient(base_url=fake.base_url).networks.create("stack_network", labels={"testcompose.stack": "a"})
+        process = subprocess.run(
+            [sys.executable, "-c", script, fake.base_url], cwd=os.path.dirname(os.path.dirname(__file__)), timeout=8
+        )
+        assert process.returncode == 128 + signal.SIGTERM
+        assert fake.api_calls["network_remove"] == 1
+
+
+@pytest.mark.parametrize(
+    "service, calls",
+    [
+        ({}, ["remove"]),
+        ({"stop_timeout": 3}, ["stop", "remove"]),
+        ({"stop_signal": "SIGINT"}, ["stop", "remove"]),
+        ({"kill_on_stop": True}, ["kill"]),
+    ],
+)
+def test_generic_container_stop(service, calls):
+    generic_container = GenericContainer()
+    generic_container.with_service(
+        ContainerService(name="db", image="postgres:13", exposed_ports=[], **service), dict(), "network"
+    )
+    generic_container.container = mock.Mock()
+    generic_container.stop()
+    assert [x[0] for x in generic_container.container.method_calls] == calls
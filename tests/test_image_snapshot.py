@@ -0,0 +1,52 @@
+import time
+from datetime import datetime, timezone
+from unittest import mock
+
+from testcompose.containers.image_snapshot import ImageSnapshots
+from testcompose.models.bootstrap.container_snapshot_parameter import ContainerSnapshotParameter
+from testcompose.models.container.image_snapshot import SnapshotParameters
+
+
+def test_seed_hash(tmp_path):
+    seed_file = tmp_path / "seed.sql"
+    seed_file.write_text("insert into users values (1);")
+    parameter = ContainerSnapshotParameter(init_command="psql -f /seed.sql", seed_files=[str(tmp_path)])
+    seed_hash: str = ImageSnapshots.seed_hash(parameter)
+    assert seed_hash == ImageSnapshots.seed_hash(parameter)
+    seed_file.write_text("insert into users values (2);")
+    assert seed_hash != ImageSnapshots.seed_hash(parameter)
+    assert ImageSnapshots.snapshot_image("db", "a", "b").startswith(f"{ImageSnapshots.REPOSITORY}:db-")
+
+
+def test_evict_least_recently_used_snapshots(tmp_path):
+    now: float = time.time()
+
+    def _image(tag: str, size: int, created: float) -> mock.Mock:
+        # inspected images have an RFC 3339 creation time with nanoseconds
+        timestamp: str = datetime.fromtimestamp(created, timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.%f123Z")
+        return mock.Mock(tags=[f"{ImageSnapshots.REPOSITORY}:{tag}"], attrs={"Size": size, "Created": timestamp})
+
+    docker_client = mock.Mock()
+    docker_client.images.list.return_value = [
+        _image("old", 1, now - 3600),
+        _image("big", 900 * 1024 * 1024, now - 60),
+        _image("recent", 1, now - 30),
+        _image("newest", 1, now - 10),
+        _image("expired", 1, now - 10 * 24 * 3600),
+    ]
+    snapshots = ImageSnapshots(
+        docker_client,
+        SnapshotParameters(enabled=True, max_snapshots=2, max_size_mb=512, state_directory=str(tmp_path)),
+    )
+    removed = snapshots.evict()
+    assert sorted(removed) == sorted([f"{ImageSnapshots.REPOSITORY}:{x}" for x in ["old", "big", "expired"]])  # noqa: E501
+
+
+def test_created_at_of_inspected_images():
+    def _image(created) -> mock.Mock:
+        return mock.Mock(attrs={"Created": created})
+
+    assert ImageSnapshots._created_at(_image("2023-05-01T12:00:00.500000000Z"), 0) == 1682942400.5
+    assert ImageSnapshots._created_at(_image("2023-05-01T14:00:00+02:00"), 0) == 1682942400
+    assert ImageSnapshots._created_at(_image(1682942400), 0) == 1682942400
+    assert ImageSnapshots._created_at(_image("yesterday"), 1) == 1
@@ -0,0 +1,42 @@
+import pytest
+
+from testcompose.tracing.phase_tracer import PhaseTracer, trace_phase
+
+
+def test_nested_phases_belong_to_their_service():
+    tracer = PhaseTracer()
+    with tracer.phase("startup"):
+        with tracer.phase("service", "db"):
+            with trace_phase("log_wait"):
+                pass
+        with pytest.raises(RuntimeError):
+            with tracer.phase("service", "app"):
+                with trace_phase("endpoint_wait"):
+                    raise RuntimeError("not ready")
+    with trace_phase("untraced"):
+        pass
+
+    spans = {(x.service, x.name): x for x in tracer.spans}
+    assert set(spans) == {
+        (None, "startup"),
+        ("db", "service"),
+        ("db", "log_wait"),
+        ("app", "service"),
+        ("app", "endpoint_wait"),
+    }
+    assert spans[("app", "endpoint_wait")].error == "RuntimeError"
+    assert spans[(None, "startup")].duration_ms >= spans[("db", "service")].duration_ms
+
+    trace = tracer.chrome_trace()
+    lanes = {x["args"]["name"] for x in trace["traceEvents"] if x["ph"] == "M"}
+    assert lanes == {"stack", "db", "app"}
+    assert len([x for x in trace["traceEvents"] if x["ph"] == "X"]) == 5
+    assert tracer.summary().splitlines()[1].split()[:2] == ["stack", "startup"]
+
+
+def test_disabled_tracer_records_nothing():
+    tracer = PhaseTracer(enabled=False)
+    with tracer.phase("service", "db"):
+        with trace_phase("log_wait"):
+            pass
+    assert tracer.spans == []
@@ -0,0 +1,84 @@
+import multiprocessing
+import socket
+import time
+
+import pytest
+
+from testcompose.containers.container_utils import ContainerUtils
+from testcompose.containers.port_allocator import PortAllocator
+from testcompose.models.bootstrap.container_service import ContainerServices
+from testcompose.models.container.port_reservation import PortRegistry, PortReservation
+
+
+def _reserve_ports(state_directory, queue, done):
+    allocator = PortAllocator(state_directory)
+    queue.put([port for _ in range(20) for port in allocator.reserve()])
+    # the reservations of a process are dropped once it is gone
+    done.wait(60)
+
+
+def test_reserved_ports_stay_bound_until_handed_over(tmp_path):
+    allocator = PortAllocator(str(tmp_path))
+    ports = allocator.reserve(count=5)
+
+    assert ports == list(range(ports[0], ports[0] + 5))
+    assert allocator.held_ports == ports
+    with pytest.raises(OSError):
+        socket.socket().bind(("", ports[2]))
+
+    allocator.hand_over(ports)
+    probe = socket.socket()
+    probe.bind(("", ports[2]))
+    probe.close()
+    assert allocator.held_ports == []
+    assert PortRegistry.parse_file(allocator.registry_file).reservations[0].ports == ports
+
+    allocator.release(ports)
+    assert PortRegistry.parse_file(allocator.registry_file).reservations == []
+
+
+def test_reservations_of_gone_processes_are_dropped(tmp_path):
+    allocator = PortAllocator(str(tmp_path))
+    process = multiprocessing.Process(target=str)
+    process.start()
+    process.join()
+    stale = PortReservation(first_port=1, pid=process.pid, reserved_at=time.time())
+    with open(allocator.registry_file, "w") as fh:
+        fh.write(PortRegistry(reservations=[stale]).json())
+
+    allocator.reserve()
+    assert [x.pid for x in PortRegistry.parse_file(allocator.registry_file).reservations] == [
+        multiprocessing.current_process().pid
+    ]
+
+
+def test_processes_never_reserve_the_same_port(tmp_path):
+    queue, done = multiprocessing.Queue(), multiprocessing.Event()
+    processes = [
+        multiprocessing.Process(target=_reserve_ports, args=(str(tmp_path), queue, done)) for _ in range(4)
+    ]
+    for process in processes:
+        process.start()
+    ports = [port for _ in processes for port in queue.get(timeout=60)]
+    done.set()
+    for process in processes:
+        process.join()
+
+    assert len(ports) == len(set(ports)) == 80
+
+
+def test_placeholders_of_a_port_range_reserve_one_block(tmp_path):
+    allocator = PortAllocator(str(tmp_path))
+    environment = {"FIRST": "${self.external_port_9000}", "LAST": "${self.external_port_9002}"}
+    service = ContainerServices(
+        services={"app": {"name": "app", "image": "image", "exposed_ports": ["9000-9002"], "environment": environment}}  # noqa: E501
+    ).services["app"]
+
+    environment, exposed_ports = ContainerUtils.replace_container_config_placeholders(
+        service.environment, {}, "app", service.port_specs, service.environment_templates, allocator
+    )
+    first_port = int(environment["FIRST"])
+    assert int(environment["LAST"]) == first_port + 2
+    assert exposed_ports[0].bindings() == {9000: first_port, 9001: first_port + 1, 9002: first_port + 2}
+    assert allocator.held_ports == [first_port, first_port + 1, first_port + 2]
+    allocator.release(allocator.held_ports)
@@ -82,3 +82,20 @@ def test_broker_app_and_db_containers(
         )
         assert consumer.status_code == 200
         assert json.loads(consumer.text) == json.loads(version)
+
+
+def test_db_and_app_containers_parallel_startup(db_and_app_containers, db_and_app_containers_config_services):
+    config_services: ContainerServices = db_and_app_containers_config_services
+    running_config: Config = Config(test_services=config_services)
+    with RunContainers(
+        config_services=config_services,
+        ranked_services=running_config.ranked_config_services,
+        parallel_startup=True,
+        max_workers=2,
+    ) as runner:
+        assert list(runner.running_containers.keys()) == ["database", "application"]
+        app_service: RunningContainer = runner.running_containers["application"]
+        mapped_port = app_service.generic_container.get_exposed_port("8000")
+        app_host = app_service.generic_container.get_container_host_ip()
+        response: Response = get(url=f"http://{app_host}:{int(mapped_port)}/version")
+        assert response.status_code == 200
@@ -6,8 +6,10 @@ from testcompose.configs.parse_config import TestConfigParser
 from testcompose.configs.service_config import Config
 from testcompose.models.bootstrap.container_service import ContainerServices, RankedContainerServices
 from testcompose.containers.container_network import ContainerNetwork
+from testcompose.containers.container_utils import ContainerUtils
 from unittest import mock
 import json
+import os
 
 
 def test_get_config_services_more_containers(valid_container_config):
@@ -45,3 +47,197 @@ def test_container_attr_with_no_service(config_with_missing_service_key):
 def test_container_missing_attr(config_with_missing_attr):
     with pytest.raises(expected_exception=ValidationError):
         Config(test_services=ContainerServices(**config_with_missing_attr))
+
+
+def _services(dependencies):
+    return ContainerServices(
+        services={x: {"name": x, "image": "image", "exposed_ports": [], "depends_on": y} for x, y in dependencies.items()}  # noqa: E501
+    )
+
+
+def test_services_are_ranked_in_dependency_levels():
+    config = Config(
+        test_services=_services({"app": ["db", "cache"], "db": [], "cache": ["db"], "worker": ["db"]})
+    )
+    assert config.dependency_levels == [["db"], ["cache", "worker"], ["app"]]
+    assert list(config.ranked_config_services.ranked_services.values()) == ["db", "cache", "worker", "app"]
+
+
+@pytest.mark.parametrize(
+    "dependencies, cycle",
+    [
+        ({"a": ["b"], "b": ["c"], "c": ["a"], "d": []}, "a -> b -> c -> a"),
+        ({"x": [], "a": ["x", "b"], "b": ["a"]}, "a -> b -> a"),
+        ({"a": ["a"]}, "a -> a"),
+    ],
+)
+def test_cyclic_dependency_names_the_cycle(dependencies, cycle):
+    with pytest.raises(ValueError, match=f"Cyclic dependency detected: {cycle}$"):
+        Config(test_services=_services(dependencies))
+
+
+def _service(name, environment, exposed_ports=[]):
+    return {"name": name, "image": "image", "exposed_ports": exposed_ports, "environment": environment}
+
+
+def test_placeholders_are_compiled_at_load():
+    services = ContainerServices(
+        services={
+            "db": _service("db", {"DB_USER": "user", "DB_PORT": 5432}),
+            "app": _service(
+                "app",
+                {"DB_URL": "${db.db_user}@${db.container_hostname}:${self.external_port_80}/x", "PLAIN": "v"},
+                ["80"],
+            ),
+        }
+    )
+    template = services.services["app"].environment_templates["DB_URL"]
+    assert list(services.services["app"].environment_templates) == ["DB_URL"]
+    assert template.services == ["db"]
+    assert [x if isinstance(x, str) else (x.service, x.variable) for x in template.segments] == [
+        ("db", "db_user"),
+        "@",
+        ("db", "container_hostname"),
+        ":",
+        ("self", "external_port_80"),
+        "/x",
+    ]
+
+    db = mock.MagicMock()
+    db.generic_container.container_environment_variables = {"DB_USER": "user", "DB_PORT": 5432}
+    with mock.patch.object(ContainerUtils, "_get_free_host_port", return_value=49000):
+        environment, exposed_ports = ContainerUtils.replace_container_config_placeholders(
+            services.services["app"].environment,
+            {"db": db},
+            "app",
+            services.services["app"].port_specs,
+            services.services["app"].environment_templates,
+        )
+    assert environment == {"DB_URL": "user@db:49000/x", "PLAIN": "v"}
+    assert [str(x) for x in exposed_ports] == ["49000:80"]
+
+
+@pytest.mark.parametrize(
+    "environment, error",
+    [
+        ({"URL": "${db}"}, "must be of the form"),
+        ({"URL": "${db.a.b}"}, "must be of the form"),
+        ({"URL": "${cache.container_hostname}"}, "references an unknown service"),
+        ({"URL": "${db.db_password}"}, "references an unknown variable of db"),
+        ({"URL": "${self.external_port_8080}"}, "must be a valid supplied exposed_ports value"),
+    ],
+)
+def test_invalid_placeholders_fail_at_load(environment, error):
+    with pytest.raises(ValidationError, match=error):
+        ContainerServices(
+            services={"db": _service("db", {"DB_USER": "user"}), "app": _service("app", environment, ["80"])}
+        )
+
+
+def test_placeholder_references_are_dependencies():
+    config = Config(
+        test_services=ContainerServices(
+            services={
+                "app": dict(
+                    _service("app", {"URL": "${db.db_user}@${db.container_hostname}", "Q": "${queue.container_hostname}"}),  # noqa: E501
+                    depends_on=["cache"],
+                ),
+                "db": _service("db", {"DB_USER": "user"}),
+                "cache": _service("cache", {}),
+                "queue": _service("queue", {}),
+            }
+        )
+    )
+    assert config.dependency_levels == [["db", "cache", "queue"], ["app"]]
+    assert config.ranked_config_services.dependencies["app"] == ["cache", "db"]
+    assert config.inferred_dependencies == {"app": ["db"]}
+    assert config.plan().splitlines()[-1].split() == ["1", "app", "cache", "db"]
+
+
+def test_unknown_dependencies_are_named():
+    with pytest.raises(AttributeError, match=r"app <=> \['queue'\]$"):
+        Config(test_services=_services({"db": [], "app": ["db", "queue"]}))
+
+
+def test_cyclic_placeholder_references_name_the_cycle():
+    with pytest.raises(ValueError, match="Cyclic dependency detected: a -> b -> a$"):
+        Config(
+            test_services=ContainerServices(
+                services={"a": _service("a", {"X": "${b.y}"}), "b": _service("b", {"Y": "${a.x}"})}
+            )
+        )
+
+
+@pytest.mark.parametrize(
+    "port, expected, bindings",
+    [
+        ("8080", "8080", {8080: None}),
+        (" 9000 : 80 ", "9000:80", {80: 9000}),
+        ("8000-8002", "8000-8002", {8000: None, 8001: None, 8002: None}),
+        ("9000-9001:8000-8001", "9000-9001:8000-8001", {8000: 9000, 8001: 9001}),
+    ],
+)
+def test_exposed_ports_are_parsed_at_load(port, expected, bindings):
+    spec = ContainerServices(services={"app": _service("app", {}, [port])}).services["app"].port_specs[0]
+    assert str(spec) == expected
+    assert spec.bindings() == bindings
+
+
+@pytest.mark.parametrize(
+    "port, error",
+    [("80:", "Invalid exposed port"), ("9000-8000", "must be less than"), ("1-3:5-6", "same length")],
+)
+def test_invalid_exposed_ports_fail_at_load(port, error):
+    with pytest.raises(ValidationError, match=error):
+        ContainerServices(services={"app": _service("app", {}, [port])})
+
+
+def test_parsed_configs_are_cached_until_the_file_changes(tmp_path):
+    config_file = tmp_path / "config.yaml"
+    config_file.write_text(
+        "services:\n"
+        "  - name: db\n    image: postgres\n    exposed_ports: ['5432']\n"
+        "    environment:\n      POSTGRES_USER: user\n"
+        "  - name: app\n    image: app\n    exposed_ports: []\n"
+        "    environment:\n      DB_URL: ${db.postgres_user}\n"
+    )
+    cache_directory = str(tmp_path / "cache")
+
+    services, ranked = TestConfigParser.parse_ranked_config(str(config_file), cache_directory)
+    assert TestConfigParser.parse_config(str(config_file), cache_directory) == services
+    assert ranked.levels == [["db"], ["app"]]
+
+    # every call gets services of its own
+    modified = TestConfigParser.parse_config(str(config_file), cache_directory)
+    modified.services["db"].environment["POSTGRES_USER"] = "other"
+    del modified.services["app"]
+    assert TestConfigParser.parse_config(str(config_file), cache_directory) == services
+
+    # a new process only finds the on-disk cache
+    TestConfigParser._cache(cache_directory).clear()
+    cached_services, cached_ranked = TestConfigParser.parse_ranked_config(str(config_file), cache_directory)
+    assert cached_services is not services and cached_ranked == ranked
+    assert cached_services.services["db"].port_specs == services.services["db"].port_specs
+    assert cached_services.services["app"].environment_templates["DB_URL"].services == ["db"]
+
+    config_file.write_text(config_file.read_text().replace("image: app", "image: app2"))
+    assert TestConfigParser.parse_config(str(config_file), cache_directory).services["app"].image == "app2"
+
+
+def test_config_cache_skips_touched_files_and_ignores_unreadable_entries(tmp_path):
+    config_file = tmp_path / "config.yaml"
+    config_file.write_text("services:\n  - name: db\n    image: postgres\n    exposed_ports: ['5432']\n")
+    cache_directory = tmp_path / "cache"
+    services = TestConfigParser.parse_config(str(config_file), str(cache_directory))
+
+    # a touched file with the same content is still cached
+    os.utime(config_file, ns=(1, 1))
+    with mock.patch("testcompose.configs.parse_config.ConfigCache.load_yaml") as load_yaml:
+        assert TestConfigParser.parse_config(str(config_file), str(cache_directory)) == services
+    load_yaml.assert_not_called()
+
+    # a cache file that is not a valid entry is parsed again
+    TestConfigParser._cache(str(cache_directory)).clear()
+    for cache_file in cache_directory.iterdir():
+        cache_file.write_text(json.dumps({"inputs": json.loads(cache_file.read_text())["inputs"], "config_services": 1}))
+    assert TestConfigParser.parse_config(str(config_file), str(cache_directory)) == services
@@ -0,0 +1,66 @@
+from typing import List
+
+import pytest
+
+from testcompose.containers.shared_stack import SharedStackCoordinator
+from testcompose.models.container.shared_stack import SharedService, SharedStack
+
+
+def test_shared_stack_is_started_once_and_torn_down_by_last_worker(tmp_path):
+    started: List[str] = list()
+    torn_down: List[List[str]] = list()
+
+    def _start_stack() -> SharedStack:
+        started.append("stack")
+        return SharedStack(
+            stack_id="stack",
+            services={"db": SharedService(service_name="db", container_id="1", host="localhost", ports={"5432": "49153"})},  # noqa: E501
+            labels=["stack_db", "label=stack_network"],
+        )
+
+    workers = [SharedStackCoordinator(str(tmp_path), f"gw{x}", _start_stack, torn_down.append) for x in range(3)]  # noqa: E501
+    stacks = [x.attach() for x in workers]
+    assert started == ["stack"]
+    assert all([x.services["db"].get_exposed_port("5432") == "49153" for x in stacks])
+
+    workers[0].detach()
+    workers[1].detach()
+    assert not torn_down
+    workers[2].detach()
+    assert torn_down == [["stack_db", "label=stack_network"]]
+    assert not (tmp_path / "stack.json").exists()
+
+
+def test_shared_stack_start_failure_is_published(tmp_path):
+    def _start_stack() -> SharedStack:
+        raise RuntimeError("image not found")
+
+    with pytest.raises(RuntimeError):
+        SharedStackCoordinator(str(tmp_path), "gw0", _start_stack, lambda x: None).attach()
+    with pytest.raises(RuntimeError, match="image not found"):
+        SharedStackCoordinator(str(tmp_path), "gw1", _start_stack, lambda x: None).attach()
+
+
+def test_shared_stack_waits_for_every_worker_of_the_run(tmp_path):
+    started: List[str] = list()
+    torn_down: List[List[str]] = list()
+
+    def _start_stack() -> SharedStack:
+        started.append("stack")
+        return SharedStack(stack_id=f"stack{len(started)}", labels=[f"stack{len(started)}"])
+
+    workers = [
+        SharedStackCoordinator(str(tmp_path), f"gw{x}", _start_stack, torn_down.append, worker_count=3)
+        for x in range(3)
+    ]
+    # gw0 never requests the stack, gw1 is done with it before gw2 attaches
+    workers[0].detach()
+    workers[1].attach()
+    workers[1].detach()
+    workers[1].detach()
+    assert not torn_down
+    workers[2].attach()
+    assert started == ["stack"]
+    workers[2].detach()
+    assert torn_down == [["stack1"]]
+    assert not (tmp_path / "stack.json").exists()
@@ -0,0 +1,51 @@
+import time
+
+from testcompose.containers.stack_reuse import StackReuse
+from testcompose.models.bootstrap.container_service import ContainerService
+from testcompose.models.container.stack_reuse import ReuseParameters, ServiceState, StackState
+
+
+def _service(**kwargs) -> ContainerService:
+    return ContainerService(**{"name": "db", "image": "postgres:13", "exposed_ports": ["5432"], **kwargs})
+
+
+def test_service_config_hash():
+    service_hash: str = StackReuse.service_config_hash(_service(), "sha256:1", [])
+    assert service_hash == StackReuse.service_config_hash(_service(), "sha256:1", [])
+    assert service_hash != StackReuse.service_config_hash(_service(), "sha256:2", [])
+    assert service_hash != StackReuse.service_config_hash(_service(environment={"A": "b"}), "sha256:1", [])
+    assert service_hash != StackReuse.service_config_hash(_service(), "sha256:1", ["dependency"])
+
+
+def test_stack_state_round_trip(tmp_path):
+    stack_reuse = StackReuse(ReuseParameters(enabled=True, ttl_seconds=60, state_directory=str(tmp_path)))
+    stack_hash: str = StackReuse.stack_config_hash({"db": "a", "app": "b"})
+    state = StackState(
+        stack_hash=stack_hash,
+        stack_id="stack",
+        network_name="stack_network",
+        created_at=time.time(),
+        services={"db": ServiceState(service_name="db", config_hash="a", container_id="1", container_label="stack_db")},  # noqa: E501
+    )
+    assert stack_reuse.load(stack_hash) is None
+    stack_reuse.save(state)
+    assert stack_reuse.load(stack_hash) == state
+    assert not stack_reuse.is_expired(state)
+    assert stack_reuse.is_expired(state.copy(update={"created_at": time.time() - 120}))
+    stack_reuse.discard(stack_hash)
+    assert stack_reuse.load(stack_hash) is None
+
+
+def test_expired_states_include_stacks_of_changed_configs(tmp_path):
+    stack_reuse = StackReuse(ReuseParameters(enabled=True, ttl_seconds=60, state_directory=str(tmp_path)))
+    for stack_id, age in [("old", 120), ("edited", 90), ("fresh", 0)]:
+        stack_reuse.save(
+            StackState(
+                stack_hash=StackReuse.stack_config_hash({"db": stack_id}),
+                stack_id=stack_id,
+                network_name=f"{stack_id}_network",
+                created_at=time.time() - age,
+            )
+        )
+    (tmp_path / "stack-unreadable.json").write_text("{")
+    assert sorted([x.stack_id for x in stack_reuse.expired_states()]) == ["edited", "old"]
@@ -0,0 +1,165 @@
+import socket
+import struct
+import threading
+import time
+from typing import Iterator, List
+from unittest import mock
+
+import pytest
+
+from testcompose.models.bootstrap.container_log_wait_parameter import ContainerLogWaitParameter
+from testcompose.waiters.log_waiters import LogWaiter
+from testcompose.waiters.protocol_waiters import ProtocolWaiter
+from testcompose.waiters.tcp_waiters import TcpWaiter
+from testcompose.waiters.waiting_utils import poll_until
+
+
+def _listener(close_immediately: bool = False) -> int:
+    server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    server.bind(("127.0.0.1", 0))
+    server.listen(16)
+
+    def _accept():
+        while True:
+            connection, _ = server.accept()
+            if close_immediately:
+                connection.close()
+
+    threading.Thread(target=_accept, daemon=True).start()
+    return server.getsockname()[1]
+
+
+def _closed_port() -> int:
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.bind(("127.0.0.1", 0))
+    port = sock.getsockname()[1]
+    sock.close()
+    return port
+
+
+def test_tcp_waiter_ready_ports():
+    addresses = [("127.0.0.1", _listener()), ("127.0.0.1", _listener())]
+    assert TcpWaiter.wait_for_addresses(addresses, timeout=2.0) == []
+
+
+def test_tcp_waiter_closed_and_dropped_ports():
+    dropped = ("127.0.0.1", _listener(close_immediately=True))
+    closed = ("127.0.0.1", _closed_port())
+    ready = ("127.0.0.1", _listener())
+    assert TcpWaiter.wait_for_addresses([dropped, closed, ready], timeout=0.5) == sorted([dropped, closed])
+
+
+def _server(reply: bytes) -> int:
+    server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    server.bind(("127.0.0.1", 0))
+    server.listen(16)
+
+    def _answer():
+        while True:
+            connection, _ = server.accept()
+            connection.settimeout(1)
+            try:
+                connection.recv(1024)
+            except OSError:
+                pass
+            connection.sendall(reply)
+            connection.close()
+
+    threading.Thread(target=_answer, daemon=True).start()
+    return server.getsockname()[1]
+
+
+@pytest.mark.parametrize(
+    "protocol,reply,ready",
+    [
+        ("postgres", b"R" + struct.pack("!ii", 8, 5) + b"salt", True),
+        ("postgres", b"E" + struct.pack("!i", 28) + b"SFATAL\0C57P03\0Mstarting\0\0", False),
+        ("redis", b"+PONG\r\n", True),
+        ("redis", b"-LOADING Redis is loading the dataset in memory\r\n", False),
+        ("kafka", struct.pack("!iih", 6, 0x7E57, 0), True),
+        ("kafka", struct.pack("!iih", 6, 0x7E57, 35), False),
+        ("mysql", b"\x0a\x00\x00\x00\x0a8.0.33\x00", True),
+        ("mysql", b"\x17\x00\x00\x00\xff\x10\x04Too many connections", False),
+    ],
+)
+def test_protocol_probes(protocol, reply, ready):
+    probe = ProtocolWaiter.probes()[protocol]
+    assert ProtocolWaiter.probe(probe, "127.0.0.1", _server(reply), timeout=1.0, options={}) is ready
+
+
+def test_first_probe_is_sent_before_the_initial_delay():
+    events = list()
+    results = iter([False, False, True])
+
+    def _check():
+        events.append("check")
+        return next(results)
+
+    with mock.patch("testcompose.waiters.waiting_utils.sleep", side_effect=events.append):
+        assert poll_until(_check, timeout=10, initial_interval=0.1, max_interval=1)
+
+    assert events[0] == "check" and events[2] == "check" and events[4] == "check"
+    assert 0.08 <= events[1] <= 0.12 and 0.16 <= events[3] <= 0.24
+
+
+class _LogStream:
+    """Followed log stream of a container, yields the given chunks and then blocks
+    until it is closed, unless it ends with the container
+    """
+
+    def __init__(self, chunks: List[bytes], ends: bool = False) -> None:
+        self._chunks: List[bytes] = chunks
+        self._ends: bool = ends
+        self._closed: threading.Event = threading.Event()
+
+    @property
+    def closed(self) -> bool:
+        return self._closed.is_set()
+
+    def close(self) -> None:
+        self._closed.set()
+
+    def __iter__(self) -> Iterator[bytes]:
+        yield from self._chunks
+        if not self._ends:
+            self._closed.wait(30)
+
+
+def _search_logs(log_stream: _LogStream, regex: str, timeout_ms: int = 30000) -> float:
+    container = mock.Mock()
+    container.name = "app"
+    container.logs.return_value = log_stream
+    start = time.monotonic()
+    LogWaiter.search_container_logs(
+        mock.Mock(), container, ContainerLogWaitParameter(log_line_regex=regex, wait_timeout_ms=timeout_ms)
+    )
+    container.logs.assert_called_once_with(stream=True, follow=True)
+    assert log_stream.closed
+    return time.monotonic() - start
+
+
+def test_log_message_split_across_chunks_is_found():
+    assert _search_logs(_LogStream([b"booting\nstartup com", b"ple", b"te in 3s\n"]), "^startup complete") < 5
+
+
+def test_multi_byte_characters_split_across_chunks_are_decoded():
+    message = "Bereit zum Empfang ✓\n".encode()
+    split = message.index("✓".encode()) + 1
+    assert _search_logs(_LogStream([message[:split], message[split:]]), "Empfang ✓$") < 5
+
+
+def test_log_search_returns_as_soon_as_the_message_appears():
+    # the stream stays open, the search does not wait for more output
+    assert _search_logs(_LogStream([b"ready\n"]), "ready", timeout_ms=30000) < 5
+
+
+def test_log_search_ends_with_the_timeout_or_the_stream():
+    assert 0.2 <= _search_logs(_LogStream([b"starting\n"]), "ready", timeout_ms=200) < 5
+    # a stream that ends without the message, i.e. a stopped container, does not wait for the timeout
+    assert _search_logs(_LogStream([b"starting\n"], ends=True), "ready", timeout_ms=30000) < 5
+
+
+def test_log_tail_is_bounded_and_cut_at_a_line_start():
+    buffer = "x" * LogWaiter.TAIL_BUFFER_SIZE + "\nlast line"
+    tail = LogWaiter._bounded_tail("first line\n" + buffer)
+    assert len(tail) <= LogWaiter.TAIL_BUFFER_SIZE and tail == "last line"